@@ -0,0 +1,39 @@
+"""Add keyset pagination indexes for admin lists
+
+Revision ID: 5e1c9b7d3a20
+Revises: d7f2a3c91e04
+Create Date: 2026-10-17 19:05:31.208114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e1c9b7d3a20'
+down_revision: Union[str, Sequence[str], None] = 'd7f2a3c91e04'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # crud.get_items_page: ORDER BY (sort key, id) after the cursor, optionally for one subject
+    op.create_index('ix_sources_past_papers_year_id', 'past_papers', ['year', 'id'], unique=False, schema='sources')
+    op.create_index('ix_sources_past_papers_subject_year_id', 'past_papers', ['subject_id', 'year', 'id'], unique=False, schema='sources')
+    op.create_index('ix_sources_model_papers_paper_name_id', 'model_papers', ['paper_name', 'id'], unique=False, schema='sources')
+    op.create_index('ix_sources_model_papers_subject_paper_name_id', 'model_papers', ['subject_id', 'paper_name', 'id'], unique=False, schema='sources')
+    op.create_index('ix_sources_theories_unit_id', 'theories', ['unit', 'id'], unique=False, schema='sources')
+    op.create_index('ix_sources_theories_subject_unit_id', 'theories', ['subject_id', 'unit', 'id'], unique=False, schema='sources')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_sources_theories_subject_unit_id', table_name='theories', schema='sources')
+    op.drop_index('ix_sources_theories_unit_id', table_name='theories', schema='sources')
+    op.drop_index('ix_sources_model_papers_subject_paper_name_id', table_name='model_papers', schema='sources')
+    op.drop_index('ix_sources_model_papers_paper_name_id', table_name='model_papers', schema='sources')
+    op.drop_index('ix_sources_past_papers_subject_year_id', table_name='past_papers', schema='sources')
+    op.drop_index('ix_sources_past_papers_year_id', table_name='past_papers', schema='sources')
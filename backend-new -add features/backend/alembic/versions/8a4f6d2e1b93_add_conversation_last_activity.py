@@ -0,0 +1,39 @@
+"""Add conversation last activity and list indexes
+
+Revision ID: 8a4f6d2e1b93
+Revises: 5e1c9b7d3a20
+Create Date: 2026-10-17 19:48:12.640271
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8a4f6d2e1b93'
+down_revision: Union[str, Sequence[str], None] = '5e1c9b7d3a20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('conversations', sa.Column('updated_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False))
+    # Existing conversations: last activity is their latest message, or their creation
+    op.execute(
+        "UPDATE conversations SET updated_at = coalesce("
+        "(SELECT max(messages.created_at) FROM messages WHERE messages.conversation_id = conversations.id), "
+        "conversations.created_at, now())"
+    )
+    # crud.conversation_list_query: WHERE user_id = :user ORDER BY (created_at | updated_at, id) DESC
+    op.create_index('ix_conversations_user_id_created_at_id', 'conversations', ['user_id', 'created_at', 'id'], unique=False)
+    op.create_index('ix_conversations_user_id_updated_at_id', 'conversations', ['user_id', 'updated_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_conversations_user_id_updated_at_id', table_name='conversations')
+    op.drop_index('ix_conversations_user_id_created_at_id', table_name='conversations')
+    op.drop_column('conversations', 'updated_at')
@@ -0,0 +1,37 @@
+"""Add indexes for RAG lookup paths
+
+Revision ID: b3d51f0a7c2e
+Revises: 9c87c0e648f5
+Create Date: 2026-10-17 16:40:12.512904
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b3d51f0a7c2e'
+down_revision: Union[str, Sequence[str], None] = '9c87c0e648f5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # crud.get_past_paper_question / get_model_paper_question: equality on all four columns
+    op.create_index('ix_sources_past_papers_lookup', 'past_papers', ['subject_id', 'year', 'question_type', 'question_number'], unique=False, schema='sources')
+    op.create_index('ix_sources_model_papers_lookup', 'model_papers', ['subject_id', 'paper_name', 'question_type', 'question_number'], unique=False, schema='sources')
+    # crud.get_messages_by_conversation: filter on conversation_id, ORDER BY created_at DESC LIMIT n
+    op.create_index('ix_messages_conversation_id_created_at', 'messages', ['conversation_id', 'created_at'], unique=False)
+    # crud.get_subject_by_name: lower(name) = lower(:name)
+    op.create_index('ix_sources_subjects_name_lower', 'subjects', [sa.text('lower(name)')], unique=False, schema='sources')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_sources_subjects_name_lower', table_name='subjects', schema='sources')
+    op.drop_index('ix_messages_conversation_id_created_at', table_name='messages')
+    op.drop_index('ix_sources_model_papers_lookup', table_name='model_papers', schema='sources')
+    op.drop_index('ix_sources_past_papers_lookup', table_name='past_papers', schema='sources')
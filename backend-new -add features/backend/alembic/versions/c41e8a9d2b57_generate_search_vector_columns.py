@@ -0,0 +1,52 @@
+"""Generate search_vector columns from question content
+
+Revision ID: c41e8a9d2b57
+Revises: b3d51f0a7c2e
+Create Date: 2026-10-17 17:05:31.204417
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c41e8a9d2b57'
+down_revision: Union[str, Sequence[str], None] = 'b3d51f0a7c2e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Must match SEARCH_VECTOR_EXPRESSION in app/models/models.py.
+# Unit names rank highest, then the string values of question_data (not its keys), then the theory notes.
+SEARCH_VECTOR_EXPRESSION = (
+    "setweight(to_tsvector('simple'::regconfig, coalesce(question_unit, '')), 'A') || "
+    "setweight(jsonb_to_tsvector('simple'::regconfig, question_data, '[\"string\"]'), 'B') || "
+    "setweight(to_tsvector('simple'::regconfig, coalesce(relevant_theory, '')), 'C')"
+)
+
+TABLES = {
+    'past_papers': 'ix_sources_past_papers_search_vector',
+    'model_papers': 'ix_sources_model_papers_search_vector',
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # A column can't be turned into a generated one in place, so it is re-added.
+    # Adding a STORED generated column rewrites the table, which backfills every existing row.
+    for table, index_name in TABLES.items():
+        op.drop_index(index_name, table_name=table, schema='sources', postgresql_using='gin')
+        op.drop_column(table, 'search_vector', schema='sources')
+        op.add_column(table, sa.Column('search_vector', postgresql.TSVECTOR(), sa.Computed(SEARCH_VECTOR_EXPRESSION, persisted=True), nullable=True), schema='sources')
+        op.create_index(index_name, table, ['search_vector'], unique=False, schema='sources', postgresql_using='gin')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table, index_name in TABLES.items():
+        op.drop_index(index_name, table_name=table, schema='sources', postgresql_using='gin')
+        op.drop_column(table, 'search_vector', schema='sources')
+        op.add_column(table, sa.Column('search_vector', postgresql.TSVECTOR(), nullable=True), schema='sources')
+        op.create_index(index_name, table, ['search_vector'], unique=False, schema='sources', postgresql_using='gin')
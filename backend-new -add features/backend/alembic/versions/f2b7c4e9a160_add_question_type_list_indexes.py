@@ -0,0 +1,32 @@
+"""Add question type indexes for admin question lists
+
+Revision ID: f2b7c4e9a160
+Revises: 8a4f6d2e1b93
+Create Date: 2026-10-17 21:12:47.530918
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2b7c4e9a160'
+down_revision: Union[str, Sequence[str], None] = '8a4f6d2e1b93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # crud.get_items_page with a question_type filter: without these a rare type
+    # filters the (subject_id, sort key, id) scan and can read most of the subject
+    op.create_index('ix_sources_past_papers_subject_type_year_id', 'past_papers', ['subject_id', 'question_type', 'year', 'id'], unique=False, schema='sources')
+    op.create_index('ix_sources_model_papers_subject_type_paper_name_id', 'model_papers', ['subject_id', 'question_type', 'paper_name', 'id'], unique=False, schema='sources')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_sources_model_papers_subject_type_paper_name_id', table_name='model_papers', schema='sources')
+    op.drop_index('ix_sources_past_papers_subject_type_year_id', table_name='past_papers', schema='sources')
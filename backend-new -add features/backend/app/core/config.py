@@ -6,6 +6,10 @@ load_dotenv()
 
 class Settings:
     DATABASE_URL: str = os.getenv("DATABASE_URL")
+    # Optional explicit asyncpg URL; derived from DATABASE_URL when unset
+    ASYNC_DATABASE_URL: str = os.getenv("ASYNC_DATABASE_URL")
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "10"))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "20"))
     GOOGLE_CLIENT_ID: str = os.getenv("GOOGLE_CLIENT_ID")
     GOOGLE_CLIENT_SECRET: str = os.getenv("GOOGLE_CLIENT_SECRET")
     GEMINI_API_KEY: str = os.getenv("GEMINI_API_KEY")
@@ -14,8 +18,66 @@ class Settings:
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60
     REFRESH_TOKEN_EXPIRE_DAYS: int = 30
+    # Authenticated-user cache used by get_current_user
+    USER_CACHE_TTL_SECONDS: int = int(os.getenv("USER_CACHE_TTL_SECONDS", "60"))
+    USER_CACHE_MAX_SIZE: int = int(os.getenv("USER_CACHE_MAX_SIZE", "10000"))
     WEAVIATE_URL: str = os.getenv("WEAVIATE_URL")
     WEAVIATE_API_KEY: str = os.getenv("WEAVIATE_API_KEY")
     GCP_PROJECT_ID: str = os.getenv("GCP_PROJECT_ID")
+    # Max concurrent Gemini requests per worker process
+    LLM_MAX_CONCURRENCY: int = int(os.getenv("LLM_MAX_CONCURRENCY", "16"))
+    # Chat history kept in the prompt: recent turns up to this many (estimated) tokens, older ones summarised
+    CONTEXT_TOKEN_BUDGET: int = int(os.getenv("CONTEXT_TOKEN_BUDGET", "1500"))
+    # Messages loaded from the DB when a socket connects
+    CONTEXT_MAX_MESSAGES: int = int(os.getenv("CONTEXT_MAX_MESSAGES", "20"))
+    # Write-behind chat message persistence
+    MESSAGE_FLUSH_INTERVAL_SECONDS: float = float(os.getenv("MESSAGE_FLUSH_INTERVAL_SECONDS", "0.5"))
+    MESSAGE_FLUSH_MAX_BATCH: int = int(os.getenv("MESSAGE_FLUSH_MAX_BATCH", "500"))
+    # Cached final answers for single past/model paper question lookups. Edits only evict
+    # the editing worker's copy; other workers serve the old answer for up to the TTL
+    ANSWER_CACHE_TTL_SECONDS: int = int(os.getenv("ANSWER_CACHE_TTL_SECONDS", "3600"))
+    ANSWER_CACHE_MAX_SIZE: int = int(os.getenv("ANSWER_CACHE_MAX_SIZE", "2000"))
+    # Theory retrieval backend: "weaviate" (remote cluster) or "local" (memory-mapped index
+    # built by `ingest_theories.py --target local`)
+    THEORY_BACKEND: str = os.getenv("THEORY_BACKEND", "weaviate")
+    THEORY_INDEX_DIR: str = os.getenv("THEORY_INDEX_DIR", "data/theory_index")
+    # Fuse vector and BM25 theory results with reciprocal-rank fusion: score = sum(1 / (k + rank)).
+    # Each retriever contributes its top THEORY_HYBRID_CANDIDATES chunks.
+    THEORY_HYBRID_SEARCH: bool = os.getenv("THEORY_HYBRID_SEARCH", "true").lower() == "true"
+    THEORY_RRF_K: int = int(os.getenv("THEORY_RRF_K", "60"))
+    THEORY_HYBRID_CANDIDATES: int = int(os.getenv("THEORY_HYBRID_CANDIDATES", "20"))
+    # Embedding model the Theory collection is vectorized with: a Google model (e.g.
+    # "text-embedding-004") or "local:<sentence-transformers model>" run on the CPU (e.g.
+    # "local:intfloat/multilingual-e5-small"; needs sentence-transformers installed).
+    # When set, topics are embedded once and cached, and Weaviate is queried with near_vector;
+    # when unset, Weaviate vectorizes every query itself (near_text).
+    THEORY_EMBEDDING_MODEL: str = os.getenv("THEORY_EMBEDDING_MODEL")
+    # Texts per local model forward pass, and where vectors are cached by content hash ("" disables)
+    EMBEDDING_BATCH_SIZE: int = int(os.getenv("EMBEDDING_BATCH_SIZE", "32"))
+    EMBEDDING_CACHE_DIR: str = os.getenv("EMBEDDING_CACHE_DIR", "data/embedding_cache")
+    # Theory search cache: topic -> embedding, and (topic, language, subject, k) -> results
+    THEORY_CACHE_TTL_SECONDS: int = int(os.getenv("THEORY_CACHE_TTL_SECONDS", "86400"))
+    THEORY_VECTOR_CACHE_MAX_SIZE: int = int(os.getenv("THEORY_VECTOR_CACHE_MAX_SIZE", "20000"))
+    THEORY_RESULT_CACHE_MAX_SIZE: int = int(os.getenv("THEORY_RESULT_CACHE_MAX_SIZE", "5000"))
+    # How often the cache checks whether ingestion changed the Theory collection
+    THEORY_CACHE_CHECK_SECONDS: int = int(os.getenv("THEORY_CACHE_CHECK_SECONDS", "60"))
+    # Theory ingestion: PDF extraction processes (0 = one per CPU), chunks buffered between
+    # extraction and upload, and where per-file content hashes are recorded
+    INGEST_WORKERS: int = int(os.getenv("INGEST_WORKERS", "0"))
+    INGEST_QUEUE_SIZE: int = int(os.getenv("INGEST_QUEUE_SIZE", "1000"))
+    INGEST_MANIFEST_PATH: str = os.getenv("INGEST_MANIFEST_PATH", "data/ingest_manifest.json")
+    # Failed objects and embedding calls are retried this many times with exponential backoff
+    # starting at INGEST_RETRY_BASE_SECONDS; objects that still fail go to the dead-letter file
+    INGEST_MAX_RETRIES: int = int(os.getenv("INGEST_MAX_RETRIES", "5"))
+    INGEST_RETRY_BASE_SECONDS: float = float(os.getenv("INGEST_RETRY_BASE_SECONDS", "2"))
+    INGEST_DEAD_LETTER_PATH: str = os.getenv("INGEST_DEAD_LETTER_PATH", "data/ingest_dead_letter.jsonl")
+    # Admin content import / export: rows per INSERT, and rows fetched per server-side cursor round trip
+    CONTENT_IMPORT_BATCH_SIZE: int = int(os.getenv("CONTENT_IMPORT_BATCH_SIZE", "500"))
+    CONTENT_EXPORT_BATCH_SIZE: int = int(os.getenv("CONTENT_EXPORT_BATCH_SIZE", "1000"))
+    # Theory chunk size in estimated tokens, the tail repeated at the start of the next
+    # chunk, and the size below which a section's last chunk joins the one before it
+    CHUNK_MAX_TOKENS: int = int(os.getenv("CHUNK_MAX_TOKENS", "400"))
+    CHUNK_OVERLAP_TOKENS: int = int(os.getenv("CHUNK_OVERLAP_TOKENS", "60"))
+    CHUNK_MIN_TOKENS: int = int(os.getenv("CHUNK_MIN_TOKENS", "40"))
 
 settings = Settings()
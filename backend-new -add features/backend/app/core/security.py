@@ -1,11 +1,14 @@
 # backend/app/core/security.py
+import uuid
 from datetime import datetime, timedelta
 from jose import JWTError, jwt
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from .config import settings
-from app.crud import crud
+from app.crud import crud, async_crud
+from app.services.user_cache import user_cache
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
@@ -17,53 +20,103 @@ def get_db():
     finally:
         db.close()
 
+async def get_async_db():
+    from ..db.session import AsyncSessionLocal
+    async with AsyncSessionLocal() as db:
+        yield db
+
 def create_access_token(data: dict):
     to_encode = data.copy()
     expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode.update({"exp": expire})
+    to_encode.update({"exp": expire, "type": "access", "jti": uuid.uuid4().hex})
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
 def create_refresh_token(data: dict):
     to_encode = data.copy()
     expire = datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
-    to_encode.update({"exp": expire, "type": "refresh"})
+    to_encode.update({"exp": expire, "type": "refresh", "jti": uuid.uuid4().hex})
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
-    credentials_exception = HTTPException(
+def _credentials_exception():
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+def _decode_access_token(token: str) -> str:
+    """Returns the google_id (`sub`) of a valid access token."""
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
         google_id: str = payload.get("sub")
-        if google_id is None:
-            raise credentials_exception
+        # A refresh token must not work as a bearer token
+        if google_id is None or payload.get("type") == "refresh":
+            raise _credentials_exception()
     except JWTError:
-        raise credentials_exception
-    user = crud.get_user_by_google_id(db, google_id=google_id)
+        raise _credentials_exception()
+    return google_id
+
+def _get_cached_user(db: Session, google_id: str):
+    user = user_cache.get(google_id)
     if user is None:
-        raise credentials_exception
+        user = crud.get_user_by_google_id(db, google_id=google_id)
+        if user is not None:
+            db.expunge(user)
+            user_cache.put(google_id, user)
     return user
 
-def verify_refresh_token(token: str, db: Session):
+# FastAPI caches a dependency's result for the whole request, so a route that depends on
+# get_current_user both at router level and as a `current_user` parameter resolves it once.
+# Across requests, users are served from user_cache.
+def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+    user = _get_cached_user(db, _decode_access_token(token))
+    if user is None:
+        raise _credentials_exception()
+    return user
+
+async def get_current_user_async(token: str, db: AsyncSession):
+    """Same as get_current_user, for code running on the event loop (e.g. WebSockets)."""
+    google_id = _decode_access_token(token)
+    user = user_cache.get(google_id)
+    if user is None:
+        user = await async_crud.get_user_by_google_id(db, google_id=google_id)
+        if user is None:
+            raise _credentials_exception()
+        db.expunge(user)
+        user_cache.put(google_id, user)
+    return user
+
+def decode_refresh_token(token: str) -> dict:
+    """Returns the claims of a validly signed, unexpired refresh token."""
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Invalid refresh token",
     )
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        if payload.get("type") != "refresh":
-            raise credentials_exception
-        google_id: str = payload.get("sub")
-        if google_id is None:
+        if payload.get("type") != "refresh" or payload.get("sub") is None:
             raise credentials_exception
     except JWTError:
         raise credentials_exception
-    user = crud.get_user_by_google_id(db, google_id=google_id)
+    return payload
+
+def verify_refresh_token(token: str, db: Session):
+    """
+    Stateless check of a refresh token: signature, expiry, and the jti denylist.
+    Read-only; the user normally comes from user_cache.
+    """
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Invalid refresh token",
+    )
+    payload = decode_refresh_token(token)
+    jti = payload.get("jti")
+    # Tokens issued before jti was added can't be revoked individually, they just expire
+    if jti and crud.is_token_revoked(db, jti):
+        raise credentials_exception
+    user = _get_cached_user(db, payload["sub"])
     if user is None:
         raise credentials_exception
     return user
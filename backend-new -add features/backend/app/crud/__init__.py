@@ -1,18 +1,20 @@
 # Database CRUD operations
+from . import async_crud
 from .crud import (
-    get_item, get_items, create_item, delete_item, update_item,
-    get_user_by_google_id, create_user,
+    get_item, get_items, get_items_page, create_item, delete_item, update_item, validate_bulk_items, create_items_bulk,
+    get_user_by_google_id, create_user, is_token_revoked, revoke_token,
     get_conversations_by_user, create_conversation, get_conversation, delete_conversation,
     get_messages_by_conversation, create_message,
-    get_subject_by_name, get_past_paper_question, get_model_paper_question,
+    get_subject_by_name, resolve_subject_id, get_past_paper_question, get_model_paper_question,
     get_theory_by_topic, search_questions_by_topic, update_conversation_title
 )
 
 __all__ = [
-    "get_item", "get_items", "create_item", "delete_item", "update_item",
-    "get_user_by_google_id", "create_user",
+    "async_crud",
+    "get_item", "get_items", "get_items_page", "create_item", "delete_item", "update_item", "validate_bulk_items", "create_items_bulk",
+    "get_user_by_google_id", "create_user", "is_token_revoked", "revoke_token",
     "get_conversations_by_user", "create_conversation", "get_conversation", "delete_conversation",
     "get_messages_by_conversation", "create_message",
-    "get_subject_by_name", "get_past_paper_question", "get_model_paper_question",
+    "get_subject_by_name", "resolve_subject_id", "get_past_paper_question", "get_model_paper_question",
     "get_theory_by_topic", "search_questions_by_topic", "update_conversation_title"
 ]
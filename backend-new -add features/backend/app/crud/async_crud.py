@@ -0,0 +1,146 @@
+# backend/app/crud/async_crud.py
+# Async counterparts of the crud functions used on the chat path.
+# They take an AsyncSession and never block the event loop on a DB round-trip.
+from sqlalchemy import func, insert, select, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models import models
+from app.crud.crud import topic_search_query, topic_search_page
+from app.services.subject_resolver import subject_resolver
+import uuid
+from datetime import timedelta
+from typing import Optional
+
+
+# --- User Functions ---
+async def get_user_by_google_id(db: AsyncSession, google_id: str):
+    result = await db.execute(select(models.User).filter(models.User.google_id == google_id))
+    return result.scalars().first()
+
+# --- Conversation & Message Functions ---
+async def get_conversation(db: AsyncSession, conversation_id: uuid.UUID, user_id: uuid.UUID):
+    result = await db.execute(
+        select(models.Conversation).filter(models.Conversation.id == conversation_id, models.Conversation.user_id == user_id)
+    )
+    return result.scalars().first()
+
+async def get_messages_by_conversation(db: AsyncSession, conversation_id: uuid.UUID, limit: int = None):
+    query = select(models.Message).filter(models.Message.conversation_id == conversation_id).order_by(models.Message.created_at.desc())
+    if limit:
+        query = query.limit(limit)
+
+    # We fetch in descending order to get the latest, then reverse for correct chronological order
+    result = await db.execute(query)
+    return result.scalars().all()[::-1]
+
+async def create_message(db: AsyncSession, conversation_id: uuid.UUID, role: str, content: str, question_image_url: Optional[str] = None,
+    answer_image_url: Optional[str] = None,
+    youtube_link: Optional[str] = None):
+    db_message = models.Message(conversation_id=conversation_id, role=role, content=content, question_image_url=question_image_url,
+        answer_image_url=answer_image_url,
+        youtube_link=youtube_link)
+    db.add(db_message)
+    await db.execute(update(models.Conversation).where(models.Conversation.id == conversation_id).values(updated_at=func.now()))
+    await db.commit()
+    await db.refresh(db_message)
+    return db_message
+
+async def create_messages(db: AsyncSession, rows: list[dict]):
+    """
+    Inserts many messages in one multi-row INSERT, without reading them back.
+    created_at comes from the database clock, a microsecond apart per row so the
+    list order survives; rows inserted together would otherwise share one now().
+    """
+    if not rows:
+        return
+    stamped = [{**row, "created_at": func.now() + timedelta(microseconds=index)} for index, row in enumerate(rows)]
+    await db.execute(insert(models.Message).values(stamped))
+    # Same transaction, so a conversation's last activity never lags its messages
+    conversation_ids = {row["conversation_id"] for row in rows}
+    await db.execute(update(models.Conversation).where(models.Conversation.id.in_(conversation_ids)).values(updated_at=func.now()))
+    await db.commit()
+
+async def update_conversation_title(db: AsyncSession, conversation_id: uuid.UUID, title: str):
+    result = await db.execute(select(models.Conversation).filter(models.Conversation.id == conversation_id))
+    conversation = result.scalars().first()
+    if conversation:
+        conversation.title = title
+        await db.commit()
+        return conversation
+    return None
+
+
+# --- RAG Tool Functions ---
+async def get_subject_by_name(db: AsyncSession, subject_name: str):
+    result = await db.execute(select(models.Subject).filter(func.lower(models.Subject.name) == func.lower(subject_name)))
+    return result.scalars().first()
+
+async def resolve_subject_id(db: AsyncSession, subject_name: str) -> Optional[uuid.UUID]:
+    """Subject id for a name or alias, served from the process-local subject cache."""
+    if not subject_resolver.is_fresh:
+        await subject_resolver.load_async(db)
+    subject_id = subject_resolver.get(subject_name)
+    if subject_id is None and not subject_resolver.is_known_miss(subject_name):
+        # May have been created through another worker since the cache was loaded
+        subject_obj = await get_subject_by_name(db, subject_resolver.canonical_name(subject_name))
+        if subject_obj:
+            subject_resolver.remember(subject_name, subject_obj.id)
+            subject_id = subject_obj.id
+        else:
+            subject_resolver.remember_miss(subject_name)
+    return subject_id
+
+async def get_past_paper_question(db: AsyncSession, subject: str, year: int, question_type: str, question_number: int):
+    subject_id = await resolve_subject_id(db, subject)
+    if not subject_id:
+        return None
+
+    result = await db.execute(select(models.PastPaperQuestion).filter(
+        models.PastPaperQuestion.subject_id == subject_id,
+        models.PastPaperQuestion.year == year,
+        models.PastPaperQuestion.question_type == question_type.lower(),
+        models.PastPaperQuestion.question_number == question_number
+    ))
+    return result.scalars().first()
+
+async def get_model_paper_question(db: AsyncSession, subject: str, paper_name: str, question_type: str, question_number: int):
+    subject_id = await resolve_subject_id(db, subject)
+    if not subject_id:
+        return None
+
+    result = await db.execute(select(models.ModelPaperQuestion).filter(
+        models.ModelPaperQuestion.subject_id == subject_id,
+        models.ModelPaperQuestion.paper_name == paper_name,
+        models.ModelPaperQuestion.question_type == question_type.lower(),
+        models.ModelPaperQuestion.question_number == question_number
+    ))
+    return result.scalars().first()
+
+async def search_questions_by_topic(db: AsyncSession, subject: str, topic: str, question_type: Optional[str] = None, year_start: Optional[int] = None,
+                                    year_end: Optional[int] = None, limit: int = 5, per_source_limit: Optional[int] = None,
+                                    cursor: Optional[str] = None) -> tuple[list[dict], Optional[str]]:
+    subject_id = await resolve_subject_id(db, subject)
+    if not subject_id:
+        return [], None
+
+    query = topic_search_query(subject_id, topic, question_type, year_start, year_end, limit, per_source_limit, cursor)
+    rows = [dict(row._mapping) for row in await db.execute(query)] if query is not None else []
+    return topic_search_page(rows, limit, per_source_limit, cursor)
+
+# --- Bulk Import Functions ---
+async def get_existing_subject_ids(db: AsyncSession, subject_ids: set) -> set:
+    result = await db.execute(select(models.Subject.id).where(models.Subject.id.in_(subject_ids)))
+    return set(result.scalars())
+
+async def get_existing_ids(db: AsyncSession, model, ids: set) -> set:
+    result = await db.execute(select(model.id).where(model.id.in_(ids)))
+    return set(result.scalars())
+
+async def get_existing_natural_keys(db: AsyncSession, model, key_fields: tuple, keys: set) -> set:
+    """The subset of `keys` (tuples of `key_fields` values) already stored in `model`."""
+    columns = [getattr(model, field) for field in key_fields]
+    result = await db.execute(select(*columns).where(tuple_(*columns).in_(keys)))
+    return {tuple(key) for key in result}
+
+async def insert_rows(db: AsyncSession, model, rows: list[dict]):
+    """One multi-row INSERT without committing: the caller owns the transaction."""
+    await db.execute(insert(model.__table__), rows)
@@ -1,11 +1,15 @@
 # backend/app/crud/crud.py
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy.orm import Session, load_only
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy import func, select, insert, update, true, union_all, literal_column, cast, null, tuple_, Float, Integer, String
 from app.models import models
 from app.schemas import schemas
 import uuid
+from datetime import datetime
 from typing import Optional, Type, TypeVar
 from app.services.vector_store import find_similar_theories
+from app.crud.pagination import encode_cursor, decode_cursor
+from app.services.subject_resolver import subject_resolver
 
 # Define a TypeVar for our SQLAlchemy models
 # This tells the type checker that any type passed must be a subclass of models.Base
@@ -19,6 +23,51 @@ def get_item(db: Session, model: Type[ModelType], item_id: uuid.UUID) -> Optiona
 def get_items(db: Session, model: Type[ModelType], skip: int = 0, limit: int = 100) -> list[ModelType]:
     return db.query(model).offset(skip).limit(limit).all()
 
+# Sort column of each keyset-paginated admin list, and whether it runs descending.
+# Ties are broken by id, so (sort key, id) identifies a position in the list.
+LIST_SORT_KEYS = {
+    models.PastPaperQuestion: (models.PastPaperQuestion.year, True),
+    models.ModelPaperQuestion: (models.ModelPaperQuestion.paper_name, False),
+    models.Theory: (models.Theory.unit, False),
+}
+
+def get_items_page(db: Session, model: Type[ModelType], limit: int = 100, cursor: Optional[str] = None,
+                   filters: Optional[dict] = None, columns: Optional[list[str]] = None) -> tuple[list[ModelType], Optional[str]]:
+    """
+    One page of `model` in (sort key, id) order, plus the cursor of the next page
+    (None on the last one). Filters are column -> value equalities; None values are
+    ignored. The (subject_id, sort key, id) and (sort key, id) indexes serve every
+    page with a single range scan, however deep. Raises ValueError for a bad cursor.
+    With `columns`, only those attributes are loaded and the rest stay deferred.
+    """
+    sort_column, descending = LIST_SORT_KEYS[model]
+    query = db.query(model)
+    if columns:
+        # The sort key is needed for the next cursor even if the caller doesn't list it
+        query = query.options(load_only(*{getattr(model, column) for column in columns} | {sort_column}))
+    for field, value in (filters or {}).items():
+        if value is not None:
+            query = query.filter(getattr(model, field) == value)
+    if cursor:
+        values = decode_cursor(cursor)
+        try:
+            after = (sort_column.type.python_type(values[0]), uuid.UUID(values[1]))
+        except (IndexError, TypeError, ValueError) as e:
+            raise ValueError("Invalid cursor") from e
+        position = tuple_(sort_column, model.id)
+        query = query.filter(position < tuple_(*after) if descending else position > tuple_(*after))
+    if descending:
+        query = query.order_by(sort_column.desc(), model.id.desc())
+    else:
+        query = query.order_by(sort_column, model.id)
+
+    # One extra row tells whether there is a next page
+    items = query.limit(limit + 1).all()
+    if len(items) <= limit:
+        return items, None
+    last = items[limit - 1]
+    return items[:limit], encode_cursor([getattr(last, sort_column.key), last.id])
+
 def create_item(db: Session, model: Type[ModelType], schema) -> ModelType:
     db_item = model(**schema.model_dump())
     db.add(db_item)
@@ -44,6 +93,66 @@ def update_item(db: Session, model: Type[ModelType], item_id: uuid.UUID, schema)
         db.refresh(db_item)
     return db_item
 
+# --- Bulk Inserts ---
+# Natural key of a question: a second row with the same key is almost certainly a re-import
+BULK_NATURAL_KEYS = {
+    models.PastPaperQuestion: ("subject_id", "year", "question_type", "question_number"),
+    models.ModelPaperQuestion: ("subject_id", "paper_name", "question_type", "question_number"),
+}
+
+def _bulk_error(index: int, field: str, message: str) -> dict:
+    # Same shape as FastAPI's own request validation errors
+    return {"loc": ["body", index, field], "msg": message, "type": "value_error"}
+
+def validate_bulk_items(db: Session, model: Type[ModelType], items: list) -> list[dict]:
+    """
+    Checks a bulk payload against the database before anything is written: every
+    subject must exist, and no question may repeat the natural key of another row
+    or of a stored question. Two queries regardless of the payload size.
+    """
+    rows = [item.model_dump() for item in items]
+    errors = []
+
+    subject_ids = {row["subject_id"] for row in rows}
+    known_subjects = set(db.scalars(select(models.Subject.id).where(models.Subject.id.in_(subject_ids)))) if subject_ids else set()
+    for index, row in enumerate(rows):
+        if row["subject_id"] not in known_subjects:
+            errors.append(_bulk_error(index, "subject_id", "Subject not found"))
+
+    key_fields = BULK_NATURAL_KEYS.get(model)
+    if key_fields and rows:
+        columns = [getattr(model, field) for field in key_fields]
+        keys = [tuple(row[field] for field in key_fields) for row in rows]
+        stored = {tuple(key) for key in db.execute(select(*columns).where(tuple_(*columns).in_(set(keys))))}
+        first_seen = {}
+        for index, key in enumerate(keys):
+            if key in stored:
+                errors.append(_bulk_error(index, "question_number", "Question already exists"))
+            elif key in first_seen:
+                errors.append(_bulk_error(index, "question_number", f"Duplicate of row {first_seen[key]}"))
+            else:
+                first_seen[key] = index
+    return errors
+
+def create_items_bulk(db: Session, model: Type[ModelType], items: list) -> list:
+    """
+    Inserts all items in one transaction with multi-row INSERT ... RETURNING statements
+    (SQLAlchemy packs up to 1000 rows into each) instead of a commit and refresh per row.
+    Returns the inserted rows in payload order.
+    """
+    if not items:
+        return []
+    # Generated columns (search_vector) are never sent back to the client
+    columns = [column for column in model.__table__.columns if column.computed is None]
+    statement = insert(model.__table__).returning(*columns, sort_by_parameter_order=True)
+    try:
+        rows = db.execute(statement, [item.model_dump() for item in items]).all()
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return rows
+
 # --- User Functions ---
 def get_user_by_google_id(db: Session, google_id: str):
     return db.query(models.User).filter(models.User.google_id == google_id).first()
@@ -59,9 +168,73 @@ def create_user(db: Session, user: schemas.UserCreate):
     db.refresh(db_user)
     return db_user
 
+# --- Token Functions ---
+def is_token_revoked(db: Session, jti: str) -> bool:
+    return db.query(models.RevokedToken.jti).filter(models.RevokedToken.jti == jti).first() is not None
+
+def revoke_token(db: Session, jti: str, expires_at: datetime):
+    # Entries past their token's expiry are useless, drop them so the denylist stays small
+    db.query(models.RevokedToken).filter(models.RevokedToken.expires_at < datetime.utcnow()).delete(synchronize_session=False)
+    db.execute(pg_insert(models.RevokedToken).values(jti=jti, expires_at=expires_at).on_conflict_do_nothing())
+    db.commit()
+
 # --- Conversation & Message Functions ---
-def get_conversations_by_user(db: Session, user_id: uuid.UUID):
-    return db.query(models.Conversation).filter(models.Conversation.user_id == user_id).order_by(models.Conversation.created_at.desc()).all()
+# Characters of the last message shown under each conversation in the sidebar
+CONVERSATION_SNIPPET_LENGTH = 120
+
+def conversation_list_query(user_id: uuid.UUID, sort: str = "created_at", limit: int = 50, cursor: Optional[str] = None):
+    """
+    One page of a user's conversations, newest first by `sort` ("created_at" or
+    "updated_at", i.e. last activity), each with a snippet of its last message.
+
+    The snippet comes from a LATERAL subquery that reads one row per conversation off
+    ix_messages_conversation_id_created_at, and the page itself is a range scan of
+    (user_id, sort, id), so the query costs the same however long the history is.
+    `cursor` (from `conversation_list_cursor`) resumes after the last row of the
+    previous page. Fetches limit + 1 rows so the caller can tell if there is more.
+    """
+    conversation = models.Conversation
+    sort_column = conversation.updated_at if sort == "updated_at" else conversation.created_at
+    last_message = (
+        select(models.Message.content, models.Message.role)
+        .where(models.Message.conversation_id == conversation.id)
+        .order_by(models.Message.created_at.desc())
+        .limit(1)
+        .lateral("last_message")
+    )
+    query = (
+        select(
+            conversation.id,
+            conversation.title,
+            conversation.created_at,
+            conversation.updated_at,
+            func.left(last_message.c.content, CONVERSATION_SNIPPET_LENGTH).label("last_message"),
+            last_message.c.role.label("last_message_role"),
+        )
+        .select_from(conversation)
+        .outerjoin(last_message, true())
+        .where(conversation.user_id == user_id)
+    )
+    if cursor:
+        values = decode_cursor(cursor)
+        try:
+            after = (datetime.fromisoformat(values[0]), uuid.UUID(values[1]))
+        except (IndexError, TypeError, ValueError) as e:
+            raise ValueError("Invalid cursor") from e
+        query = query.where(tuple_(sort_column, conversation.id) < tuple_(*after))
+    return query.order_by(sort_column.desc(), conversation.id.desc()).limit(limit + 1)
+
+def conversation_list_cursor(row: dict, sort: str = "created_at") -> str:
+    """Cursor that resumes a conversation list after `row`."""
+    return encode_cursor([row[sort], row["id"]])
+
+def get_conversations_by_user(db: Session, user_id: uuid.UUID, sort: str = "created_at", limit: int = 50,
+                              cursor: Optional[str] = None) -> tuple[list[dict], Optional[str]]:
+    """A page of conversations and the cursor of the next one (None on the last page)."""
+    rows = [dict(row._mapping) for row in db.execute(conversation_list_query(user_id, sort, limit, cursor))]
+    if len(rows) <= limit:
+        return rows, None
+    return rows[:limit], conversation_list_cursor(rows[limit - 1], sort)
 
 def create_conversation(db: Session, user_id: uuid.UUID, title: str = "New Conversation"):
     new_conversation = models.Conversation(user_id=user_id, title=title)
@@ -97,6 +270,7 @@ def create_message(db: Session, conversation_id: uuid.UUID, role: str, content:
         answer_image_url=answer_image_url,
         youtube_link=youtube_link)
     db.add(db_message)
+    db.execute(update(models.Conversation).where(models.Conversation.id == conversation_id).values(updated_at=func.now()))
     db.commit()
     db.refresh(db_message)
     return db_message
@@ -106,25 +280,40 @@ def create_message(db: Session, conversation_id: uuid.UUID, role: str, content:
 def get_subject_by_name(db: Session, subject_name: str):
     return db.query(models.Subject).filter(func.lower(models.Subject.name) == func.lower(subject_name)).first()
 
+def resolve_subject_id(db: Session, subject_name: str) -> Optional[uuid.UUID]:
+    """Subject id for a name or alias, served from the process-local subject cache."""
+    if not subject_resolver.is_fresh:
+        subject_resolver.load(db)
+    subject_id = subject_resolver.get(subject_name)
+    if subject_id is None and not subject_resolver.is_known_miss(subject_name):
+        # May have been created through another worker since the cache was loaded
+        subject_obj = get_subject_by_name(db, subject_resolver.canonical_name(subject_name))
+        if subject_obj:
+            subject_resolver.remember(subject_name, subject_obj.id)
+            subject_id = subject_obj.id
+        else:
+            subject_resolver.remember_miss(subject_name)
+    return subject_id
+
 def get_past_paper_question(db: Session, subject: str, year: int, question_type: str, question_number: int):
-    subject_obj = get_subject_by_name(db, subject)
-    if not subject_obj:
+    subject_id = resolve_subject_id(db, subject)
+    if not subject_id:
         return None
         
     return db.query(models.PastPaperQuestion).filter(
-        models.PastPaperQuestion.subject_id == subject_obj.id,
+        models.PastPaperQuestion.subject_id == subject_id,
         models.PastPaperQuestion.year == year,
         models.PastPaperQuestion.question_type == question_type.lower(),
         models.PastPaperQuestion.question_number == question_number
     ).first()
 
 def get_model_paper_question(db: Session, subject: str, paper_name: str, question_type: str, question_number: int):
-    subject_obj = get_subject_by_name(db, subject)
-    if not subject_obj:
+    subject_id = resolve_subject_id(db, subject)
+    if not subject_id:
         return None
         
     return db.query(models.ModelPaperQuestion).filter(
-        models.ModelPaperQuestion.subject_id == subject_obj.id,
+        models.ModelPaperQuestion.subject_id == subject_id,
         models.ModelPaperQuestion.paper_name == paper_name,
         models.ModelPaperQuestion.question_type == question_type.lower(),
         models.ModelPaperQuestion.question_number == question_number
@@ -139,27 +328,124 @@ def get_theory_by_topic(subject: str, topic: str, language: str = "tamil"):
     return find_similar_theories(
         topic=topic,
         language=language,
-        subject=subject
+        subject=subject_resolver.canonical_name(subject)
     )
 
-def search_questions_by_topic(db: Session, subject: str, topic: str, question_type: Optional[str], year_start: Optional[int], year_end: Optional[int], limit: int = 5):
-    subject_obj = get_subject_by_name(db, subject)
-    if not subject_obj:
-        return []
+# Sources of a topic search, in the order their positions appear in its cursor
+TOPIC_SEARCH_SOURCES = (("past_paper", models.PastPaperQuestion), ("model_paper", models.ModelPaperQuestion))
+# Cursor position of a source with no rows left
+TOPIC_SOURCE_DONE = "done"
 
-    query = db.query(models.PastPaperQuestion).filter(
-        models.PastPaperQuestion.subject_id == subject_obj.id,
-        models.PastPaperQuestion.search_vector.match(topic, postgresql_regconfig='simple')
-    )
+def _topic_search_positions(cursor: Optional[str]) -> dict:
+    """
+    Per-source positions of a topic search cursor: None (not started),
+    TOPIC_SOURCE_DONE, or the (rank, id) of the last row shown from that source.
+    Raises ValueError for a bad cursor.
+    """
+    if not cursor:
+        return {source: None for source, _ in TOPIC_SEARCH_SOURCES}
+    values = decode_cursor(cursor)
+    if len(values) != len(TOPIC_SEARCH_SOURCES):
+        raise ValueError("Invalid cursor")
+    positions = {}
+    for (source, _), value in zip(TOPIC_SEARCH_SOURCES, values):
+        try:
+            positions[source] = value if value in (None, TOPIC_SOURCE_DONE) else (float(value[0]), uuid.UUID(value[1]))
+        except (IndexError, KeyError, TypeError, ValueError) as e:
+            raise ValueError("Invalid cursor") from e
+    return positions
+
+def topic_search_query(subject_id: uuid.UUID, topic: str, question_type: Optional[str] = None, year_start: Optional[int] = None,
+                       year_end: Optional[int] = None, limit: int = 5, per_source_limit: Optional[int] = None, cursor: Optional[str] = None):
+    """
+    Builds one UNION ALL query over past and model papers, ranked by ts_rank_cd,
+    or returns None when no source has rows left.
+
+    Each branch is cut to `per_source_limit` (default `limit`) rows plus one by its own
+    GIN-served scan before the union, so the merge only ever sorts a handful of rows;
+    the extra row tells `topic_search_page` whether the source has more. Every source
+    resumes after its own (rank, id) position from `cursor`, so a page capped per
+    source never skips rows of the source it cut short.
+    Only the columns needed to list a question are selected; answers stay in the DB.
+    """
+    positions = _topic_search_positions(cursor)
+    tsquery = func.plainto_tsquery('simple', topic)
+
+    subqueries = []
+    for source, model in TOPIC_SEARCH_SOURCES:
+        # Model papers have no year, so they can't satisfy a year range
+        if positions[source] == TOPIC_SOURCE_DONE or (model is models.ModelPaperQuestion and (year_start or year_end)):
+            continue
+        rank = cast(func.ts_rank_cd(model.search_vector, tsquery), Float(53))
+        # Inline constant: asyncpg can't infer the type of an untyped bind in the select list
+        source_col = literal_column(f"'{source}'", String)
+        query = select(
+            source_col.label("source"),
+            model.id,
+            model.year if model is models.PastPaperQuestion else cast(null(), Integer).label("year"),
+            model.paper_name if model is models.ModelPaperQuestion else cast(null(), String).label("paper_name"),
+            model.question_type,
+            model.question_number,
+            model.question_unit,
+            model.question_data,
+            rank.label("rank"),
+        ).filter(
+            model.subject_id == subject_id,
+            model.search_vector.op('@@')(tsquery),
+        )
+        if question_type:
+            query = query.filter(model.question_type == question_type.lower())
+        if year_start:
+            query = query.filter(model.year >= year_start)
+        if year_end:
+            query = query.filter(model.year <= year_end)
+        if positions[source]:
+            query = query.filter(tuple_(rank, model.id) < tuple_(*positions[source]))
+        query = query.order_by(rank.desc(), model.id.desc()).limit((per_source_limit or limit) + 1)
+        subqueries.append(query.subquery())
+
+    if not subqueries:
+        return None
+    combined = union_all(*[select(*sq.c) for sq in subqueries]).subquery()
+    return select(combined).order_by(combined.c.rank.desc(), combined.c.source.desc(), combined.c.id.desc())
+
+def topic_search_page(rows: list[dict], limit: int = 5, per_source_limit: Optional[int] = None,
+                      cursor: Optional[str] = None) -> tuple[list[dict], Optional[str]]:
+    """
+    The page shown from the rows of `topic_search_query`, in (rank, source, id)
+    order, and the cursor of the next page (None once every source is exhausted).
+    """
+    positions = _topic_search_positions(cursor)
+    cap = per_source_limit or limit
+    fetched = {source: [row for row in rows if row["source"] == source] for source, _ in TOPIC_SEARCH_SOURCES}
+    candidates = sorted((row for source_rows in fetched.values() for row in source_rows[:cap]),
+                        key=lambda row: (row["rank"], row["source"], str(row["id"])), reverse=True)
+    page = candidates[:limit]
+
+    next_positions = []
+    for source, _ in TOPIC_SEARCH_SOURCES:
+        shown = [row for row in page if row["source"] == source]
+        if shown:
+            positions[source] = [shown[-1]["rank"], shown[-1]["id"]]
+        if len(fetched[source]) <= len(shown):
+            # Everything this source returned made it onto the page
+            positions[source] = TOPIC_SOURCE_DONE
+        next_positions.append(positions[source])
+    if all(position == TOPIC_SOURCE_DONE for position in next_positions):
+        return page, None
+    return page, encode_cursor(next_positions)
 
-    if question_type:
-        query = query.filter(models.PastPaperQuestion.question_type == question_type.lower())
-    if year_start:
-        query = query.filter(models.PastPaperQuestion.year >= year_start)
-    if year_end:
-        query = query.filter(models.PastPaperQuestion.year <= year_end)
+def search_questions_by_topic(db: Session, subject: str, topic: str, question_type: Optional[str] = None, year_start: Optional[int] = None,
+                              year_end: Optional[int] = None, limit: int = 5, per_source_limit: Optional[int] = None,
+                              cursor: Optional[str] = None) -> tuple[list[dict], Optional[str]]:
+    """A page of questions matching `topic` and the cursor of the next one. Raises ValueError for a bad cursor."""
+    subject_id = resolve_subject_id(db, subject)
+    if not subject_id:
+        return [], None
 
-    return query.order_by(models.PastPaperQuestion.year.desc()).limit(limit).all()
+    query = topic_search_query(subject_id, topic, question_type, year_start, year_end, limit, per_source_limit, cursor)
+    rows = [dict(row._mapping) for row in db.execute(query)] if query is not None else []
+    return topic_search_page(rows, limit, per_source_limit, cursor)
 
 def update_conversation_title(db: Session, conversation_id: uuid.UUID, title: str):
     conversation = db.query(models.Conversation).filter(models.Conversation.id == conversation_id).first()
@@ -0,0 +1,23 @@
+# backend/app/crud/pagination.py
+# Opaque keyset cursors: the client gets back the sort key of the last row it saw
+# and sends it again to fetch the next page, so no page ever needs an OFFSET scan.
+import base64
+import json
+from typing import Sequence
+
+
+def encode_cursor(values: Sequence) -> str:
+    raw = json.dumps(list(values), default=str, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> list:
+    """Raises ValueError for anything that wasn't produced by encode_cursor."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
+    if not isinstance(values, list):
+        raise ValueError("Invalid cursor")
+    return values
@@ -1,8 +1,8 @@
 # backend/app/main.py
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Depends, HTTPException, Request, Response, status, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
 from starlette.middleware.sessions import SessionMiddleware
-from sqlalchemy.orm import Session
 
 from app.schemas import schemas
 from app.crud import crud
@@ -10,9 +10,24 @@ from app.models import models
 from app.routers import subjects, theories, past_papers, model_papers, auth, conversations
 from app.services.websocket_manager import websocket_endpoint
 from app.core.config import settings
-from app.core.security import get_current_user, get_db
+from app.core.security import get_current_user
+from app.db.session import AsyncSessionLocal
+from app.services.subject_resolver import subject_resolver
+from app.services.message_sink import message_sink
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Warm the subject cache so the first tool call doesn't pay for loading it
+    try:
+        async with AsyncSessionLocal() as db:
+            await subject_resolver.load_async(db)
+    except Exception as e:
+        print(f"Could not preload subjects: {str(e)}")
+    yield
+    # Write out chat messages still waiting in the write-behind queue
+    await message_sink.shutdown()
+
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(SessionMiddleware, secret_key=settings.SECRET_KEY)
 app.add_middleware(
@@ -21,6 +36,8 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Keyset cursor of the next page on admin list responses
+    expose_headers=["X-Next-Cursor"],
 )
 
 # Include routers
@@ -36,5 +53,5 @@ async def read_users_me(current_user: models.User = Depends(get_current_user)):
     return current_user
 
 @app.websocket("/ws/{conversation_id}")
-async def websocket_endpoint_route(websocket: WebSocket, conversation_id: str, db: Session = Depends(get_db)):
-    await websocket_endpoint(websocket, conversation_id, db)
\ No newline at end of file
+async def websocket_endpoint_route(websocket: WebSocket, conversation_id: str):
+    await websocket_endpoint(websocket, conversation_id)
\ No newline at end of file
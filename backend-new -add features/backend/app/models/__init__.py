@@ -1,12 +1,12 @@
 # Database models
 from .models import (
-    User, Conversation, Message,
+    User, Conversation, Message, RevokedToken,
     Subject, Theory, QuestionType,
     PastPaperQuestion, ModelPaperQuestion
 )
 
 __all__ = [
-    "User", "Conversation", "Message",
+    "User", "Conversation", "Message", "RevokedToken",
     "Subject", "Theory", "QuestionType",
     "PastPaperQuestion", "ModelPaperQuestion"
 ]
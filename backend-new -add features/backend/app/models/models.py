@@ -1,9 +1,9 @@
 # backend/app/models/models.py
 import uuid
 from sqlalchemy import (Column, String, DateTime, Text, func, text, ForeignKey, 
-                        Integer, Enum as PyEnum, Index)
+                        Integer, Enum as PyEnum, Index, Computed)
 import enum
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, deferred
 from sqlalchemy.dialects.postgresql import UUID, JSONB, TSVECTOR
 from app.db.base import Base
 
@@ -26,10 +26,18 @@ class Conversation(Base):
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
     title = Column(String, default="New Conversation")
     created_at = Column(DateTime, server_default=func.now())
+    # Last activity: bumped whenever messages are added (see crud.create_message / create_messages)
+    updated_at = Column(DateTime, server_default=func.now(), nullable=False)
     
     user = relationship("User", back_populates="conversations")
     messages = relationship("Message", back_populates="conversation", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        # Conversation list: one user's conversations in either sort order, keyset-paginated
+        Index('ix_conversations_user_id_created_at_id', 'user_id', 'created_at', 'id'),
+        Index('ix_conversations_user_id_updated_at_id', 'user_id', 'updated_at', 'id'),
+    )
+
 class Message(Base):
     __tablename__ = "messages"
     id = Column(UUID(as_uuid=True), primary_key=True, server_default=text("gen_random_uuid()"))
@@ -43,6 +51,17 @@ class Message(Base):
     
     conversation = relationship("Conversation", back_populates="messages")
 
+    __table_args__ = (
+        Index('ix_messages_conversation_id_created_at', 'conversation_id', 'created_at'),
+    )
+
+
+class RevokedToken(Base):
+    # Denylist of refresh tokens by jti; rows can be purged once the token would have expired anyway
+    __tablename__ = "revoked_tokens"
+    jti = Column(String, primary_key=True)
+    expires_at = Column(DateTime, nullable=False, index=True)
+
 
 # --- Educational Content Models (sources schema) ---
 
@@ -50,14 +69,17 @@ source_schema = "sources"
 
 class Subject(Base):
     __tablename__ = 'subjects'
-    __table_args__ = {'schema': source_schema}
     
     id = Column(UUID(as_uuid=True), primary_key=True, server_default=text("gen_random_uuid()"))
     name = Column(String, unique=True, nullable=False) # e.g., 'Physics', 'Chemistry'
 
+    __table_args__ = (
+        Index('ix_sources_subjects_name_lower', func.lower(name)),
+        {'schema': source_schema}
+    )
+
 class Theory(Base):
     __tablename__ = 'theories'
-    __table_args__ = {'schema': source_schema}
     
     id = Column(UUID(as_uuid=True), primary_key=True, server_default=text("gen_random_uuid()"))
     subject_id = Column(UUID(as_uuid=True), ForeignKey(f'{source_schema}.subjects.id'), nullable=False)
@@ -68,6 +90,21 @@ class Theory(Base):
     
     subject = relationship("Subject")
 
+    __table_args__ = (
+        # Keyset pages of the admin list, with and without a subject filter
+        Index('ix_sources_theories_unit_id', 'unit', 'id'),
+        Index('ix_sources_theories_subject_unit_id', 'subject_id', 'unit', 'id'),
+        {'schema': source_schema}
+    )
+
+# Full-text document for topic search, maintained by Postgres as a generated column.
+# Unit names rank highest, then the string values of question_data, then the theory notes.
+SEARCH_VECTOR_EXPRESSION = (
+    "setweight(to_tsvector('simple'::regconfig, coalesce(question_unit, '')), 'A') || "
+    "setweight(jsonb_to_tsvector('simple'::regconfig, question_data, '[\"string\"]'), 'B') || "
+    "setweight(to_tsvector('simple'::regconfig, coalesce(relevant_theory, '')), 'C')"
+)
+
 class QuestionType(enum.Enum):
     mcq = "mcq"
     structure = "structure"
@@ -91,10 +128,15 @@ class PastPaperQuestion(Base):
     youtube_link = Column(String, nullable=True)
 
     subject = relationship("Subject")
-    search_vector = Column(TSVECTOR)
+    # Deferred: only used in WHERE clauses, never worth shipping to Python
+    search_vector = deferred(Column(TSVECTOR, Computed(SEARCH_VECTOR_EXPRESSION, persisted=True)))
 
     __table_args__ = (
         Index('ix_sources_past_papers_search_vector', 'search_vector', postgresql_using='gin'),
+        Index('ix_sources_past_papers_lookup', 'subject_id', 'year', 'question_type', 'question_number'),
+        Index('ix_sources_past_papers_year_id', 'year', 'id'),
+        Index('ix_sources_past_papers_subject_year_id', 'subject_id', 'year', 'id'),
+        Index('ix_sources_past_papers_subject_type_year_id', 'subject_id', 'question_type', 'year', 'id'),
         {'schema': source_schema}
     )
 
@@ -116,9 +158,14 @@ class ModelPaperQuestion(Base):
     youtube_link = Column(String, nullable=True)
 
     subject = relationship("Subject")
-    search_vector = Column(TSVECTOR)
+    # Deferred: only used in WHERE clauses, never worth shipping to Python
+    search_vector = deferred(Column(TSVECTOR, Computed(SEARCH_VECTOR_EXPRESSION, persisted=True)))
     
     __table_args__ = (
         Index('ix_sources_model_papers_search_vector', 'search_vector', postgresql_using='gin'),
+        Index('ix_sources_model_papers_lookup', 'subject_id', 'paper_name', 'question_type', 'question_number'),
+        Index('ix_sources_model_papers_paper_name_id', 'paper_name', 'id'),
+        Index('ix_sources_model_papers_subject_paper_name_id', 'subject_id', 'paper_name', 'id'),
+        Index('ix_sources_model_papers_subject_type_paper_name_id', 'subject_id', 'question_type', 'paper_name', 'id'),
         {'schema': source_schema}
     )
@@ -163,13 +163,14 @@ SEARCH_RESULTS_TEMPLATE = """
 User's latest query: "{user_prompt}"
 
 Task: You are "A/L Thōzhan". You have searched the database and found several questions related to the user's topic.
-Present these questions to the user as a clear, numbered list. For each item, provide the Subject, Year, Question Type, and Question Number.
+Present these questions to the user as a clear, numbered list. For each item, provide the Subject, Year (or the model paper name when "source" is "model_paper"), Question Type, and Question Number.
 
 Example:
 1.  **பௌதிகவியல் 2024 - MCQ வினா 5**
 2.  **பௌதிகவியல் 2023 - அமைப்பு வினா 2(a)**
 
 Do not answer the questions, just list them. Let the user ask for a specific one next.
+If the context says more results are available, tell the user they can ask for more.
 """
 
 GENERAL_CHAT_TEMPLATE = """
@@ -182,4 +183,16 @@ User's latest query: "{user_prompt}"
 Task: You are "A/L Thōzhan". The user's query does not require specific database information.
 Engage in a helpful conversation, answering their question as an expert tutor for A/L Physics, Chemistry, or Combined Mathematics.
 Follow ALL formatting and LaTeX rules from your system instructions if mathematics is involved.
-"""
\ No newline at end of file
+"""
+
+CONVERSATION_SUMMARY_PROMPT = """
+You are maintaining a running summary of a tutoring conversation between a student and "A/L Thōzhan".
+
+Current summary:
+{summary}
+
+New messages to fold into the summary:
+{transcript}
+
+Task: Rewrite the summary so it also covers the new messages. Keep the subjects, questions (year, type, number), topics and any facts the student gave about themselves. Keep it under 150 words, in the language the student is using. Return only the summary text.
+"""
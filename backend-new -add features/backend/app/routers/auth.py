@@ -1,5 +1,5 @@
 # backend/app/routers/auth.py
-from fastapi import APIRouter, Depends, HTTPException, status, Request, Form
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Form, Response
 from fastapi.responses import RedirectResponse
 from sqlalchemy.orm import Session
 from authlib.integrations.starlette_client import OAuth
@@ -7,8 +7,10 @@ from authlib.integrations.starlette_client import OAuth
 from app.crud import crud
 from app.schemas import schemas
 from app.core.config import settings
-from app.core.security import create_access_token, create_refresh_token, get_db, verify_refresh_token
+from app.core.security import create_access_token, create_refresh_token, decode_refresh_token, get_db, verify_refresh_token
+from app.services.user_cache import user_cache
 from jose import JWTError, jwt
+from datetime import datetime
 
 router = APIRouter()
 oauth = OAuth()
@@ -47,31 +49,28 @@ async def auth_google_callback(request: Request, db: Session = Depends(get_db)):
     if not db_user:
         user_create = schemas.UserCreate(google_id=google_id, email=email, full_name=full_name)
         db_user = crud.create_user(db, user_create)
+    # A login always starts from the stored row, whatever this worker cached before
+    user_cache.invalidate(db_user.google_id)
 
+    # Tokens are self-contained JWTs and are not stored; revocation goes through /token/revoke
     access_token = create_access_token(data={"sub": db_user.google_id})
     refresh_token = create_refresh_token(data={"sub": db_user.google_id})
 
-    # Store tokens in the database
-    db_user.access_token = access_token
-    db_user.refresh_token = refresh_token
-    db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
-
     response = RedirectResponse(
         url=f"http://localhost:3000/auth/callback?access_token={access_token}&refresh_token={refresh_token}"
     )
     return response
 
 @router.post("/token/refresh", response_model=schemas.Token)
-async def refresh_token(refresh_token: str = Form(...), db: Session = Depends(get_db)):
+def refresh_token(refresh_token: str = Form(...), db: Session = Depends(get_db)):
+    # Read-only: signature/expiry check, a denylist lookup by jti and a (usually cached) user
     user = verify_refresh_token(refresh_token, db)
     access_token = create_access_token(data={"sub": user.google_id})
-
-    # Update access_token in the database
-    user.access_token = access_token
-    db.add(user)
-    db.commit()
-    db.refresh(user)
-
     return {"access_token": access_token, "token_type": "bearer"}
+
+@router.post("/token/revoke", status_code=status.HTTP_204_NO_CONTENT)
+def revoke_refresh_token(refresh_token: str = Form(...), db: Session = Depends(get_db)):
+    payload = decode_refresh_token(refresh_token)
+    if payload.get("jti"):
+        crud.revoke_token(db, jti=payload["jti"], expires_at=datetime.utcfromtimestamp(payload["exp"]))
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
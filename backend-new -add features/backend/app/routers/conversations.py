@@ -1,6 +1,7 @@
 # backend/app/routers/conversations.py
-from fastapi import APIRouter, Depends, HTTPException, status, Response
+from fastapi import APIRouter, Depends, HTTPException, Query, status, Response
 from sqlalchemy.orm import Session
+from typing import Literal, Optional
 import uuid
 
 from app import crud
@@ -19,9 +20,18 @@ def create_new_conversation(current_user: models.User = Depends(get_current_user
     conversation = crud.create_conversation(db=db, user_id=current_user.id)
     return conversation
 
-@router.get("/", response_model=list[schemas.Conversation])
-def get_user_conversations(current_user: models.User = Depends(get_current_user), db: Session = Depends(get_db)):
-    return crud.get_conversations_by_user(db=db, user_id=current_user.id)
+@router.get("/", response_model=list[schemas.ConversationSummary])
+def get_user_conversations(response: Response, limit: int = Query(50, ge=1, le=200), cursor: Optional[str] = None,
+                           sort: Literal["created_at", "updated_at"] = "created_at",
+                           current_user: models.User = Depends(get_current_user), db: Session = Depends(get_db)):
+    # Newest first; the next page's cursor is returned in X-Next-Cursor
+    try:
+        conversations, next_cursor = crud.get_conversations_by_user(db=db, user_id=current_user.id, sort=sort, limit=limit, cursor=cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return conversations
 
 @router.get("/{conversation_id}", response_model=schemas.ConversationWithMessages)
 def get_a_conversation(conversation_id: str, current_user: models.User = Depends(get_current_user), db: Session = Depends(get_db)):
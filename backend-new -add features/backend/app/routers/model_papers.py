@@ -1,9 +1,13 @@
 # backend/app/routers/model_papers.py
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Literal, Optional, Union
 import uuid
 from app import crud, models, schemas
-from app.core.security import get_current_user, get_db
+from app.core.security import get_current_user, get_db, get_async_db
+from app.services import content_io
+from app.services.answer_cache import answer_cache
 
 router = APIRouter(
     prefix="/admin/model-papers",
@@ -15,9 +19,35 @@ router = APIRouter(
 def create_model_paper_question(item: schemas.ModelPaperQuestionCreate, db: Session = Depends(get_db)):
     return crud.create_item(db=db, model=models.ModelPaperQuestion, schema=item)
 
-@router.get("/", response_model=list[schemas.ModelPaperQuestion])
-def read_model_paper_questions(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    return crud.get_items(db=db, model=models.ModelPaperQuestion, skip=skip, limit=limit)
+@router.get("/", response_model=Union[list[schemas.ModelPaperQuestion], list[schemas.ModelPaperQuestionSummary]])
+def read_model_paper_questions(response: Response, limit: int = Query(100, ge=1, le=500), cursor: Optional[str] = None,
+                               subject_id: Optional[uuid.UUID] = None, paper_name: Optional[str] = None,
+                               question_type: Optional[models.QuestionType] = None, unit: Optional[str] = None,
+                               view: Literal["full", "summary"] = "full", db: Session = Depends(get_db)):
+    # Ordered by paper name; the next page's cursor is returned in X-Next-Cursor
+    filters = {"subject_id": subject_id, "paper_name": paper_name, "question_type": question_type, "question_unit": unit}
+    columns = list(schemas.ModelPaperQuestionSummary.model_fields) if view == "summary" else None
+    try:
+        items, next_cursor = crud.get_items_page(db=db, model=models.ModelPaperQuestion, limit=limit, cursor=cursor,
+                                                 filters=filters, columns=columns)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    if view == "summary":
+        return [schemas.ModelPaperQuestionSummary.model_validate(item) for item in items]
+    return items
+
+# Declared before /{item_id} so "export" isn't parsed as an id
+@router.get("/export")
+async def export_model_paper_questions(fmt: Literal["ndjson", "csv"] = Query("ndjson", alias="format")):
+    return content_io.export_response(models.ModelPaperQuestion, fmt, "model_papers")
+
+@router.post("/import", response_model=schemas.ImportResult, status_code=status.HTTP_201_CREATED)
+async def import_model_paper_questions(request: Request, fmt: Literal["ndjson", "csv"] = Query("ndjson", alias="format"),
+                                       db: AsyncSession = Depends(get_async_db)):
+    imported = await content_io.import_rows(db, models.ModelPaperQuestion, schemas.ModelPaperQuestionCreate, request.stream(), fmt)
+    return schemas.ImportResult(imported=imported)
 
 @router.get("/{item_id}", response_model=schemas.ModelPaperQuestion)
 def read_model_paper_question(item_id: uuid.UUID, db: Session = Depends(get_db)):
@@ -28,11 +58,22 @@ def read_model_paper_question(item_id: uuid.UUID, db: Session = Depends(get_db))
 
 @router.patch("/{item_id}", response_model=schemas.ModelPaperQuestion)
 def update_model_paper_question(item_id: uuid.UUID, item: schemas.ModelPaperQuestionUpdate, db: Session = Depends(get_db)):
-    return crud.update_item(db=db, model=models.ModelPaperQuestion, item_id=item_id, schema=item)
+    db_item = crud.update_item(db=db, model=models.ModelPaperQuestion, item_id=item_id, schema=item)
+    answer_cache.invalidate_question(item_id)
+    return db_item
 
 @router.delete("/{item_id}", response_model=schemas.ModelPaperQuestion)
 def delete_model_paper_question(item_id: uuid.UUID, db: Session = Depends(get_db)):
     db_item = crud.delete_item(db=db, model=models.ModelPaperQuestion, item_id=item_id)
+    answer_cache.invalidate_question(item_id)
     if db_item is None:
         raise HTTPException(status_code=404, detail="Question not found")
-    return db_item
\ No newline at end of file
+    return db_item
+
+@router.post("/bulk", response_model=list[schemas.ModelPaperQuestion], status_code=status.HTTP_201_CREATED)
+def create_bulk_model_paper_questions(questions: list[schemas.ModelPaperQuestionCreate], db: Session = Depends(get_db)):
+    # Every row is checked before anything is written, so a bad row never leaves half a paper behind
+    errors = crud.validate_bulk_items(db=db, model=models.ModelPaperQuestion, items=questions)
+    if errors:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=errors)
+    return crud.create_items_bulk(db=db, model=models.ModelPaperQuestion, items=questions)
\ No newline at end of file
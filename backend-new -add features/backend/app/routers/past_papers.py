@@ -1,9 +1,13 @@
 # backend/app/routers/past_papers.py
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Literal, Optional, Union
 import uuid
 from app import crud, models, schemas
-from app.core.security import get_current_user, get_db
+from app.core.security import get_current_user, get_db, get_async_db
+from app.services import content_io
+from app.services.answer_cache import answer_cache
 
 router = APIRouter(
     prefix="/admin/past-papers",
@@ -15,9 +19,35 @@ router = APIRouter(
 def create_past_paper_question(item: schemas.PastPaperQuestionCreate, db: Session = Depends(get_db)):
     return crud.create_item(db=db, model=models.PastPaperQuestion, schema=item)
 
-@router.get("/", response_model=list[schemas.PastPaperQuestion])
-def read_past_paper_questions(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    return crud.get_items(db=db, model=models.PastPaperQuestion, skip=skip, limit=limit)
+@router.get("/", response_model=Union[list[schemas.PastPaperQuestion], list[schemas.PastPaperQuestionSummary]])
+def read_past_paper_questions(response: Response, limit: int = Query(100, ge=1, le=500), cursor: Optional[str] = None,
+                              subject_id: Optional[uuid.UUID] = None, year: Optional[int] = None,
+                              question_type: Optional[models.QuestionType] = None, unit: Optional[str] = None,
+                              view: Literal["full", "summary"] = "full", db: Session = Depends(get_db)):
+    # Newest year first; the next page's cursor is returned in X-Next-Cursor
+    filters = {"subject_id": subject_id, "year": year, "question_type": question_type, "question_unit": unit}
+    columns = list(schemas.PastPaperQuestionSummary.model_fields) if view == "summary" else None
+    try:
+        items, next_cursor = crud.get_items_page(db=db, model=models.PastPaperQuestion, limit=limit, cursor=cursor,
+                                                 filters=filters, columns=columns)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    if view == "summary":
+        return [schemas.PastPaperQuestionSummary.model_validate(item) for item in items]
+    return items
+
+# Declared before /{item_id} so "export" isn't parsed as an id
+@router.get("/export")
+async def export_past_paper_questions(fmt: Literal["ndjson", "csv"] = Query("ndjson", alias="format")):
+    return content_io.export_response(models.PastPaperQuestion, fmt, "past_papers")
+
+@router.post("/import", response_model=schemas.ImportResult, status_code=status.HTTP_201_CREATED)
+async def import_past_paper_questions(request: Request, fmt: Literal["ndjson", "csv"] = Query("ndjson", alias="format"),
+                                      db: AsyncSession = Depends(get_async_db)):
+    imported = await content_io.import_rows(db, models.PastPaperQuestion, schemas.PastPaperQuestionCreate, request.stream(), fmt)
+    return schemas.ImportResult(imported=imported)
 
 @router.get("/{item_id}", response_model=schemas.PastPaperQuestion)
 def read_past_paper_question(item_id: uuid.UUID, db: Session = Depends(get_db)):
@@ -28,22 +58,22 @@ def read_past_paper_question(item_id: uuid.UUID, db: Session = Depends(get_db)):
 
 @router.patch("/{item_id}", response_model=schemas.PastPaperQuestion)
 def update_past_paper_question(item_id: uuid.UUID, item: schemas.PastPaperQuestionUpdate, db: Session = Depends(get_db)):
-    return crud.update_item(db=db, model=models.PastPaperQuestion, item_id=item_id, schema=item)
+    db_item = crud.update_item(db=db, model=models.PastPaperQuestion, item_id=item_id, schema=item)
+    answer_cache.invalidate_question(item_id)
+    return db_item
 
 @router.delete("/{item_id}", response_model=schemas.PastPaperQuestion)
 def delete_past_paper_question(item_id: uuid.UUID, db: Session = Depends(get_db)):
     db_item = crud.delete_item(db=db, model=models.PastPaperQuestion, item_id=item_id)
+    answer_cache.invalidate_question(item_id)
     if db_item is None:
         raise HTTPException(status_code=404, detail="Question not found")
     return db_item
 
-# Add this new function to backend/app/routers/past_papers.py
-
 @router.post("/bulk", response_model=list[schemas.PastPaperQuestion], status_code=status.HTTP_201_CREATED)
 def create_bulk_past_paper_questions(questions: list[schemas.PastPaperQuestionCreate], db: Session = Depends(get_db)):
-    created_questions = []
-    for question_schema in questions:
-        # We use the generic create_item function for each question in the list
-        created_question = crud.create_item(db=db, model=models.PastPaperQuestion, schema=question_schema)
-        created_questions.append(created_question)
-    return created_questions
\ No newline at end of file
+    # Every row is checked before anything is written, so a bad row never leaves half a paper behind
+    errors = crud.validate_bulk_items(db=db, model=models.PastPaperQuestion, items=questions)
+    if errors:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=errors)
+    return crud.create_items_bulk(db=db, model=models.PastPaperQuestion, items=questions)
\ No newline at end of file
@@ -1,9 +1,13 @@
 # backend/app/routers/subjects.py
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Literal
 import uuid
 from app import crud, models, schemas
-from app.core.security import get_current_user, get_db
+from app.core.security import get_current_user, get_db, get_async_db
+from app.services import content_io
+from app.services.subject_resolver import subject_resolver
 
 router = APIRouter(
     prefix="/admin/subjects",
@@ -13,12 +17,26 @@ router = APIRouter(
 
 @router.post("/", response_model=schemas.Subject, status_code=status.HTTP_201_CREATED)
 def create_subject(subject: schemas.SubjectCreate, db: Session = Depends(get_db)):
-    return crud.create_item(db=db, model=models.Subject, schema=subject)
+    db_item = crud.create_item(db=db, model=models.Subject, schema=subject)
+    subject_resolver.invalidate()
+    return db_item
 
 @router.get("/", response_model=list[schemas.Subject])
 def read_subjects(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
     return crud.get_items(db=db, model=models.Subject, skip=skip, limit=limit)
 
+# Declared before /{item_id} so "export" isn't parsed as an id
+@router.get("/export")
+async def export_subjects(fmt: Literal["ndjson", "csv"] = Query("ndjson", alias="format")):
+    return content_io.export_response(models.Subject, fmt, "subjects")
+
+@router.post("/import", response_model=schemas.ImportResult, status_code=status.HTTP_201_CREATED)
+async def import_subjects(request: Request, fmt: Literal["ndjson", "csv"] = Query("ndjson", alias="format"),
+                          db: AsyncSession = Depends(get_async_db)):
+    imported = await content_io.import_rows(db, models.Subject, schemas.SubjectCreate, request.stream(), fmt)
+    subject_resolver.invalidate()
+    return schemas.ImportResult(imported=imported)
+
 @router.get("/{item_id}", response_model=schemas.Subject)
 def read_subject(item_id: uuid.UUID, db: Session = Depends(get_db)):
     db_item = crud.get_item(db=db, model=models.Subject, item_id=item_id)
@@ -28,11 +46,14 @@ def read_subject(item_id: uuid.UUID, db: Session = Depends(get_db)):
 
 @router.patch("/{item_id}", response_model=schemas.Subject)
 def update_subject(item_id: uuid.UUID, subject: schemas.SubjectBase, db: Session = Depends(get_db)):
-    return crud.update_item(db=db, model=models.Subject, item_id=item_id, schema=subject)
+    db_item = crud.update_item(db=db, model=models.Subject, item_id=item_id, schema=subject)
+    subject_resolver.invalidate()
+    return db_item
 
 @router.delete("/{item_id}", response_model=schemas.Subject)
 def delete_subject(item_id: uuid.UUID, db: Session = Depends(get_db)):
     db_item = crud.delete_item(db=db, model=models.Subject, item_id=item_id)
+    subject_resolver.invalidate()
     if db_item is None:
         raise HTTPException(status_code=404, detail="Subject not found")
     return db_item
\ No newline at end of file
@@ -1,9 +1,12 @@
 # backend/app/routers/theories.py
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Literal, Optional, Union
 import uuid
 from app import crud, models, schemas
-from app.core.security import get_current_user, get_db
+from app.core.security import get_current_user, get_db, get_async_db
+from app.services import content_io
 
 router = APIRouter(
     prefix="/admin/theories",
@@ -15,9 +18,33 @@ router = APIRouter(
 def create_theory(item: schemas.TheoryCreate, db: Session = Depends(get_db)):
     return crud.create_item(db=db, model=models.Theory, schema=item)
 
-@router.get("/", response_model=list[schemas.Theory])
-def read_theories(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    return crud.get_items(db=db, model=models.Theory, skip=skip, limit=limit)
+@router.get("/", response_model=Union[list[schemas.Theory], list[schemas.TheorySummary]])
+def read_theories(response: Response, limit: int = Query(100, ge=1, le=500), cursor: Optional[str] = None,
+                  subject_id: Optional[uuid.UUID] = None, unit: Optional[str] = None,
+                  view: Literal["full", "summary"] = "full", db: Session = Depends(get_db)):
+    # Ordered by unit; the next page's cursor is returned in X-Next-Cursor
+    columns = list(schemas.TheorySummary.model_fields) if view == "summary" else None
+    try:
+        items, next_cursor = crud.get_items_page(db=db, model=models.Theory, limit=limit, cursor=cursor,
+                                                 filters={"subject_id": subject_id, "unit": unit}, columns=columns)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    if view == "summary":
+        return [schemas.TheorySummary.model_validate(item) for item in items]
+    return items
+
+# Declared before /{item_id} so "export" isn't parsed as an id
+@router.get("/export")
+async def export_theories(fmt: Literal["ndjson", "csv"] = Query("ndjson", alias="format")):
+    return content_io.export_response(models.Theory, fmt, "theories")
+
+@router.post("/import", response_model=schemas.ImportResult, status_code=status.HTTP_201_CREATED)
+async def import_theories(request: Request, fmt: Literal["ndjson", "csv"] = Query("ndjson", alias="format"),
+                          db: AsyncSession = Depends(get_async_db)):
+    imported = await content_io.import_rows(db, models.Theory, schemas.TheoryCreate, request.stream(), fmt)
+    return schemas.ImportResult(imported=imported)
 
 @router.get("/{item_id}", response_model=schemas.Theory)
 def read_theory(item_id: uuid.UUID, db: Session = Depends(get_db)):
@@ -35,4 +62,12 @@ def delete_theory(item_id: uuid.UUID, db: Session = Depends(get_db)):
     db_item = crud.delete_item(db=db, model=models.Theory, item_id=item_id)
     if db_item is None:
         raise HTTPException(status_code=404, detail="Theory not found")
-    return db_item
\ No newline at end of file
+    return db_item
+
+@router.post("/bulk", response_model=list[schemas.Theory], status_code=status.HTTP_201_CREATED)
+def create_bulk_theories(theories: list[schemas.TheoryCreate], db: Session = Depends(get_db)):
+    # Every row is checked before anything is written, so a bad row never leaves half an import behind
+    errors = crud.validate_bulk_items(db=db, model=models.Theory, items=theories)
+    if errors:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=errors)
+    return crud.create_items_bulk(db=db, model=models.Theory, items=theories)
\ No newline at end of file
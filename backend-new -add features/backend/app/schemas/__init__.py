@@ -3,20 +3,22 @@ from .schemas import (
     UserBase, UserCreate, User,
     Token,
     MessageBase, Message,
-    ConversationBase, Conversation, ConversationWithMessages,
+    ConversationBase, Conversation, ConversationWithMessages, ConversationSummary,
+    ImportResult,
     SubjectBase, SubjectCreate, Subject,
-    TheoryBase, TheoryCreate, TheoryUpdate, Theory,
-    PastPaperQuestionBase, PastPaperQuestionCreate, PastPaperQuestionUpdate, PastPaperQuestion,
-    ModelPaperQuestionBase, ModelPaperQuestionCreate, ModelPaperQuestionUpdate, ModelPaperQuestion
+    TheoryBase, TheoryCreate, TheoryUpdate, Theory, TheorySummary,
+    PastPaperQuestionBase, PastPaperQuestionCreate, PastPaperQuestionUpdate, PastPaperQuestion, PastPaperQuestionSummary,
+    ModelPaperQuestionBase, ModelPaperQuestionCreate, ModelPaperQuestionUpdate, ModelPaperQuestion, ModelPaperQuestionSummary
 )
 
 __all__ = [
     "UserBase", "UserCreate", "User",
     "Token",
     "MessageBase", "Message",
-    "ConversationBase", "Conversation", "ConversationWithMessages",
+    "ConversationBase", "Conversation", "ConversationWithMessages", "ConversationSummary",
+    "ImportResult",
     "SubjectBase", "SubjectCreate", "Subject",
-    "TheoryBase", "TheoryCreate", "TheoryUpdate", "Theory",
-    "PastPaperQuestionBase", "PastPaperQuestionCreate", "PastPaperQuestionUpdate", "PastPaperQuestion",
-    "ModelPaperQuestionBase", "ModelPaperQuestionCreate", "ModelPaperQuestionUpdate", "ModelPaperQuestion"
+    "TheoryBase", "TheoryCreate", "TheoryUpdate", "Theory", "TheorySummary",
+    "PastPaperQuestionBase", "PastPaperQuestionCreate", "PastPaperQuestionUpdate", "PastPaperQuestion", "PastPaperQuestionSummary",
+    "ModelPaperQuestionBase", "ModelPaperQuestionCreate", "ModelPaperQuestionUpdate", "ModelPaperQuestion", "ModelPaperQuestionSummary"
 ]
@@ -51,9 +51,18 @@ class Conversation(ConversationBase):
 class ConversationWithMessages(Conversation):
     messages: list[Message] = []
 
+# Sidebar row: last activity and a snippet of the latest message
+class ConversationSummary(Conversation):
+    updated_at: datetime
+    last_message: Optional[str] = None
+    last_message_role: Optional[str] = None
+
 
 # --- Admin CRUD Schemas ---
 
+class ImportResult(BaseModel):
+    imported: int
+
 # --- Subject Schemas ---
 class SubjectBase(BaseModel):
     name: str
@@ -85,6 +94,16 @@ class Theory(TheoryBase):
     class Config:
         from_attributes = True
 
+# List row without the content (?view=summary); only these columns are loaded
+class TheorySummary(BaseModel):
+    id: uuid.UUID
+    subject_id: uuid.UUID
+    unit: str
+    main_heading: str
+    sub_heading: Optional[str] = None
+    class Config:
+        from_attributes = True
+
 # --- Past Paper Schemas ---
 class PastPaperQuestionBase(BaseModel):
     year: int
@@ -119,6 +138,17 @@ class PastPaperQuestion(PastPaperQuestionBase):
     class Config:
         from_attributes = True
 
+# List row without the JSONB payloads and theory text (?view=summary); only these columns are loaded
+class PastPaperQuestionSummary(BaseModel):
+    id: uuid.UUID
+    subject_id: uuid.UUID
+    year: int
+    question_type: QuestionType
+    question_number: int
+    question_unit: Optional[str] = None
+    class Config:
+        from_attributes = True
+
 # --- Model Paper Schemas ---
 class ModelPaperQuestionBase(BaseModel):
     paper_name: str
@@ -152,3 +182,14 @@ class ModelPaperQuestion(ModelPaperQuestionBase):
     subject_id: uuid.UUID
     class Config:
         from_attributes = True
+
+# List row without the JSONB payloads and theory text (?view=summary); only these columns are loaded
+class ModelPaperQuestionSummary(BaseModel):
+    id: uuid.UUID
+    subject_id: uuid.UUID
+    paper_name: str
+    question_type: QuestionType
+    question_number: int
+    question_unit: Optional[str] = None
+    class Config:
+        from_attributes = True
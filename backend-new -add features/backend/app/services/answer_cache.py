@@ -0,0 +1,83 @@
+# backend/app/services/answer_cache.py
+import asyncio
+import uuid
+from dataclasses import dataclass
+from typing import AsyncIterator, Optional
+
+from app.core.config import settings
+from app.services.subject_resolver import subject_resolver
+from app.services.ttl_cache import TTLCache
+
+# Tools whose answer depends only on their arguments (one specific question)
+CACHEABLE_TOOLS = {"GetPastPaperQuestionTool", "GetModelPaperQuestionTool"}
+
+
+@dataclass(frozen=True)
+class CachedAnswer:
+    question_id: uuid.UUID
+    text: str
+    metadata: dict
+
+
+def _normalize_prompt(text: str) -> str:
+    return " ".join(text.split()).casefold()
+
+
+def answer_cache_key(tool_name: str, tool_args: dict, template_name: str, user_prompt: str, chat_history: str) -> Optional[tuple]:
+    """
+    Normalized key for a resolved tool call, or None if the call isn't cacheable.
+    "physics"/"Physics"/"பௌதிகவியல்" and "MCQ"/"mcq" all map to the same key.
+
+    The answer is generated from the student's own prompt and history, so only a
+    turn with no history is cacheable and its prompt is part of the key: "explain
+    it in English" or "only part (b)" never replays someone else's answer.
+    """
+    if tool_name not in CACHEABLE_TOOLS or chat_history.strip():
+        return None
+    args = []
+    for name, value in sorted(tool_args.items()):
+        if name == "subject":
+            value = subject_resolver.canonical_name(str(value))
+        if isinstance(value, float) and value.is_integer():
+            # Function-call args arrive as floats ("question_number": 12.0)
+            value = int(value)
+        if isinstance(value, str):
+            value = " ".join(value.split()).casefold()
+        args.append((name, value))
+    return (tool_name, tuple(args), template_name, _normalize_prompt(user_prompt))
+
+
+async def replay(text: str, chunk_size: int = 80) -> AsyncIterator[str]:
+    """Streams a cached answer in small chunks, like a live generation would arrive."""
+    for start in range(0, len(text), chunk_size):
+        yield text[start:start + chunk_size]
+        # Let other sockets run between chunks
+        await asyncio.sleep(0)
+
+
+class AnswerCache:
+    """
+    Final answers for popular single-question lookups ("2022 Physics MCQ 14").
+
+    On a hit the chat loop skips the DB lookup and the Gemini generation and
+    replays the stored markdown. Admin edits to a question call
+    `invalidate_question`, which only clears this process: other workers keep
+    serving the old answer until its TTL (ANSWER_CACHE_TTL_SECONDS) runs out.
+    """
+    def __init__(self, max_size: int, ttl: float):
+        self._cache = TTLCache(max_size=max_size, ttl=ttl)
+
+    def get(self, key: tuple) -> Optional[CachedAnswer]:
+        return self._cache.get(key)
+
+    def put(self, key: tuple, answer: CachedAnswer):
+        self._cache.put(key, answer)
+
+    def invalidate_question(self, question_id: uuid.UUID) -> int:
+        return self._cache.invalidate_where(lambda _, answer: answer.question_id == question_id)
+
+    def stats(self) -> dict:
+        return self._cache.stats()
+
+
+answer_cache = AnswerCache(max_size=settings.ANSWER_CACHE_MAX_SIZE, ttl=settings.ANSWER_CACHE_TTL_SECONDS)
@@ -0,0 +1,321 @@
+# backend/app/services/chunker.py
+"""
+Structure-aware chunking of extracted theory text.
+
+Pages are read line by line and grouped into blocks (paragraphs and bullet
+items) under the current unit / main / sub heading. Blocks are split into
+sentences, and sentences are packed into chunks of at most `max_tokens`,
+repeating up to `overlap_tokens` of trailing sentences at the start of the next
+chunk. A chunk never spans two sections, so every chunk carries one heading
+path along with the pages it came from.
+"""
+import bisect
+import hashlib
+import re
+import unicodedata
+from dataclasses import dataclass
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+# Unit / chapter titles: "அத்தியாயம் 3: இயக்க வரைபுகள்", "அலகு 2", "Unit 4 - Waves".
+# The PDF fonts often come out of text extraction with ொ in place of ா, so accept both.
+UNIT_HEADING = re.compile(r"^(?:அத்திய[ாொ]யம்|அலகு|unit|chapter)\s*(\d+)\b", re.IGNORECASE)
+# Table of contents entries end in a page reference: "அத்தியாயம் 4: ... (பக்கம் 35)".
+# Extraction sometimes drops the leading ப, leaving "( க்கம் 35)".
+TOC_PAGE_REF = re.compile(r"\s*\((?:\s*ப?\s*க்கம்|\s*page)\s*\d+\s*\)$", re.IGNORECASE)
+# Numbered section titles: "1.4 காவிகளும் எண்ணிகளும்"; the first number is the unit's
+MAIN_HEADING = re.compile(r"^(\d{1,2})\.(\d{1,2})\s+\S")
+# Numbered subsections: "1.4.2 காவிப் பிரிப்பு"
+SUB_HEADING = re.compile(r"^\d{1,2}\.\d{1,2}\.\d{1,2}\s+\S")
+# Bullets and numbered list items start a new block: "•", "o", "-", "1."
+LIST_ITEM = re.compile(r"^(?:[•▪●◦*\-–]|o\s|\d{1,2}[.)]\s)")
+# Headings are short; a numbered line longer than this is a list item or prose
+MAX_HEADING_LENGTH = 100
+# An unnumbered line ending in ":" with at most this many words is a sub heading
+MAX_LABEL_WORDS = 8
+
+# Candidate sentence ends: ".", "?", "!" (plus closing quotes/brackets) followed by whitespace
+SENTENCE_END = re.compile(r"[.?!]+[\"'”’)\]]*\s+")
+TAMIL_BLOCK = re.compile(r"[஀-௿]")
+# Words before a "." that never end a sentence
+ABBREVIATIONS = {"dr", "mr", "mrs", "fig", "eq", "no", "vs", "etc"}
+
+# Chunks shorter than this are headers, page numbers and other noise
+MIN_CHUNK_LENGTH = 50
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Rough token count. Tamil script costs far more tokens per character than
+    English (~2 chars per token vs ~4), so it is counted separately.
+    """
+    tamil = len(TAMIL_BLOCK.findall(text))
+    return (len(text) - tamil) // 4 + tamil // 2 + 1
+
+
+def _is_abbreviation(text: str, end: int) -> bool:
+    """
+    True if the "." ending at `end` closes an abbreviation or initial rather
+    than a sentence: "க.பொ.த", "Dr.", "e.g.", "Fig.", an initial like "J." or
+    a lone Tamil syllable. Other short words ("m.", "it.") end sentences.
+    """
+    start = end
+    while start > 0 and not text[start - 1].isspace():
+        start -= 1
+    word = text[start:end].rstrip(".")
+    if "." in word:
+        # Dotted initials like "க.பொ.த." or "e.g."
+        return True
+    if word.lower() in ABBREVIATIONS:
+        return True
+    # One base letter: a capital initial, or a Tamil letter plus its vowel sign / pulli
+    letters = [c for c in word if unicodedata.category(c).startswith("L")]
+    if len(letters) != 1:
+        return False
+    return bool(TAMIL_BLOCK.match(letters[0])) or letters[0].isupper()
+
+
+def split_sentences(text: str) -> List[Tuple[int, int]]:
+    """(start, end) offsets of the sentences in `text`."""
+    spans = []
+    start = 0
+    for match in SENTENCE_END.finditer(text):
+        end = match.end()
+        following = text[end:end + 1]
+        if text[match.start()] == "." and (_is_abbreviation(text, match.start() + 1) or following.islower() or following.isdigit()):
+            continue
+        spans.append((start, match.start() + len(match.group().rstrip())))
+        start = end
+    if start < len(text) and text[start:].strip():
+        spans.append((start, len(text.rstrip())))
+    return spans
+
+
+@dataclass
+class TextChunk:
+    source_file: str
+    chunk_index: int
+    chunk_id: str
+    content: str
+    unit: Optional[str]
+    main_heading: Optional[str]
+    sub_heading: Optional[str]
+    page_start: int
+    page_end: int
+
+    @property
+    def content_hash(self) -> str:
+        return hashlib.sha256(self.content.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class _Sentence:
+    text: str
+    tokens: int
+    page_start: int
+    page_end: int
+
+
+class Chunker:
+    def __init__(self, max_tokens: int = 400, overlap_tokens: int = 60, min_tokens: int = 40):
+        if overlap_tokens >= max_tokens:
+            raise ValueError("overlap_tokens must be smaller than max_tokens")
+        self.max_tokens = max_tokens
+        self.overlap_tokens = overlap_tokens
+        self.min_tokens = min_tokens
+
+    # --- Structure ---
+    @staticmethod
+    def _heading_level(line: str, after_break: bool, last_main: Optional[Tuple[int, int]] = None) -> Optional[str]:
+        """
+        `last_main` is the (unit, section) number of the previous main heading. A
+        numbered line that doesn't follow a break is only a main heading when it is
+        the next section number, since headings often come straight after a running
+        page header or an equation, while a wrapped "9.8 m s-2 ..." line doesn't.
+        """
+        if len(line) > MAX_HEADING_LENGTH:
+            return None
+        if UNIT_HEADING.match(line) and not TOC_PAGE_REF.search(line):
+            return "unit"
+        if SUB_HEADING.match(line):
+            return "sub"
+        main = MAIN_HEADING.match(line)
+        if main and not line.endswith("."):
+            number = (int(main.group(1)), int(main.group(2)))
+            expected = {(1, 1)} if last_main is None else {(last_main[0], last_main[1] + 1), (last_main[0] + 1, 1)}
+            if after_break or number in expected:
+                return "main"
+        # "Uses of dimensional analysis:" on its own line, not the wrapped end of a sentence
+        if after_break and line.endswith(":") and len(line.split()) <= MAX_LABEL_WORDS and not LIST_ITEM.match(line):
+            return "sub"
+        return None
+
+    def _blocks(self, pages: Iterable[Tuple[int, str]]) -> Iterator[tuple]:
+        """
+        Yields ("heading", level, text, page), ("toc", unit_number, title) and
+        ("block", lines) items, where lines is a list of (page, text) making up
+        one paragraph or list item.
+        """
+        lines: List[Tuple[int, str]] = []
+        last_main = None
+        for page_number, page_text in pages:
+            for raw in page_text.splitlines():
+                line = " ".join(raw.split())
+                if not line:
+                    if lines:
+                        yield ("block", lines)
+                        lines = []
+                    continue
+                toc_entry = UNIT_HEADING.match(line)
+                if toc_entry and TOC_PAGE_REF.search(line):
+                    yield ("toc", int(toc_entry.group(1)), TOC_PAGE_REF.sub("", line))
+                after_break = not lines or lines[-1][1].endswith((".", ":", "?", "!"))
+                level = self._heading_level(line, after_break, last_main)
+                if level == "main":
+                    main = MAIN_HEADING.match(line)
+                    last_main = (int(main.group(1)), int(main.group(2)))
+                if level:
+                    if lines:
+                        yield ("block", lines)
+                        lines = []
+                    yield ("heading", level, line.rstrip(":"), page_number)
+                    continue
+                if LIST_ITEM.match(line) and lines:
+                    yield ("block", lines)
+                    lines = []
+                # Hard-wrapped lines of one paragraph are joined, also across pages
+                lines.append((page_number, line))
+        if lines:
+            yield ("block", lines)
+
+    @staticmethod
+    def _sentences(lines: List[Tuple[int, str]]) -> List[_Sentence]:
+        text = ""
+        offsets, pages = [], []
+        for page, line in lines:
+            if text:
+                text += " "
+            offsets.append(len(text))
+            pages.append(page)
+            text += line
+        sentences = []
+        for start, end in split_sentences(text):
+            sentence = text[start:end].strip()
+            if sentence:
+                sentences.append(_Sentence(
+                    text=sentence,
+                    tokens=estimate_tokens(sentence),
+                    page_start=pages[bisect.bisect_right(offsets, start) - 1],
+                    page_end=pages[bisect.bisect_right(offsets, max(start, end - 1)) - 1],
+                ))
+        return sentences
+
+    def _split_long(self, sentence: _Sentence) -> List[_Sentence]:
+        """Cuts a sentence longer than max_tokens (a table, a run-on line) at word boundaries."""
+        pieces, words = [], []
+        for word in sentence.text.split():
+            if words and estimate_tokens(" ".join(words + [word])) > self.max_tokens:
+                text = " ".join(words)
+                pieces.append(_Sentence(text, estimate_tokens(text), sentence.page_start, sentence.page_end))
+                words = []
+            words.append(word)
+        if words:
+            text = " ".join(words)
+            pieces.append(_Sentence(text, estimate_tokens(text), sentence.page_start, sentence.page_end))
+        return pieces
+
+    # --- Packing ---
+    def _pack(self, sentences: List[_Sentence]) -> Iterator[List[_Sentence]]:
+        """Groups one section's sentences into windows of <= max_tokens with overlap."""
+        previous: Optional[List[_Sentence]] = None  # held back so a short tail can join it
+        window: List[_Sentence] = []
+        tokens = 0
+        fresh = 0  # sentences in the window that aren't overlap from the previous one
+        for sentence in sentences:
+            if window and tokens + sentence.tokens > self.max_tokens:
+                if previous:
+                    yield previous
+                previous = window
+                overlap, overlap_tokens = [], 0
+                for earlier in reversed(window):
+                    if overlap_tokens + earlier.tokens > self.overlap_tokens:
+                        break
+                    overlap.insert(0, earlier)
+                    overlap_tokens += earlier.tokens
+                if overlap_tokens + sentence.tokens > self.max_tokens:
+                    overlap, overlap_tokens = [], 0
+                window, tokens, fresh = overlap, overlap_tokens, 0
+            window.append(sentence)
+            tokens += sentence.tokens
+            fresh += 1
+
+        tail = window[len(window) - fresh:] if fresh else []
+        tail_tokens = sum(s.tokens for s in tail)
+        if previous and tail and tail_tokens < self.min_tokens and \
+                sum(s.tokens for s in previous) + tail_tokens <= self.max_tokens + self.min_tokens:
+            # A tiny tail isn't worth its own vector: fold it into the previous window
+            yield previous + tail
+            return
+        if previous:
+            yield previous
+        if tail:
+            yield window
+
+    def chunk(self, source_file: str, pages: Iterable[Tuple[int, str]]) -> Iterator[TextChunk]:
+        """Chunks of one document, given its (page_number, text) pages in order."""
+        headings = {"unit": None, "main": None, "sub": None}
+        section: List[_Sentence] = []
+        index = 0
+
+        def emit_section():
+            nonlocal index
+            for window in self._pack(section):
+                content = " ".join(s.text for s in window)
+                if len(content) <= MIN_CHUNK_LENGTH:
+                    continue
+                yield TextChunk(
+                    source_file=source_file,
+                    chunk_index=index,
+                    chunk_id=self.chunk_id(source_file, headings, content),
+                    content=content,
+                    unit=headings["unit"],
+                    main_heading=headings["main"],
+                    sub_heading=headings["sub"],
+                    page_start=window[0].page_start,
+                    page_end=window[-1].page_end,
+                )
+                index += 1
+            section.clear()
+
+        # Unit titles seen in the table of contents, by number. Textbooks often only
+        # print "5.1 ..." in the body, so the unit is looked up from the section number.
+        unit_titles = {}
+
+        for item in self._blocks(pages):
+            if item[0] == "toc":
+                unit_titles[item[1]] = item[2]
+                continue
+            if item[0] == "heading":
+                _, level, text, _ = item
+                yield from emit_section()
+                headings[level] = text
+                # A new unit or main heading closes the lower levels
+                if level == "unit":
+                    headings["main"] = headings["sub"] = None
+                elif level == "main":
+                    headings["sub"] = None
+                    unit_number = int(MAIN_HEADING.match(text).group(1))
+                    if unit_number in unit_titles:
+                        headings["unit"] = unit_titles[unit_number]
+                continue
+            for sentence in self._sentences(item[1]):
+                section.extend(self._split_long(sentence) if sentence.tokens > self.max_tokens else [sentence])
+        yield from emit_section()
+
+    @staticmethod
+    def chunk_id(source_file: str, headings: dict, content: str) -> str:
+        """
+        Derived from the chunk's file, heading path and text only, so an unchanged
+        chunk keeps its id when text elsewhere in the document moves it to a new index.
+        """
+        key = "\x1f".join([source_file, headings["unit"] or "", headings["main"] or "", headings["sub"] or "", content])
+        return hashlib.sha256(key.encode("utf-8")).hexdigest()[:32]
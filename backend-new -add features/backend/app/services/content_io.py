@@ -0,0 +1,244 @@
+# backend/app/services/content_io.py
+"""
+Streaming NDJSON / CSV import and export of the admin content tables.
+
+Imports parse the request body as it arrives and insert it in batches inside one
+transaction, so a file lands completely or not at all. Exports read through a
+server-side cursor and send every row as soon as it is fetched. Either way at
+most one batch of rows is held in memory, however large the table.
+
+In CSV, JSONB columns (question_data, answer_data) are JSON-encoded cells and an
+empty cell means NULL / the column default.
+"""
+import csv
+import enum
+import io
+import json
+import uuid
+from typing import AsyncIterator, List, Optional, Tuple
+
+from fastapi import HTTPException, status
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.crud import async_crud
+from app.crud.crud import BULK_NATURAL_KEYS
+
+FORMATS = ("ndjson", "csv")
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+# An import stops reading after this many bad rows
+MAX_IMPORT_ERRORS = 100
+
+
+def export_columns(model) -> list:
+    # Generated columns (search_vector) are rebuilt by Postgres on import
+    return [column for column in model.__table__.columns if column.computed is None]
+
+def _json_columns(model) -> set:
+    return {column.key for column in export_columns(model) if isinstance(column.type, JSONB)}
+
+def _scalar(value):
+    if isinstance(value, enum.Enum):
+        return value.value
+    return str(value)
+
+
+# --- Import ---
+async def _iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Lines of a chunked body. Bytes are only decoded once a line is complete,
+    so a character split across two chunks is never mangled."""
+    buffer = b""
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield line.decode("utf-8").rstrip("\r")
+    if buffer:
+        yield buffer.decode("utf-8").rstrip("\r")
+
+async def iter_ndjson(chunks: AsyncIterator[bytes]) -> AsyncIterator[Tuple[int, Optional[dict], Optional[str]]]:
+    """(line number, record, error) for every non-blank line."""
+    line_number = 0
+    async for line in _iter_lines(chunks):
+        line_number += 1
+        if not line.strip():
+            continue
+        try:
+            yield line_number, json.loads(line), None
+        except json.JSONDecodeError as e:
+            yield line_number, None, f"Invalid JSON: {e.msg}"
+
+async def iter_csv(chunks: AsyncIterator[bytes], json_columns: set) -> AsyncIterator[Tuple[int, Optional[dict], Optional[str]]]:
+    """(line number, record, error) for every CSV record after the header row."""
+    header: Optional[List[str]] = None
+    record, start, line_number = "", 0, 0
+    async for line in _iter_lines(chunks):
+        line_number += 1
+        if not record:
+            start = line_number
+        record = f"{record}\n{line}" if record else line
+        # A quoted cell may span lines: the record is complete once its quotes balance
+        if record.count('"') % 2:
+            continue
+        text, record = record, ""
+        if not text.strip():
+            continue
+        cells = next(csv.reader([text]))
+        if header is None:
+            header = [name.strip().lstrip("\ufeff") for name in cells]
+            continue
+        if len(cells) != len(header):
+            yield start, None, f"Expected {len(header)} cells, got {len(cells)}"
+            continue
+        row = {}
+        try:
+            for name, cell in zip(header, cells):
+                if cell != "":
+                    row[name] = json.loads(cell) if name in json_columns else cell
+        except json.JSONDecodeError as e:
+            yield start, None, f"Invalid JSON in {name}: {e.msg}"
+            continue
+        yield start, row, None
+    if record:
+        yield start, None, "Unterminated quoted cell"
+
+def _validate(schema, record) -> dict:
+    if not isinstance(record, dict):
+        raise ValueError("Expected a JSON object")
+    row = schema.model_validate(record).model_dump()
+    # Exports carry ids; keeping them makes an export / import round trip lossless
+    row["id"] = uuid.UUID(str(record["id"])) if record.get("id") else uuid.uuid4()
+    return row
+
+async def _insert_batch(db: AsyncSession, model, batch: List[Tuple[int, dict]], known_subjects: set, seen_keys: dict) -> Tuple[list, list]:
+    """
+    Inserts one batch (without committing), or returns its (errors, conflicts).
+    Questions get the same natural key check as the bulk endpoints, against the
+    stored rows and against the earlier lines of the import (`seen_keys`).
+    Conflicts are rows whose id is already stored, as when an export is
+    imported twice.
+    """
+    errors = []
+    if "subject_id" in model.__table__.columns:
+        unknown = {row["subject_id"] for _, row in batch} - known_subjects
+        if unknown:
+            known_subjects |= await async_crud.get_existing_subject_ids(db, unknown)
+        errors = [{"line": line, "msg": "Subject not found"} for line, row in batch if row["subject_id"] not in known_subjects]
+
+    stored_ids = await async_crud.get_existing_ids(db, model, {row["id"] for _, row in batch})
+    conflicts = [{"line": line, "msg": f"Row {row['id']} already exists"} for line, row in batch if row["id"] in stored_ids]
+
+    key_fields = BULK_NATURAL_KEYS.get(model)
+    if key_fields:
+        # A stored id already accounts for its question's key
+        keys = [(line, tuple(row[field] for field in key_fields)) for line, row in batch if row["id"] not in stored_ids]
+        stored = await async_crud.get_existing_natural_keys(db, model, key_fields, {key for _, key in keys})
+        for line, key in keys:
+            if key in seen_keys:
+                errors.append({"line": line, "msg": f"Duplicate of line {seen_keys[key]}"})
+            elif key in stored:
+                errors.append({"line": line, "msg": "Question already exists"})
+            else:
+                seen_keys[key] = line
+
+    if not errors and not conflicts:
+        await async_crud.insert_rows(db, model, [row for _, row in batch])
+    return errors, conflicts
+
+async def import_rows(db: AsyncSession, model, schema, chunks: AsyncIterator[bytes], fmt: str) -> int:
+    """
+    Validates every record of the body against `schema` and inserts them all in one
+    transaction, CONTENT_IMPORT_BATCH_SIZE rows per statement. Any bad record rolls
+    the whole import back and is reported by line number (422); so do rows whose id
+    is already stored, but as a 409.
+    """
+    reader = iter_csv(chunks, _json_columns(model)) if fmt == "csv" else iter_ndjson(chunks)
+    errors, conflicts, batch, known_subjects, seen_keys = [], [], [], set(), {}
+    imported = 0
+    try:
+        async for line, record, error in reader:
+            if error is None:
+                try:
+                    row = _validate(schema, record)
+                except ValidationError as e:
+                    error = "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors())
+                except ValueError as e:
+                    error = str(e)
+            if error:
+                errors.append({"line": line, "msg": error})
+                if len(errors) >= MAX_IMPORT_ERRORS:
+                    break
+                continue
+            if errors or conflicts:
+                # Nothing will be committed; only keep reading to report further errors
+                continue
+            batch.append((line, row))
+            if len(batch) >= settings.CONTENT_IMPORT_BATCH_SIZE:
+                batch_errors, conflicts = await _insert_batch(db, model, batch, known_subjects, seen_keys)
+                errors += batch_errors
+                imported += len(batch)
+                batch.clear()
+        if batch and not errors and not conflicts:
+            batch_errors, conflicts = await _insert_batch(db, model, batch, known_subjects, seen_keys)
+            errors += batch_errors
+            imported += len(batch)
+        if errors:
+            await db.rollback()
+            raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=errors[:MAX_IMPORT_ERRORS])
+        if conflicts:
+            await db.rollback()
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=conflicts[:MAX_IMPORT_ERRORS])
+        await db.commit()
+    except IntegrityError as e:
+        # Rows written by another request since the checks above
+        await db.rollback()
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=f"Import conflicts with stored rows: {e.orig}")
+    except UnicodeDecodeError:
+        await db.rollback()
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Body is not valid UTF-8")
+    return imported
+
+
+# --- Export ---
+async def _export_rows(model) -> AsyncIterator[dict]:
+    from app.db.session import AsyncSessionLocal
+    # A session of its own: the request's session is closed before the body is streamed
+    async with AsyncSessionLocal() as db:
+        query = select(*export_columns(model)).order_by(model.id).execution_options(yield_per=settings.CONTENT_EXPORT_BATCH_SIZE)
+        result = await db.stream(query)
+        async for row in result.mappings():
+            yield row
+
+def _csv_line(cells: list) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(cells)
+    return buffer.getvalue()
+
+async def _ndjson_lines(model) -> AsyncIterator[str]:
+    async for row in _export_rows(model):
+        yield json.dumps(dict(row), ensure_ascii=False, default=_scalar) + "\n"
+
+async def _csv_lines(model) -> AsyncIterator[str]:
+    names = [column.key for column in export_columns(model)]
+    json_columns = _json_columns(model)
+    yield _csv_line(names)
+    async for row in _export_rows(model):
+        yield _csv_line([
+            "" if row[name] is None
+            else json.dumps(row[name], ensure_ascii=False) if name in json_columns
+            else _scalar(row[name])
+            for name in names
+        ])
+
+def export_response(model, fmt: str, filename: str) -> StreamingResponse:
+    lines = _csv_lines(model) if fmt == "csv" else _ndjson_lines(model)
+    return StreamingResponse(
+        lines,
+        media_type=MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{fmt}"'},
+    )
@@ -0,0 +1,96 @@
+# backend/app/services/conversation_context.py
+import asyncio
+from collections import deque
+from typing import Optional
+
+from app import prompts
+from app.core.config import settings
+from app.services.llm_client import llm
+
+
+def estimate_tokens(text: str) -> int:
+    # Rough heuristic (~4 chars per token); only used to keep the prompt bounded
+    return len(text) // 4 + 1
+
+
+class ConversationContext:
+    """
+    Rolling chat history for one WebSocket connection.
+
+    Seeded once from the DB on connect, then new turns are appended in memory so
+    a turn never re-queries the messages table. When the recent turns exceed
+    `token_budget`, the oldest ones are folded into a running summary by a
+    background LLM call. Until that call lands they stay in the rendered history,
+    so nothing drops out of context mid-conversation; if the LLM keeps failing,
+    the oldest of them are dropped once they pass `token_budget` themselves.
+
+    History that doesn't fit when seeding is simply left out: summarising it on
+    every reconnect would cost an LLM call each time for a summary nobody keeps.
+    """
+    def __init__(self, messages, token_budget: int, min_recent: int = 2, max_retry_delay: float = 60.0):
+        self._token_budget = token_budget
+        self._min_recent = min_recent
+        self._max_retry_delay = max_retry_delay
+        self._recent: deque[tuple[str, str]] = deque()
+        self._recent_tokens = 0
+        self._pending: deque[tuple[str, str]] = deque()
+        self._pending_tokens = 0
+        self._summary = ""
+        self._summary_task: Optional[asyncio.Task] = None
+        for message in messages:
+            self._append(message.role, message.content, summarise=False)
+
+    def add(self, role: str, content: str):
+        self._append(role, content, summarise=True)
+        if self._pending:
+            self._schedule_summary()
+
+    def _append(self, role: str, content: str, summarise: bool):
+        self._recent.append((role, content))
+        self._recent_tokens += estimate_tokens(content)
+        while self._recent_tokens > self._token_budget and len(self._recent) > self._min_recent:
+            evicted = self._recent.popleft()
+            self._recent_tokens -= estimate_tokens(evicted[1])
+            if summarise:
+                self._pending.append(evicted)
+                self._pending_tokens += estimate_tokens(evicted[1])
+        # Bounded even while summaries fail: the oldest unsummarised lines go first
+        while self._pending_tokens > self._token_budget and len(self._pending) > 1:
+            dropped = self._pending.popleft()
+            self._pending_tokens -= estimate_tokens(dropped[1])
+
+    def render(self) -> str:
+        lines = []
+        if self._summary:
+            lines.append(f"Summary of the earlier conversation: {self._summary}")
+        lines.extend(f"{role}: {content}" for role, content in [*self._pending, *self._recent])
+        return "\n".join(lines)
+
+    def _schedule_summary(self):
+        if self._summary_task is None or self._summary_task.done():
+            self._summary_task = asyncio.get_running_loop().create_task(self._summarise())
+
+    async def _summarise(self):
+        # Anything evicted while this runs is folded in by the next pass
+        retry_delay = 0.0
+        while self._pending:
+            batch = list(self._pending)
+            transcript = "\n".join(f"{role}: {content}" for role, content in batch)
+            try:
+                response = await llm.generate(prompts.CONVERSATION_SUMMARY_PROMPT.format(summary=self._summary or "(none)", transcript=transcript))
+                self._summary = response.text.strip()
+            except Exception as e:
+                retry_delay = min(max(retry_delay * 2, 2.0), self._max_retry_delay)
+                print(f"Conversation summary error, retrying in {retry_delay:.0f}s: {str(e)}")
+                await asyncio.sleep(retry_delay)
+                continue
+            retry_delay = 0.0
+            # Lines dropped for the budget meanwhile were the oldest, i.e. the head of the batch
+            for line in batch:
+                if self._pending and self._pending[0] is line:
+                    self._pending.popleft()
+                    self._pending_tokens -= estimate_tokens(line[1])
+
+    def close(self):
+        if self._summary_task and not self._summary_task.done():
+            self._summary_task.cancel()
@@ -0,0 +1,150 @@
+# backend/app/services/document_reader.py
+"""
+Streaming text extraction and chunking for theory ingestion.
+
+PDF pages are extracted in a process pool (pypdf is pure Python, so threads
+wouldn't help) a few pages per task, with a bounded number of tasks in flight.
+Pages go through the structure-aware Chunker as soon as they are in, so
+memory stays flat no matter how large the textbook is.
+"""
+import hashlib
+import os
+import queue
+import threading
+from collections import deque
+from concurrent.futures import Executor
+from dataclasses import dataclass
+from typing import Iterable, Iterator, List, Optional
+
+from pypdf import PdfReader
+
+from app.services.chunker import Chunker, TextChunk
+
+SUPPORTED_EXTENSIONS = (".pdf", ".txt")
+# Pages per pool task: enough to amortize re-opening the PDF in the worker
+PAGES_PER_TASK = 16
+
+
+@dataclass
+class FileDone:
+    """Emitted after the last chunk of a file, so consumers can checkpoint it."""
+    source_file: str
+    digest: str
+    chunk_count: int
+
+
+def file_digest(file_path: str) -> str:
+    sha = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+def _page_count(file_path: str) -> int:
+    return len(PdfReader(file_path).pages)
+
+
+def _extract_pages(file_path: str, start: int, end: int) -> List[str]:
+    # Runs in a pool worker
+    reader = PdfReader(file_path)
+    return [reader.pages[i].extract_text() or "" for i in range(start, end)]
+
+
+def iter_pdf_pages(file_path: str, pool: Executor, max_in_flight: int) -> Iterator[str]:
+    """Yields the text of every page, in order, extracting ahead in the pool."""
+    count = _page_count(file_path)
+    pending = deque()
+    for start in range(0, count, PAGES_PER_TASK):
+        pending.append(pool.submit(_extract_pages, file_path, start, min(start + PAGES_PER_TASK, count)))
+        if len(pending) >= max_in_flight:
+            yield from pending.popleft().result()
+    while pending:
+        yield from pending.popleft().result()
+
+
+def iter_file_chunks(file_path: str, chunker: Chunker, pool: Executor, max_in_flight: int) -> Iterator[TextChunk]:
+    if file_path.lower().endswith(".pdf"):
+        pages = enumerate(iter_pdf_pages(file_path, pool, max_in_flight), start=1)
+    else:
+        with open(file_path, "r", encoding="utf-8") as f:
+            pages = [(1, f.read())]
+    yield from chunker.chunk(os.path.basename(file_path), pages)
+
+
+def iter_folder(folder_path: str, chunker: Chunker, pool: Executor, max_in_flight: int, skip=None) -> Iterator[object]:
+    """
+    Yields TextChunk objects for every supported file in the folder, each file
+    followed by a FileDone. `skip(filename, digest)` returning True leaves a file
+    out (e.g. unchanged since the last run).
+    """
+    for filename in sorted(os.listdir(folder_path)):
+        file_path = os.path.join(folder_path, filename)
+        if not filename.lower().endswith(SUPPORTED_EXTENSIONS):
+            print(f"   - Skipping unsupported file: {filename}")
+            continue
+        digest = file_digest(file_path)
+        if skip and skip(filename, digest):
+            print(f"-> Unchanged, skipping: {filename}")
+            continue
+
+        print(f"-> Processing file: {filename}")
+        count = 0
+        try:
+            for chunk in iter_file_chunks(file_path, chunker, pool, max_in_flight):
+                count += 1
+                yield chunk
+        except Exception as e:
+            print(f"   - ❌ Error reading {filename}: {e}")
+            continue
+        print(f"   - Found {count} chunks.")
+        yield FileDone(filename, digest, count)
+
+
+_END = object()
+
+
+def prefetch(items: Iterable, maxsize: int) -> Iterator:
+    """
+    Produces `items` on a background thread and hands them over through a
+    bounded queue: extraction keeps going while the consumer is busy uploading
+    or embedding, but can never run more than `maxsize` items ahead.
+    """
+    buffer: "queue.Queue" = queue.Queue(maxsize=maxsize)
+    stop = threading.Event()
+    error: List[Optional[BaseException]] = [None]
+
+    def produce():
+        try:
+            for item in items:
+                while not stop.is_set():
+                    try:
+                        buffer.put(item, timeout=0.5)
+                        break
+                    except queue.Full:
+                        continue
+                if stop.is_set():
+                    return
+        except BaseException as e:
+            error[0] = e
+        finally:
+            buffer.put(_END)
+
+    producer = threading.Thread(target=produce, name="ingest-producer", daemon=True)
+    producer.start()
+    try:
+        while True:
+            item = buffer.get()
+            if item is _END:
+                break
+            yield item
+        if error[0] is not None:
+            raise error[0]
+    finally:
+        # Consumer stopped early: let the producer exit instead of blocking on a full queue
+        stop.set()
+        while producer.is_alive():
+            try:
+                buffer.get_nowait()
+            except queue.Empty:
+                producer.join(timeout=0.1)
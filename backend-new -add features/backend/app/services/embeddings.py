@@ -0,0 +1,156 @@
+# backend/app/services/embeddings.py
+"""
+Text embeddings for theory ingestion and retrieval.
+
+A model id selects the provider: "text-embedding-004" is a Google model called
+through the Gemini API, "local:intfloat/multilingual-e5-small" is a
+sentence-transformers model run on the CPU. Vectors are cached on disk by
+model, task type and content hash, so re-ingesting unchanged chunks or
+repeating a query never embeds the same text twice.
+"""
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from array import array
+from typing import Dict, List, Optional, Sequence, Union
+
+import google.generativeai as genai
+
+from app.core.config import settings
+
+genai.configure(api_key=settings.GEMINI_API_KEY)
+
+LOCAL_PREFIX = "local:"
+
+
+def is_local_model(model: Optional[str]) -> bool:
+    return bool(model) and model.startswith(LOCAL_PREFIX)
+
+
+class Embedder(ABC):
+    """Turns texts into vectors; task_type is "retrieval_document" or "retrieval_query"."""
+    batch_size = 100
+
+    @abstractmethod
+    def embed(self, texts: List[str], task_type: str) -> List[List[float]]:
+        ...
+
+
+class GoogleEmbedder(Embedder):
+    def __init__(self, model: str):
+        self.model = model
+
+    def embed(self, texts: List[str], task_type: str) -> List[List[float]]:
+        result = genai.embed_content(model=f"models/{self.model}", content=texts, task_type=task_type)
+        return result["embedding"]
+
+
+class LocalEmbedder(Embedder):
+    """A sentence-transformers model on the CPU: no API quota, no network after the first download."""
+    def __init__(self, model: str, batch_size: int):
+        try:
+            from sentence_transformers import SentenceTransformer
+        except ImportError as e:
+            raise RuntimeError(f"Local embedding model '{model}' needs the sentence-transformers package") from e
+        self.model = SentenceTransformer(model, device="cpu")
+        self.batch_size = batch_size
+        # E5 models are trained with these prefixes and score noticeably worse without them
+        self.prefixes = {"retrieval_query": "query: ", "retrieval_document": "passage: "} if "e5" in model.lower() else {}
+
+    def embed(self, texts: List[str], task_type: str) -> List[List[float]]:
+        prefix = self.prefixes.get(task_type, "")
+        vectors = self.model.encode(
+            [prefix + text for text in texts],
+            batch_size=self.batch_size,
+            normalize_embeddings=True,
+            convert_to_numpy=True,
+        )
+        return vectors.tolist()
+
+
+class EmbeddingDiskCache:
+    """
+    Vectors of one model in a SQLite file under `cache_dir`, keyed by a hash of
+    the task type and text. Stored as float32, like the local index.
+    """
+    def __init__(self, cache_dir: str, model: str):
+        os.makedirs(cache_dir, exist_ok=True)
+        path = os.path.join(cache_dir, re.sub(r"[^\w.-]+", "_", model) + ".sqlite")
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("CREATE TABLE IF NOT EXISTS vectors (key TEXT PRIMARY KEY, vector BLOB NOT NULL)")
+
+    @staticmethod
+    def key(text: str, task_type: str) -> str:
+        return hashlib.sha256(f"{task_type}\x1f{text}".encode("utf-8")).hexdigest()
+
+    def get_many(self, keys: Sequence[str]) -> Dict[str, List[float]]:
+        found = {}
+        with self._lock:
+            # Stay well under SQLite's bound-parameter limit
+            for start in range(0, len(keys), 500):
+                batch = keys[start:start + 500]
+                rows = self._db.execute(
+                    f"SELECT key, vector FROM vectors WHERE key IN ({','.join('?' * len(batch))})", batch
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = array("f", blob).tolist()
+        return found
+
+    def put_many(self, items: Dict[str, List[float]]):
+        with self._lock, self._db:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO vectors (key, vector) VALUES (?, ?)",
+                [(key, array("f", vector).tobytes()) for key, vector in items.items()],
+            )
+
+
+class CachedEmbedder(Embedder):
+    """Embeds only the texts missing from the disk cache, batch_size at a time."""
+    def __init__(self, embedder: Embedder, cache: EmbeddingDiskCache):
+        self.embedder = embedder
+        self.cache = cache
+        self.batch_size = embedder.batch_size
+
+    def embed(self, texts: List[str], task_type: str) -> List[List[float]]:
+        keys = [self.cache.key(text, task_type) for text in texts]
+        vectors = self.cache.get_many(keys)
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in vectors:
+                missing[key] = text
+        missing_keys = list(missing)
+        for start in range(0, len(missing_keys), self.batch_size):
+            batch = missing_keys[start:start + self.batch_size]
+            embedded = dict(zip(batch, self.embedder.embed([missing[key] for key in batch], task_type)))
+            self.cache.put_many(embedded)
+            vectors.update(embedded)
+        return [vectors[key] for key in keys]
+
+
+_embedders: Dict[str, Embedder] = {}
+_embedders_lock = threading.Lock()
+
+
+def get_embedder(model: str) -> Embedder:
+    """The embedder for a model id, created once per process (local models are slow to load)."""
+    with _embedders_lock:
+        if model not in _embedders:
+            if is_local_model(model):
+                embedder = LocalEmbedder(model[len(LOCAL_PREFIX):], settings.EMBEDDING_BATCH_SIZE)
+            else:
+                embedder = GoogleEmbedder(model)
+            if settings.EMBEDDING_CACHE_DIR:
+                embedder = CachedEmbedder(embedder, EmbeddingDiskCache(settings.EMBEDDING_CACHE_DIR, model))
+            _embedders[model] = embedder
+        return _embedders[model]
+
+
+def embed_texts(texts: Union[str, Sequence[str]], model: str, task_type: str):
+    """Embeddings for one text (a vector) or a list of texts (a list of vectors)."""
+    if isinstance(texts, str):
+        return get_embedder(model).embed([texts], task_type)[0]
+    return get_embedder(model).embed(list(texts), task_type)
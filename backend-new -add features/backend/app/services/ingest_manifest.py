@@ -0,0 +1,48 @@
+# backend/app/services/ingest_manifest.py
+import json
+import os
+from typing import Dict, Optional
+
+
+class IngestManifest:
+    """
+    Content hash of every file already ingested into a target, so re-runs skip
+    files that haven't changed and an interrupted run resumes where it stopped.
+
+    Entries are keyed by target, language, subject and file name, since the same
+    folder can be ingested into Weaviate and the local index independently.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self._files: Dict[str, str] = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self._files = json.load(f).get("files", {})
+
+    @staticmethod
+    def key(target: str, language: str, subject: str, filename: str) -> str:
+        return f"{target}/{language.lower()}/{subject.title()}/{filename}"
+
+    def digest(self, key: str) -> Optional[str]:
+        return self._files.get(key)
+
+    def entries(self, prefix: str) -> Dict[str, str]:
+        return {key: digest for key, digest in self._files.items() if key.startswith(prefix)}
+
+    def is_current(self, key: str, digest: str) -> bool:
+        return self._files.get(key) == digest
+
+    def mark(self, key: str, digest: str):
+        self._files[key] = digest
+
+    def forget(self, key: str):
+        self._files.pop(key, None)
+
+    def save(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"files": self._files}, f, ensure_ascii=False, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,53 @@
+# backend/app/services/ingest_metrics.py
+import statistics
+import time
+from typing import List
+
+
+class IngestMetrics:
+    """
+    Throughput counters for an ingestion run, printed as a live status line
+    every `report_interval` seconds and as a summary at the end.
+    """
+    def __init__(self, label: str, report_interval: float = 2.0):
+        self.label = label
+        self.report_interval = report_interval
+        self.objects = 0
+        self.bytes = 0
+        self.failed = 0
+        self.retried = 0
+        self.embed_latencies: List[float] = []
+        self._started = time.perf_counter()
+        self._reported = self._started
+
+    def record(self, content: str):
+        self.objects += 1
+        self.bytes += len(content.encode("utf-8"))
+        self.maybe_report()
+
+    def record_embed(self, seconds: float):
+        self.embed_latencies.append(seconds * 1000)
+
+    def _line(self) -> str:
+        elapsed = max(time.perf_counter() - self._started, 1e-9)
+        line = (
+            f"{self.label}: {self.objects} objects, {self.objects / elapsed:.1f} obj/s, "
+            f"{self.bytes / elapsed / 1024:.1f} KiB/s"
+        )
+        if self.embed_latencies:
+            p50 = statistics.median(self.embed_latencies)
+            line += f", embed p50 {p50:.0f} ms"
+            if len(self.embed_latencies) >= 20:
+                line += f" / p95 {statistics.quantiles(self.embed_latencies, n=20)[-1]:.0f} ms"
+        if self.retried or self.failed:
+            line += f", {self.retried} retried, {self.failed} failed"
+        return line
+
+    def maybe_report(self):
+        now = time.perf_counter()
+        if now - self._reported >= self.report_interval:
+            self._reported = now
+            print(f"   {self._line()}", flush=True)
+
+    def summary(self):
+        print(f"📊 {self._line()} in {time.perf_counter() - self._started:.1f}s")
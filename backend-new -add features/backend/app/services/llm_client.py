@@ -0,0 +1,74 @@
+# backend/app/services/llm_client.py
+import asyncio
+from typing import AsyncIterator
+import google.generativeai as genai
+from google.generativeai.types import HarmCategory, HarmBlockThreshold
+
+from app import prompts
+from app.core.config import settings
+
+# Configure Gemini API
+genai.configure(api_key=settings.GEMINI_API_KEY)
+safety_settings = {
+    HarmCategory.HARM_CATEGORY_HARASSMENT: HarmBlockThreshold.BLOCK_NONE,
+    HarmCategory.HARM_CATEGORY_HATE_SPEECH: HarmBlockThreshold.BLOCK_NONE,
+    HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT: HarmBlockThreshold.BLOCK_NONE,
+    HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT: HarmBlockThreshold.BLOCK_NONE,
+}
+
+model = genai.GenerativeModel('gemini-2.5-flash', safety_settings=safety_settings, system_instruction=prompts.UNIFIED_SYSTEM_PROMPT)
+
+
+class AsyncLLMClient:
+    """
+    Non-blocking access to a Gemini model for code running on the event loop.
+
+    Uses the SDK's native async methods, so a slow generation only suspends the
+    coroutine waiting on it instead of freezing every other socket. The
+    semaphore caps in-flight requests per worker so a burst of users can't
+    exhaust the API quota or the gRPC channel.
+    """
+    def __init__(self, model: genai.GenerativeModel, max_concurrency: int = 16):
+        self.model = model
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def generate(self, prompt, **kwargs):
+        """Runs a single non-streaming generation and returns the full response."""
+        async with self._semaphore:
+            return await self.model.generate_content_async(prompt, **kwargs)
+
+    async def stream_text(self, prompt, **kwargs) -> AsyncIterator[str]:
+        """
+        Yields the text of each streamed chunk as soon as it arrives.
+
+        The stream is read into a queue by a task of its own, so the semaphore is
+        released as soon as the model finishes, however slowly the caller sends the
+        chunks on. The queue never holds more than one response, which the model's
+        output token limit bounds.
+        """
+        chunks: asyncio.Queue = asyncio.Queue()
+
+        async def read_stream():
+            try:
+                async with self._semaphore:
+                    response = await self.model.generate_content_async(prompt, stream=True, **kwargs)
+                    async for chunk in response:
+                        if chunk.text:
+                            chunks.put_nowait(chunk.text)
+            except Exception as e:
+                chunks.put_nowait(e)
+                return
+            chunks.put_nowait(None)
+
+        reader = asyncio.create_task(read_stream())
+        try:
+            while (item := await chunks.get()) is not None:
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            # The caller stopped early (e.g. the socket closed): don't keep generating
+            reader.cancel()
+
+
+llm = AsyncLLMClient(model, max_concurrency=settings.LLM_MAX_CONCURRENCY)
@@ -0,0 +1,245 @@
+# backend/app/services/local_index.py
+"""
+On-disk flat vector index for theory chunks, read through memory maps.
+
+One segment per (language, subject), written by ingest_theories.py:
+
+    <index_dir>/<language>/<Subject>/
+        meta.json               current build id, embedding model, dim, count
+        vectors-<build>.f32     count x dim float32, rows L2-normalized
+        offsets-<build>.u64     count + 1 byte offsets into the chunks file
+        chunks-<build>.jsonl    one JSON record per row
+
+Keeping each (language, subject) in its own segment makes the language/subject
+filter a directory lookup, and the vectors of a segment one contiguous block
+for a single matrix-vector product. A rebuild writes a new set of files and
+then swaps meta.json with os.replace, so readers never see a half-written
+segment.
+
+The BM25 index used for hybrid search is built in memory from the chunks file
+the first time a segment is searched lexically.
+"""
+import json
+import math
+import os
+import re
+import threading
+import uuid
+from collections import Counter, defaultdict
+from typing import Dict, Hashable, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+META_FILE = "meta.json"
+
+# Python's \w doesn't cover Tamil vowel signs and viramas, so add the whole Tamil block
+# to keep words like "உராய்வு" in one token
+_TOKEN_PATTERN = re.compile(r"[\w\u0B80-\u0BFF]+")
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_PATTERN.findall(text.casefold())
+
+
+def segment_path(index_dir: str, language: str, subject: str) -> str:
+    return os.path.join(index_dir, language.lower(), subject.title())
+
+
+def _normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1
+    return vectors / norms
+
+
+class LocalIndexWriter:
+    """Streams (vector, record) pairs into a new build of one segment."""
+    def __init__(self, index_dir: str, language: str, subject: str, model: str):
+        self.path = segment_path(index_dir, language, subject)
+        self.language = language.lower()
+        self.subject = subject.title()
+        self.model = model
+        self.build = uuid.uuid4().hex[:12]
+        self.dim: Optional[int] = None
+        self.count = 0
+        os.makedirs(self.path, exist_ok=True)
+        self._vectors = open(self._file("vectors", "f32"), "wb")
+        self._chunks = open(self._file("chunks", "jsonl"), "wb")
+        self._offsets = [0]
+
+    def _file(self, kind: str, ext: str, build: Optional[str] = None) -> str:
+        return os.path.join(self.path, f"{kind}-{build or self.build}.{ext}")
+
+    def add(self, vectors: Sequence[Sequence[float]], records: Sequence[dict]):
+        if len(vectors) != len(records):
+            raise ValueError("Got a different number of vectors and records")
+        if not records:
+            return
+        matrix = np.asarray(vectors, dtype=np.float32)
+        if self.dim is None:
+            self.dim = matrix.shape[1]
+        elif matrix.shape[1] != self.dim:
+            raise ValueError(f"Expected {self.dim}-d vectors, got {matrix.shape[1]}-d")
+        _normalize_rows(matrix).astype(np.float32).tofile(self._vectors)
+        for record in records:
+            line = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+            self._chunks.write(line)
+            self._offsets.append(self._offsets[-1] + len(line))
+        self.count += len(records)
+
+    def _close(self):
+        self._vectors.close()
+        self._chunks.close()
+
+    def commit(self):
+        """Publishes this build and removes the files of older builds."""
+        self._close()
+        np.asarray(self._offsets, dtype=np.uint64).tofile(self._file("offsets", "u64"))
+        meta = {
+            "build": self.build,
+            "model": self.model,
+            "dim": self.dim or 0,
+            "count": self.count,
+            "language": self.language,
+            "subject": self.subject,
+        }
+        tmp_path = os.path.join(self.path, f"{META_FILE}.{self.build}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, os.path.join(self.path, META_FILE))
+
+        for name in os.listdir(self.path):
+            if name != META_FILE and self.build not in name:
+                try:
+                    os.remove(os.path.join(self.path, name))
+                except OSError:
+                    # Still mapped by a reader (Windows); the next build cleans it up
+                    pass
+
+    def abort(self):
+        self._close()
+        for kind, ext in (("vectors", "f32"), ("chunks", "jsonl"), ("offsets", "u64")):
+            if os.path.exists(self._file(kind, ext)):
+                os.remove(self._file(kind, ext))
+
+
+class Bm25Index:
+    """In-memory BM25 (Okapi) inverted index over the chunks of one segment."""
+    def __init__(self, documents: Iterable[str], k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings: Dict[str, List[tuple]] = defaultdict(list)
+        self.lengths: List[int] = []
+        for row, text in enumerate(documents):
+            terms = Counter(tokenize(text))
+            self.lengths.append(sum(terms.values()))
+            for term, tf in terms.items():
+                self.postings[term].append((row, tf))
+        self.avg_length = (sum(self.lengths) / len(self.lengths)) if self.lengths else 0
+
+    def search(self, query: str, k: int) -> List[tuple]:
+        """Top-k (score, row) pairs, best first."""
+        scores: Dict[int, float] = defaultdict(float)
+        count = len(self.lengths)
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for row, tf in postings:
+                norm = self.k1 * (1 - self.b + self.b * self.lengths[row] / self.avg_length)
+                scores[row] += idf * tf * (self.k1 + 1) / (tf + norm)
+        return sorted(((score, row) for row, score in scores.items()), reverse=True)[:k]
+
+
+class _Segment:
+    def __init__(self, path: str, meta: dict):
+        self.meta = meta
+        build = meta["build"]
+        count, dim = meta["count"], meta["dim"]
+        if count:
+            self.vectors = np.memmap(os.path.join(path, f"vectors-{build}.f32"), dtype=np.float32, mode="r", shape=(count, dim))
+            self.offsets = np.memmap(os.path.join(path, f"offsets-{build}.u64"), dtype=np.uint64, mode="r")
+            self.chunks = np.memmap(os.path.join(path, f"chunks-{build}.jsonl"), dtype=np.uint8, mode="r")
+        else:
+            self.vectors = np.zeros((0, dim), dtype=np.float32)
+        self._bm25: Optional[Bm25Index] = None
+        self._bm25_lock = threading.Lock()
+
+    def record(self, row: int) -> dict:
+        start, end = int(self.offsets[row]), int(self.offsets[row + 1])
+        return json.loads(self.chunks[start:end].tobytes().decode("utf-8"))
+
+    def search(self, query: Sequence[float], k: int) -> List[tuple]:
+        """Top-k (cosine distance, record) pairs, closest first."""
+        count = len(self.vectors)
+        if not count or k <= 0:
+            return []
+        q = np.array(query, dtype=np.float32)
+        q /= np.linalg.norm(q) or 1
+        scores = self.vectors @ q
+        k = min(k, count)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(1 - float(scores[row]), self.record(int(row))) for row in top]
+
+    def lexical_search(self, query: str, k: int) -> List[tuple]:
+        """Top-k (BM25 score, record) pairs, best first."""
+        if not len(self.vectors) or k <= 0:
+            return []
+        with self._bm25_lock:
+            # Built on first use from the chunks file, once per build
+            if self._bm25 is None:
+                self._bm25 = Bm25Index(self.record(row)["content"] for row in range(len(self.vectors)))
+        return [(score, self.record(row)) for score, row in self._bm25.search(query, k)]
+
+
+class LocalIndex:
+    """Lazily maps the segments of an index directory, reloading rebuilt ones."""
+    def __init__(self, index_dir: str):
+        self.index_dir = index_dir
+        self._segments: Dict[str, _Segment] = {}
+        self._lock = threading.Lock()
+
+    def segment(self, language: str, subject: str) -> Optional[_Segment]:
+        path = segment_path(self.index_dir, language, subject)
+        with self._lock:
+            segment = self._segments.get(path)
+        if segment is None:
+            meta = self._read_meta(path)
+            if meta is None:
+                return None
+            segment = _Segment(path, meta)
+            with self._lock:
+                self._segments[path] = segment
+        return segment
+
+    @staticmethod
+    def _read_meta(path: str) -> Optional[dict]:
+        try:
+            with open(os.path.join(path, META_FILE), encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def _segment_paths(self) -> Iterable[str]:
+        if not os.path.isdir(self.index_dir):
+            return []
+        return [
+            os.path.join(self.index_dir, language, subject)
+            for language in os.listdir(self.index_dir)
+            if os.path.isdir(os.path.join(self.index_dir, language))
+            for subject in os.listdir(os.path.join(self.index_dir, language))
+        ]
+
+    def generation(self) -> Hashable:
+        """Current build of every segment; drops mapped segments that were rebuilt."""
+        builds = {}
+        for path in self._segment_paths():
+            meta = self._read_meta(path)
+            if meta is not None:
+                builds[path] = meta["build"]
+        with self._lock:
+            for path in list(self._segments):
+                if self._segments[path].meta["build"] != builds.get(path):
+                    del self._segments[path]
+        return tuple(sorted(builds.items()))
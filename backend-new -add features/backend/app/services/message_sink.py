@@ -0,0 +1,140 @@
+# backend/app/services/message_sink.py
+import asyncio
+import uuid
+from typing import Optional
+
+from sqlalchemy.exc import DataError, IntegrityError
+
+from app.core.config import settings
+from app.crud import async_crud
+
+# Errors that mean a row can never be written, however often it is retried
+PERMANENT_ERRORS = (IntegrityError, DataError)
+
+
+class MessageSink:
+    """
+    Write-behind persistence for chat messages.
+
+    The chat loop enqueues messages and moves on; a background task writes them
+    in batched multi-row INSERTs every `flush_interval` seconds, or as soon as
+    `max_batch` rows are waiting. There is a single FIFO queue and one flush runs
+    at a time, so messages reach the table in the order they were enqueued.
+    `created_at` is stamped by the database when the batch is written (see
+    async_crud.create_messages), on the same clock as every other timestamp.
+
+    A batch that fails on a transient error (connection lost, DB restarting) goes
+    back to the head of the queue and is retried with exponential backoff up to
+    `max_retry_delay`. A batch that fails because some row can never be written
+    (e.g. its conversation was deleted mid-stream) is retried per conversation and
+    then row by row, so only the rows that can't be written are dropped.
+    """
+    def __init__(self, flush_interval: float, max_batch: int, max_retry_delay: float = 30.0):
+        self._flush_interval = flush_interval
+        self._max_batch = max_batch
+        self._max_retry_delay = max_retry_delay
+        self._retry_delay = 0.0
+        self._queue: list[dict] = []
+        self._flush_lock = asyncio.Lock()
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def enqueue(self, conversation_id: uuid.UUID, role: str, content: str, question_image_url: Optional[str] = None,
+                answer_image_url: Optional[str] = None, youtube_link: Optional[str] = None):
+        self._queue.append({
+            "conversation_id": conversation_id,
+            "role": role,
+            "content": content,
+            "question_image_url": question_image_url,
+            "answer_image_url": answer_image_url,
+            "youtube_link": youtube_link,
+        })
+        self.start()
+        if len(self._queue) >= self._max_batch:
+            self._wakeup.set()
+
+    @staticmethod
+    async def _write(rows: list[dict]):
+        from app.db.session import AsyncSessionLocal
+        async with AsyncSessionLocal() as db:
+            await async_crud.create_messages(db, rows)
+
+    async def _write_isolated(self, batch: list[dict]):
+        """
+        Writes a batch that failed with a permanent error: each conversation's rows
+        in their own transaction, splitting a failing group into single rows.
+        Unwritten rows go back to the queue if anything else interrupts.
+        """
+        groups: dict[uuid.UUID, list[dict]] = {}
+        for row in batch:
+            groups.setdefault(row["conversation_id"], []).append(row)
+        pending = list(groups.values())
+        try:
+            while pending:
+                rows = pending[0]
+                try:
+                    await self._write(rows)
+                except PERMANENT_ERRORS as e:
+                    if len(rows) > 1:
+                        pending[0:1] = [[row] for row in rows]
+                        continue
+                    print(f"Dropping a message for conversation {rows[0]['conversation_id']} that can't be written: {str(e)}")
+                pending.pop(0)
+        except BaseException:
+            self._queue[:0] = [row for rows in pending for row in rows]
+            raise
+
+    async def flush(self):
+        async with self._flush_lock:
+            while self._queue:
+                batch = self._queue[:self._max_batch]
+                del self._queue[:len(batch)]
+                isolating = False
+                try:
+                    try:
+                        await self._write(batch)
+                    except PERMANENT_ERRORS:
+                        isolating = True
+                        await self._write_isolated(batch)
+                    self._retry_delay = 0.0
+                except BaseException as e:
+                    if not isolating:
+                        # _write_isolated requeues whatever it didn't write itself
+                        self._queue[:0] = batch
+                    if not isinstance(e, Exception):
+                        raise
+                    self._retry_delay = min(max(self._retry_delay * 2, self._flush_interval), self._max_retry_delay)
+                    print(f"Message flush error, retrying {len(self._queue)} messages in {self._retry_delay:.1f}s: {str(e)}")
+                    return
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self):
+        while True:
+            if self._retry_delay:
+                # Backing off: a full queue shouldn't hammer a database that is down
+                await asyncio.sleep(self._retry_delay)
+            else:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self._flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+            self._wakeup.clear()
+            await self.flush()
+
+    async def shutdown(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+        if self._queue:
+            print(f"Shutting down with {len(self._queue)} unsaved messages")
+
+
+message_sink = MessageSink(flush_interval=settings.MESSAGE_FLUSH_INTERVAL_SECONDS, max_batch=settings.MESSAGE_FLUSH_MAX_BATCH)
@@ -0,0 +1,98 @@
+# backend/app/services/subject_resolver.py
+import threading
+import time
+import uuid
+from typing import Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import models
+
+# Other names students (and the LLM router) use for a subject, mapped to the name stored in sources.subjects
+SUBJECT_ALIASES = {
+    "பௌதிகவியல்": "Physics",
+    "பௌதீகவியல்": "Physics",
+    "phy": "Physics",
+    "இரசாயனவியல்": "Chemistry",
+    "chem": "Chemistry",
+    "இணைந்த கணிதம்": "Combined Mathematics",
+    "combined maths": "Combined Mathematics",
+    "combined math": "Combined Mathematics",
+    "உயிரியல்": "Biology",
+    "bio": "Biology",
+}
+# Names the LLM makes up are unbounded; past this many remembered misses start over
+MAX_MISSES = 1000
+
+
+def _normalize(name: str) -> str:
+    return " ".join(name.split()).casefold()
+
+
+class SubjectResolver:
+    """
+    Process-local map of subject name -> id.
+
+    The subjects table holds a handful of rows that almost never change, so the
+    RAG lookups resolve names here instead of paying a DB round-trip per tool
+    call. Admin writes in this process call `invalidate()`; `max_age` bounds how
+    long a change made through another worker can go unnoticed. Unknown names
+    are remembered for `miss_ttl` seconds, so a subject that doesn't exist costs
+    one DB round-trip per `miss_ttl` rather than one per turn.
+    """
+    def __init__(self, aliases: dict[str, str], max_age: float = 300, miss_ttl: float = 30):
+        self._aliases = {_normalize(alias): name for alias, name in aliases.items()}
+        self._max_age = max_age
+        self._miss_ttl = miss_ttl
+        self._ids: Optional[dict[str, uuid.UUID]] = None
+        self._misses: dict[str, float] = {}
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    def canonical_name(self, name: str) -> str:
+        """Maps an alias to its subject name without touching the DB."""
+        return self._aliases.get(_normalize(name), name)
+
+    @property
+    def is_fresh(self) -> bool:
+        return self._ids is not None and time.monotonic() - self._loaded_at < self._max_age
+
+    def _store(self, rows):
+        with self._lock:
+            self._ids = {_normalize(name): subject_id for subject_id, name in rows}
+            self._loaded_at = time.monotonic()
+
+    def load(self, db: Session):
+        self._store(db.execute(select(models.Subject.id, models.Subject.name)).all())
+
+    async def load_async(self, db: AsyncSession):
+        self._store((await db.execute(select(models.Subject.id, models.Subject.name))).all())
+
+    def get(self, name: str) -> Optional[uuid.UUID]:
+        ids = self._ids or {}
+        return ids.get(_normalize(name)) or ids.get(_normalize(self.canonical_name(name)))
+
+    def remember(self, name: str, subject_id: uuid.UUID):
+        with self._lock:
+            if self._ids is not None:
+                self._ids[_normalize(name)] = subject_id
+
+    def is_known_miss(self, name: str) -> bool:
+        expires_at = self._misses.get(_normalize(name))
+        return expires_at is not None and time.monotonic() < expires_at
+
+    def remember_miss(self, name: str):
+        with self._lock:
+            if len(self._misses) >= MAX_MISSES:
+                self._misses.clear()
+            self._misses[_normalize(name)] = time.monotonic() + self._miss_ttl
+
+    def invalidate(self):
+        with self._lock:
+            self._ids = None
+            self._misses.clear()
+
+
+subject_resolver = SubjectResolver(SUBJECT_ALIASES)
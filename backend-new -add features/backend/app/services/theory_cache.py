@@ -0,0 +1,86 @@
+# backend/app/services/theory_cache.py
+import threading
+import time
+from array import array
+from typing import Callable, Hashable, List, Optional, Sequence
+
+from app.core.config import settings
+from app.services.ttl_cache import TTLCache
+
+
+def normalize_topic(topic: str) -> str:
+    return " ".join(topic.split()).casefold()
+
+
+class TheorySearchCache:
+    """
+    Two-level cache in front of the Weaviate theory search.
+
+    Level 1 maps a normalized topic to its query embedding, so "friction" is only
+    vectorized once. Level 2 maps (topic, language, subject, k) to the final
+    results. Embeddings don't depend on the corpus and only expire by TTL;
+    results are dropped whenever the Theory collection changes.
+
+    Ingestion runs in another process, so the cache can't be told directly. It
+    instead compares a cheap generation marker of the retrieval backend (the
+    Weaviate object count and last ingest time, the local index build ids) at
+    most every `check_interval` seconds and drops the results when it moves.
+    """
+    def __init__(self, max_vectors: int, max_results: int, ttl: float, check_interval: float):
+        self.vectors = TTLCache(max_size=max_vectors, ttl=ttl)
+        self.results = TTLCache(max_size=max_results, ttl=ttl)
+        self._check_interval = check_interval
+        self._generation = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def get_vector(self, model: str, topic: str) -> Optional[List[float]]:
+        vector = self.vectors.get((model, normalize_topic(topic)))
+        return vector.tolist() if vector is not None else None
+
+    def put_vector(self, model: str, topic: str, vector: Sequence[float]):
+        # float32 array: ~3 KB per 768-d embedding instead of ~25 KB as a list of floats
+        self.vectors.put((model, normalize_topic(topic)), array("f", vector))
+
+    @staticmethod
+    def results_key(topic: str, language: str, subject: str, num_results: int) -> Hashable:
+        return (normalize_topic(topic), language.lower(), subject.title(), num_results)
+
+    def get_results(self, key: Hashable) -> Optional[List[dict]]:
+        results = self.results.get(key)
+        # Callers get their own dicts so they can't modify the cached ones
+        return [dict(r) for r in results] if results is not None else None
+
+    def put_results(self, key: Hashable, results: List[dict]):
+        self.results.put(key, tuple(dict(r) for r in results))
+
+    def sync_generation(self, read_generation: Callable[[], Hashable]):
+        """Drops cached results if the indexed theories changed since the last check."""
+        with self._lock:
+            if time.monotonic() - self._checked_at < self._check_interval:
+                return
+            self._checked_at = time.monotonic()
+        try:
+            generation = read_generation()
+        except Exception as e:
+            print(f"Could not read theory index generation: {e}")
+            return
+        with self._lock:
+            if generation != self._generation:
+                if self._generation is not None:
+                    self.results.clear()
+                self._generation = generation
+
+    def invalidate(self):
+        self.results.clear()
+
+    def stats(self) -> dict:
+        return {"vectors": self.vectors.stats(), "results": self.results.stats()}
+
+
+theory_cache = TheorySearchCache(
+    max_vectors=settings.THEORY_VECTOR_CACHE_MAX_SIZE,
+    max_results=settings.THEORY_RESULT_CACHE_MAX_SIZE,
+    ttl=settings.THEORY_CACHE_TTL_SECONDS,
+    check_interval=settings.THEORY_CACHE_CHECK_SECONDS,
+)
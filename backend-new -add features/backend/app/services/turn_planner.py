@@ -0,0 +1,143 @@
+# backend/app/services/turn_planner.py
+import asyncio
+import re
+import uuid
+from dataclasses import dataclass, field
+from typing import Optional
+
+from app.crud import async_crud
+from app.services.llm_client import llm
+from tools.tools import (GetPastPaperQuestionTool, GetModelPaperQuestionTool,
+                   GetTheoryTool, SearchQuestionsByTopicTool)
+
+available_tools = [
+    GetPastPaperQuestionTool,
+    GetModelPaperQuestionTool,
+    GetTheoryTool,
+    SearchQuestionsByTopicTool
+]
+
+TITLE_PROMPT = "Based on the following user query, create a short, descriptive title (5 words or less) for the conversation. Do not use quotes or any special formatting. Just return the text of the title. User Query: \"{user_prompt}\""
+
+# --- Fast local classifier ---
+# Only recognises fully specified past paper lookups ("2019 physics MCQ 12").
+# Anything ambiguous falls through to the LLM router.
+_SUBJECT_PATTERNS = [
+    ("Physics", re.compile(r"\bphysics\b|\bphy\b|பௌதிகவியல்|பௌதீகவியல்|භෞතික", re.IGNORECASE)),
+    ("Chemistry", re.compile(r"\bchemistry\b|\bchem\b|இரசாயனவியல்|රසායන", re.IGNORECASE)),
+    ("Combined Mathematics", re.compile(r"\bcombined\s+math(?:s|ematics)?\b|இணைந்த\s*கணிதம்|සංයුක්ත\s*ගණිත", re.IGNORECASE)),
+]
+_TYPE_PATTERNS = [
+    ("mcq", re.compile(r"\bm\.c\.q\b|\bmcqs?\b|multiple\s+choice|பல்தேர்வு", re.IGNORECASE)),
+    ("structure", re.compile(r"\bstructured?\b|அமைப்பு", re.IGNORECASE)),
+    ("essay", re.compile(r"\bessay\b|கட்டுரை", re.IGNORECASE)),
+]
+_YEAR_PATTERN = re.compile(r"\b(19[89]\d|20[0-4]\d)\b")
+_NUMBER_PATTERN = re.compile(
+    r"(?:\bquestion|\bq|\bno|\bnumber|#|\bmcqs?|\bstructured?|\bessay|கேள்வி)\s*(?:no\.?|number|#)?\s*\.?\s*(\d{1,2})\b",
+    re.IGNORECASE,
+)
+_MODEL_PAPER_PATTERN = re.compile(r"\bmodel\b|மாதிரி", re.IGNORECASE)
+_ANY_NUMBER_PATTERN = re.compile(r"\d+")
+_EXAM_PATTERN = re.compile(r"\ba\s*/\s*l\b", re.IGNORECASE)
+# Words a bare lookup may contain besides the year, subject, type and number. Anything
+# else ("why", "only part (b)", "in English") is a follow-up the LLM has to see.
+_LOOKUP_WORDS = {
+    "explain", "show", "give", "get", "find", "solve", "answer", "me", "the", "of", "in",
+    "for", "from", "past", "paper", "papers", "question", "q", "no", "number", "please", "pls",
+    "விளக்கு", "விளக்குக", "வினா", "கேள்வி", "இல்", "ஆண்டு", "பரீட்சை",
+}
+_TOKEN_SEPARATORS = re.compile(r"[\s.,:;!?#/()\-]+")
+
+
+def _single_match(patterns, text: str) -> Optional[str]:
+    found = {name for name, pattern in patterns if pattern.search(text)}
+    return found.pop() if len(found) == 1 else None
+
+
+def _is_bare_lookup(user_prompt: str) -> bool:
+    """True if nothing but the lookup itself and filler words is left in the prompt."""
+    rest = user_prompt
+    for pattern in [_EXAM_PATTERN, _YEAR_PATTERN, _NUMBER_PATTERN, *(p for _, p in _SUBJECT_PATTERNS), *(p for _, p in _TYPE_PATTERNS)]:
+        rest = pattern.sub(" ", rest)
+    return all(token.casefold() in _LOOKUP_WORDS for token in _TOKEN_SEPARATORS.split(rest) if token)
+
+
+def classify_locally(user_prompt: str) -> Optional[tuple[str, dict]]:
+    """
+    Returns (tool_name, tool_args) when the prompt is an unambiguous past paper
+    lookup and nothing else, otherwise None so the caller can ask the LLM to route
+    it. "mcq 12 and 13" or "mcq 12, why is it 2 newtons?" need the LLM.
+    """
+    if _MODEL_PAPER_PATTERN.search(user_prompt):
+        return None
+
+    years = set(_YEAR_PATTERN.findall(user_prompt))
+    subject = _single_match(_SUBJECT_PATTERNS, user_prompt)
+    question_type = _single_match(_TYPE_PATTERNS, user_prompt)
+    without_years = _YEAR_PATTERN.sub(" ", user_prompt)
+    numbers = set(_NUMBER_PATTERN.findall(without_years))
+    # Every number other than the year must be the question number
+    if len(years) != 1 or not subject or not question_type or len(numbers) != 1 \
+            or set(_ANY_NUMBER_PATTERN.findall(without_years)) != numbers:
+        return None
+    if not _is_bare_lookup(user_prompt):
+        return None
+
+    return "GetPastPaperQuestionTool", {
+        "subject": subject,
+        "year": int(years.pop()),
+        "question_type": question_type,
+        "question_number": int(numbers.pop()),
+    }
+
+
+# --- Turn planning ---
+@dataclass
+class TurnPlan:
+    tool_name: Optional[str] = None
+    tool_args: dict = field(default_factory=dict)
+    routed_locally: bool = False
+
+
+async def plan_turn(user_prompt: str) -> TurnPlan:
+    """Picks the tool for this turn, skipping the LLM routing call when possible."""
+    local_route = classify_locally(user_prompt)
+    if local_route:
+        tool_name, tool_args = local_route
+        return TurnPlan(tool_name=tool_name, tool_args=tool_args, routed_locally=True)
+
+    try:
+        response = await llm.generate(user_prompt, tools=available_tools)
+        function_call = response.candidates[0].content.parts[0].function_call if response.candidates and response.candidates[0].content.parts else None
+    except Exception as e:
+        print(f"Function call generation error: {str(e)}")
+        function_call = None
+
+    if not function_call:
+        return TurnPlan()
+    return TurnPlan(tool_name=function_call.name, tool_args={key: value for key, value in function_call.args.items()})
+
+
+# --- Background title generation ---
+# Strong references keep fire-and-forget tasks from being garbage collected mid-flight.
+_background_tasks: set[asyncio.Task] = set()
+
+
+async def _generate_title(conversation_id: uuid.UUID, user_prompt: str):
+    from app.db.session import AsyncSessionLocal
+    try:
+        title_response = await llm.generate(TITLE_PROMPT.format(user_prompt=user_prompt))
+        new_title = title_response.text.strip().replace('"', '')
+        async with AsyncSessionLocal() as db:
+            await async_crud.update_conversation_title(db, conversation_id=conversation_id, title=new_title)
+    except Exception as e:
+        print(f"Title generation error: {str(e)}")
+
+
+def schedule_title_generation(conversation_id: uuid.UUID, user_prompt: str) -> asyncio.Task:
+    """Generates the conversation title off the critical path of the first answer."""
+    task = asyncio.create_task(_generate_title(conversation_id, user_prompt))
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    return task
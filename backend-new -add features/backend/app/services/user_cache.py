@@ -0,0 +1,10 @@
+# backend/app/services/user_cache.py
+from app.core.config import settings
+from app.services.ttl_cache import TTLCache
+
+# Authenticated users keyed by the token's `sub` (google_id), so get_current_user can
+# skip the users lookup on most requests. Entries are detached ORM rows: treat them as
+# read-only and never add them to a session. No endpoint updates or deletes users; the
+# OAuth callback evicts the entry on every login. Changes made elsewhere (another worker,
+# a manual edit) go unnoticed for up to USER_CACHE_TTL_SECONDS.
+user_cache = TTLCache(max_size=settings.USER_CACHE_MAX_SIZE, ttl=settings.USER_CACHE_TTL_SECONDS)
@@ -1,25 +1,34 @@
 import weaviate
+from abc import ABC, abstractmethod
 from weaviate.auth import AuthApiKey
-from typing import List, Dict
+from typing import Hashable, List, Dict
 
 # Corrected imports for modern query syntax
-from weaviate.classes.query import Filter, MetadataQuery
+from weaviate.classes.query import Filter, MetadataQuery, Metrics
 
 from app.core.config import settings
+from app.services.embeddings import embed_texts
+from app.services.local_index import LocalIndex
+from app.services.theory_cache import theory_cache
 
 # --- Initialize Weaviate Client ---
-try:
-    client = weaviate.connect_to_wcs(
-        cluster_url=settings.WEAVIATE_URL,
-        auth_credentials=AuthApiKey(settings.WEAVIATE_API_KEY),
-        headers={
-            "X-Google-Api-Key": settings.GEMINI_API_KEY
-        }
-    )
-    print("Successfully connected to Weaviate.")
-except Exception as e:
-    print(f"Error connecting to Weaviate: {e}")
-    client = None
+def connect_weaviate():
+    try:
+        client = weaviate.connect_to_wcs(
+            cluster_url=settings.WEAVIATE_URL,
+            auth_credentials=AuthApiKey(settings.WEAVIATE_API_KEY),
+            headers={
+                "X-Google-Api-Key": settings.GEMINI_API_KEY
+            }
+        )
+        print("Successfully connected to Weaviate.")
+        return client
+    except Exception as e:
+        print(f"Error connecting to Weaviate: {e}")
+        return None
+
+# Only the Weaviate backend needs the cluster
+client = connect_weaviate() if settings.THEORY_BACKEND == "weaviate" else None
 
 def get_theory_collection():
     """Gets a reference to the Theory collection in Weaviate."""
@@ -27,38 +36,198 @@ def get_theory_collection():
         raise ConnectionError("Weaviate client is not initialized.")
     return client.collections.get("Theory")
 
-# --- Querying Function ---
-def find_similar_theories(topic: str, language: str, subject: str, num_results: int = 3) -> List[Dict]:
+# --- Embeddings ---
+def _topic_vector(topic: str, model: str) -> List[float]:
+    vector = theory_cache.get_vector(model, topic)
+    if vector is None:
+        vector = embed_texts(topic, model, "retrieval_query")
+        theory_cache.put_vector(model, topic, vector)
+    return vector
+
+# --- Retrieval Backends ---
+# Where a chunk sits in its textbook; missing on chunks ingested before they were recorded
+SECTION_FIELDS = ("unit", "main_heading", "sub_heading", "page_start", "page_end")
+
+def _dedup_key(result: Dict) -> tuple:
+    # Chunks indexed before chunk_index existed fall back to their text
+    chunk = result.get("chunk_index")
+    return (result.get("source_file"), chunk if chunk is not None else result.get("content"))
+
+def reciprocal_rank_fusion(rankings: List[List[Dict]], k: int = 60) -> List[Dict]:
     """
-    Finds and returns relevant theory content directly from Weaviate using modern syntax.
+    Merges ranked result lists by summing 1 / (k + rank) per chunk. A chunk found
+    by several retrievers appears once, with the fields of its first occurrence.
     """
-    try:
+    fused: Dict[tuple, Dict] = {}
+    for ranking in rankings:
+        for rank, result in enumerate(ranking, start=1):
+            key = _dedup_key(result)
+            if key not in fused:
+                fused[key] = {**result, "score": 0.0}
+                fused[key].setdefault("distance", None)
+            fused[key]["score"] += 1 / (k + rank)
+    return sorted(fused.values(), key=lambda r: r["score"], reverse=True)
+
+
+class TheoryBackend(ABC):
+    """Where find_similar_theories gets its results from."""
+    @abstractmethod
+    def vector_search(self, topic: str, language: str, subject: str, num_results: int) -> List[Dict]:
+        ...
+
+    @abstractmethod
+    def lexical_search(self, topic: str, language: str, subject: str, num_results: int) -> List[Dict]:
+        ...
+
+    @abstractmethod
+    def generation(self) -> Hashable:
+        """A marker that changes whenever ingestion changes the indexed theories."""
+
+    def search(self, topic: str, language: str, subject: str, num_results: int) -> List[Dict]:
+        """
+        Vector results fused with BM25 results (RRF). Exact formula names and Tamil
+        technical terms are often far apart in vector space but match lexically.
+        """
+        if not settings.THEORY_HYBRID_SEARCH:
+            return self.vector_search(topic, language, subject, num_results)
+
+        depth = max(num_results, settings.THEORY_HYBRID_CANDIDATES)
+        rankings = [self.vector_search(topic, language, subject, depth)]
+        try:
+            rankings.append(self.lexical_search(topic, language, subject, depth))
+        except Exception as e:
+            print(f"Lexical theory search failed, using vector results only: {e}")
+        return reciprocal_rank_fusion(rankings, k=settings.THEORY_RRF_K)[:num_results]
+
+
+class WeaviateTheoryBackend(TheoryBackend):
+    @staticmethod
+    def _filters(language: str, subject: str):
+        return (
+            Filter.by_property("language").equal(language.lower()) &
+            Filter.by_property("subject").equal(subject.title())
+        )
+
+    @staticmethod
+    def _to_result(item) -> Dict:
+        return {
+            "content": item.properties.get("content"),
+            "subject": item.properties.get("subject"),
+            "language": item.properties.get("language"),
+            "source_file": item.properties.get("source_file"),
+            "chunk_index": item.properties.get("chunk_index"),
+            **{field: item.properties.get(field) for field in SECTION_FIELDS},
+            "distance": item.metadata.distance,
+        }
+
+    def vector_search(self, topic: str, language: str, subject: str, num_results: int) -> List[Dict]:
         theories = get_theory_collection()
-        
-        # --- THIS IS THE UPDATED QUERY SYNTAX ---
-        response = theories.query.near_text(
+
+        if settings.THEORY_EMBEDDING_MODEL:
+            # Embed the topic ourselves (once per topic) instead of having Weaviate
+            # re-vectorize it through the Google module on every query
+            response = theories.query.near_vector(
+                near_vector=_topic_vector(topic, settings.THEORY_EMBEDDING_MODEL),
+                filters=self._filters(language, subject),
+                limit=num_results,
+                return_metadata=MetadataQuery(distance=True)
+            )
+        else:
+            response = theories.query.near_text(
+                query=topic,
+                filters=self._filters(language, subject),
+                limit=num_results,
+                return_metadata=MetadataQuery(distance=True)
+            )
+        return [self._to_result(item) for item in response.objects]
+
+    def lexical_search(self, topic: str, language: str, subject: str, num_results: int) -> List[Dict]:
+        # Weaviate keeps its own BM25 inverted index over the text properties
+        response = get_theory_collection().query.bm25(
             query=topic,
-            # The filter syntax has been updated
-            filters=(
-                Filter.by_property("language").equal(language.lower()) &
-                Filter.by_property("subject").equal(subject.title())
-            ),
+            query_properties=["content"],
+            filters=self._filters(language, subject),
             limit=num_results,
-            return_metadata=MetadataQuery(distance=True)
         )
-        
-        results = []
-        for item in response.objects:
-            result = {
-                "content": item.properties.get("content"),
-                "subject": item.properties.get("subject"),
-                "language": item.properties.get("language"),
-                "source_file": item.properties.get("source_file"),
-                "distance": item.metadata.distance,
-            }
-            results.append(result)
-        return results
+        return [self._to_result(item) for item in response.objects]
+
+    def generation(self) -> Hashable:
+        theories = get_theory_collection()
+        try:
+            # Re-ingesting an edited file can leave the count unchanged, but always
+            # stamps the new chunks with a later ingested_at
+            response = theories.aggregate.over_all(
+                total_count=True,
+                return_metrics=Metrics("ingested_at").date_(maximum=True),
+            )
+            return (response.total_count, response.properties["ingested_at"].maximum)
+        except Exception:
+            # Collections populated before ingested_at existed
+            return theories.aggregate.over_all(total_count=True).total_count
+
+
+class LocalTheoryBackend(TheoryBackend):
+    """
+    Exact cosine search over the memory-mapped index that ingest_theories.py
+    writes to THEORY_INDEX_DIR, plus an in-process BM25 index over the same
+    chunks. No network hop except embedding the topic, and that is cached per topic.
+    """
+    def __init__(self, index_dir: str):
+        self.index = LocalIndex(index_dir)
+
+    @staticmethod
+    def _to_result(segment, record: Dict, distance) -> Dict:
+        return {
+            "content": record["content"],
+            "subject": segment.meta["subject"],
+            "language": segment.meta["language"],
+            "source_file": record["source_file"],
+            "chunk_index": record.get("chunk_index"),
+            **{field: record.get(field) for field in SECTION_FIELDS},
+            "distance": distance,
+        }
+
+    def vector_search(self, topic: str, language: str, subject: str, num_results: int) -> List[Dict]:
+        segment = self.index.segment(language, subject)
+        if segment is None:
+            return []
+        # Query with the model the segment was built with, whatever the current setting
+        query = _topic_vector(topic, segment.meta["model"])
+        return [self._to_result(segment, record, distance) for distance, record in segment.search(query, num_results)]
 
+    def lexical_search(self, topic: str, language: str, subject: str, num_results: int) -> List[Dict]:
+        segment = self.index.segment(language, subject)
+        if segment is None:
+            return []
+        return [self._to_result(segment, record, None) for _, record in segment.lexical_search(topic, num_results)]
+
+    def generation(self) -> Hashable:
+        return self.index.generation()
+
+
+def get_theory_backend() -> TheoryBackend:
+    if settings.THEORY_BACKEND == "local":
+        return LocalTheoryBackend(settings.THEORY_INDEX_DIR)
+    return WeaviateTheoryBackend()
+
+theory_backend = get_theory_backend()
+
+# --- Querying Function ---
+def find_similar_theories(topic: str, language: str, subject: str, num_results: int = 3) -> List[Dict]:
+    """
+    Finds and returns relevant theory content from the configured retrieval backend.
+    Repeated (topic, language, subject, num_results) lookups are served from theory_cache.
+    """
+    theory_cache.sync_generation(theory_backend.generation)
+    cache_key = theory_cache.results_key(topic, language, subject, num_results)
+    cached = theory_cache.get_results(cache_key)
+    if cached is not None:
+        return cached
+
+    try:
+        results = theory_backend.search(topic, language, subject, num_results)
     except Exception as e:
-        print(f"Error querying Weaviate: {e}")
-        return []
\ No newline at end of file
+        print(f"Error querying theory backend: {e}")
+        return []
+    theory_cache.put_results(cache_key, results)
+    return results
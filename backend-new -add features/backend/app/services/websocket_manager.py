@@ -1,37 +1,36 @@
 # backend/app/services/websocket_manager.py
-from fastapi import WebSocket, Depends, HTTPException, WebSocketDisconnect
-from sqlalchemy.orm import Session
+from fastapi import WebSocket, HTTPException, WebSocketDisconnect
+import enum
 import json
 import asyncio
-import google.generativeai as genai
-from google.generativeai.types import HarmCategory, HarmBlockThreshold
+import uuid
 
-from app.crud import crud
+from app.crud import crud, async_crud
 from app.models import models
 from app import prompts
 from app.core.config import settings
-from app.core.security import get_current_user, get_db
-from tools.tools import (GetPastPaperQuestionTool, GetModelPaperQuestionTool,
-                   GetTheoryTool, SearchQuestionsByTopicTool)
-
-# Configure Gemini API
-genai.configure(api_key=settings.GEMINI_API_KEY)
-safety_settings = {
-    HarmCategory.HARM_CATEGORY_HARASSMENT: HarmBlockThreshold.BLOCK_NONE,
-    HarmCategory.HARM_CATEGORY_HATE_SPEECH: HarmBlockThreshold.BLOCK_NONE,
-    HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT: HarmBlockThreshold.BLOCK_NONE,
-    HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT: HarmBlockThreshold.BLOCK_NONE,
-}
-
-model = genai.GenerativeModel('gemini-2.5-flash', safety_settings=safety_settings, system_instruction=prompts.UNIFIED_SYSTEM_PROMPT)
-available_tools = [
-    GetPastPaperQuestionTool,
-    GetModelPaperQuestionTool,
-    GetTheoryTool,
-    SearchQuestionsByTopicTool
-]
-
-async def websocket_endpoint(websocket: WebSocket, conversation_id: str, db: Session = Depends(get_db)):
+from app.core.security import get_current_user_async
+from app.db.session import AsyncSessionLocal
+from app.services.llm_client import llm
+from app.services.conversation_context import ConversationContext
+from app.services.message_sink import message_sink
+from app.services.answer_cache import answer_cache, answer_cache_key, replay, CachedAnswer
+from app.services.turn_planner import plan_turn, schedule_title_generation
+
+def question_template(question_type) -> tuple[str, str]:
+    """(name, prompt template) for answering a single question of this type."""
+    if str(question_type).lower() in ['essay', 'structure']:
+        return "essay", prompts.ESSAY_QUESTION_TEMPLATE
+    # Default to MCQ/Past Paper format
+    return "past_paper", prompts.PAST_PAPER_TEMPLATE
+
+def _prompt_value(value):
+    # Enums go into the prompt as their value ("mcq"), not "QuestionType.mcq"
+    if isinstance(value, enum.Enum):
+        return value.value
+    return str(value)
+
+async def websocket_endpoint(websocket: WebSocket, conversation_id: str):
     await websocket.accept()
 
     token = websocket.query_params.get('token')
@@ -40,57 +39,61 @@ async def websocket_endpoint(websocket: WebSocket, conversation_id: str, db: Ses
         return
 
     try:
-        user = get_current_user(token=token, db=db)
-    except HTTPException:
-        await websocket.close(code=1008, reason="Authentication failed")
-        return
-
-    conversation = crud.get_conversation(db, conversation_id=conversation_id, user_id=user.id)
-    if not conversation:
+        conversation_uuid = uuid.UUID(conversation_id)
+    except ValueError:
         await websocket.close(code=1008, reason="Conversation not found")
         return
 
-    messages = crud.get_messages_by_conversation(db, conversation_id=conversation.id)
-    history = [{"role": msg.role, "parts": [msg.content]} for msg in messages]
-    chat = model.start_chat(history=history)
+    # Sessions are only held while querying: a session kept for the life of the socket
+    # would pin a pooled connection idle in transaction until the client disconnects
+    async with AsyncSessionLocal() as db:
+        try:
+            user = await get_current_user_async(token=token, db=db)
+        except HTTPException:
+            await websocket.close(code=1008, reason="Authentication failed")
+            return
+
+        conversation = await async_crud.get_conversation(db, conversation_id=conversation_uuid, user_id=user.id)
+        if not conversation:
+            await websocket.close(code=1008, reason="Conversation not found")
+            return
+
+        # Only the tail of the conversation is loaded; after that the history lives in memory
+        messages = await async_crud.get_messages_by_conversation(db, conversation_id=conversation.id, limit=settings.CONTEXT_MAX_MESSAGES)
+    context = ConversationContext(messages, token_budget=settings.CONTEXT_TOKEN_BUDGET)
+    # Arguments of the last topic search with their next page's cursor, for "show me more"
+    next_topic_search = None
+    # Only the first message of a brand new conversation gets a generated title
+    needs_title = conversation.title == "New Conversation" and len(messages) == 0
 
     try:
         while True:
             user_prompt = await websocket.receive_text()
-            # --- START: DYNAMIC TITLE GENERATION ---
-            # Check if this is the first message in a new conversation
-            is_new_conversation = conversation.title == "New Conversation" and len(history) == 0
-
-            crud.create_message(db, conversation_id=conversation.id, role="user", content=user_prompt)
-
-            if is_new_conversation:
-                # Generate a title
-                try:
-                    title_prompt = f"Based on the following user query, create a short, descriptive title (5 words or less) for the conversation. Do not use quotes or any special formatting. Just return the text of the title. User Query: \"{user_prompt}\""
-                    title_response = model.generate_content(title_prompt)
-                    new_title = title_response.text.strip().replace('"', '')
-                    crud.update_conversation_title(db, conversation_id=conversation.id, title=new_title)
-                except Exception as e:
-                    print(f"Title generation error: {str(e)}")
-                    # Continue without title generation if it fails
-            # --- END: DYNAMIC TITLE GENERATION ---
-
-            history_messages = crud.get_messages_by_conversation(db, conversation_id=conversation.id, limit=4)
-            chat_history_for_prompt = "\n".join([f"{msg.role}: {msg.content}" for msg in history_messages])
+            # Tool routing is the slowest step before the answer can start, so kick
+            # it off first and do the bookkeeping while it is in flight.
+            plan_task = asyncio.create_task(plan_turn(user_prompt))
 
-            try:
-                response = model.generate_content(user_prompt, tools=available_tools)
-                function_call = response.candidates[0].content.parts[0].function_call if response.candidates and response.candidates[0].content.parts else None
-            except Exception as e:
-                print(f"Function call generation error: {str(e)}")
-                function_call = None
+            message_sink.enqueue(conversation.id, role="user", content=user_prompt)
+
+            if needs_title:
+                schedule_title_generation(conversation.id, user_prompt)
+                needs_title = False
+
+            # The current prompt is passed to the template separately, so render the history before adding it
+            chat_history_for_prompt = context.render()
+            context.add("user", user_prompt)
+
+            plan = await plan_task
 
             retrieved_context_str = "No database context was retrieved for this query."
             template = prompts.GENERAL_CHAT_TEMPLATE
+            retrieved_data = None
+            cache_key = None
+            cached_answer = None
             
-            if function_call:
-                tool_name = function_call.name
-                tool_args = {key: value for key, value in function_call.args.items()}
+            if plan.tool_name:
+                tool_name = plan.tool_name
+                tool_args = plan.tool_args
                 
                 # *** NEW: LOGIC TO HANDLE MISSING INFORMATION ***
                 required_params = set() 
@@ -106,75 +109,105 @@ async def websocket_endpoint(websocket: WebSocket, conversation_id: str, db: Ses
                     clarification_request = f"It looks like you're asking for a question, but you're missing some details. Please provide the following: {', '.join(missing_params)}."
                     await websocket.send_text(clarification_request)
                     await websocket.send_text("[END_OF_STREAM]")
-                    crud.create_message(db, conversation_id=conversation.id, role="model", content=clarification_request)
+                    message_sink.enqueue(conversation.id, role="model", content=clarification_request)
+                    context.add("model", clarification_request)
                     continue
 
-                retrieved_data = None
-                if tool_name == 'GetPastPaperQuestionTool':
-                    retrieved_data = crud.get_past_paper_question(db, **tool_args)
-                    if retrieved_data:
-                        if retrieved_data.question_type.value in ['essay', 'structure']:
-                            template = prompts.ESSAY_QUESTION_TEMPLATE
-                        else: # Default to MCQ/Past Paper format
-                            template = prompts.PAST_PAPER_TEMPLATE
-
-                elif tool_name == 'GetModelPaperQuestionTool':
-                    retrieved_data = crud.get_model_paper_question(db, **tool_args)
-                    if retrieved_data:
-                        if retrieved_data.question_type.value in ['essay', 'structure']:
-                            template = prompts.ESSAY_QUESTION_TEMPLATE
-                        else:
-                            template = prompts.PAST_PAPER_TEMPLATE
-
-                elif tool_name == 'GetTheoryTool':
-                    retrieved_data = crud.get_theory_by_topic(**tool_args)
-                    template = prompts.THEORY_EXPLANATION_TEMPLATE
-                elif tool_name == 'SearchQuestionsByTopicTool':
-                    retrieved_data = crud.search_questions_by_topic(db, **tool_args)
-                    template = prompts.SEARCH_RESULTS_TEMPLATE
+                # Single question lookups filter on the requested question_type, so it is also
+                # the type of the row they return. Both the cache key and the live path take the
+                # template from it, so (tool, args, template, prompt) identifies the answer before the DB.
+                template_name, single_question_template = question_template(tool_args.get('question_type', ''))
+                cache_key = answer_cache_key(tool_name, tool_args, template_name, user_prompt, chat_history_for_prompt)
+                cached_answer = answer_cache.get(cache_key) if cache_key else None
+
+                if not cached_answer:
+                    if tool_name == 'GetPastPaperQuestionTool':
+                        async with AsyncSessionLocal() as db:
+                            retrieved_data = await async_crud.get_past_paper_question(db, **tool_args)
+                        if retrieved_data:
+                            template = single_question_template
+
+                    elif tool_name == 'GetModelPaperQuestionTool':
+                        async with AsyncSessionLocal() as db:
+                            retrieved_data = await async_crud.get_model_paper_question(db, **tool_args)
+                        if retrieved_data:
+                            template = single_question_template
+
+                    elif tool_name == 'GetTheoryTool':
+                        # The Weaviate client is sync, keep its network call off the event loop
+                        retrieved_data = await asyncio.to_thread(crud.get_theory_by_topic, **tool_args)
+                        template = prompts.THEORY_EXPLANATION_TEMPLATE
+                    elif tool_name == 'SearchQuestionsByTopicTool':
+                        # The router only sees this prompt: "next" continues the previous search, if any
+                        if tool_args.get('cursor') == 'next':
+                            tool_args = next_topic_search or {**tool_args, 'cursor': None}
+                        if tool_args.get('per_source_limit'):
+                            # Function-call args arrive as floats
+                            tool_args['per_source_limit'] = int(tool_args['per_source_limit'])
+                        async with AsyncSessionLocal() as db:
+                            try:
+                                retrieved_data, next_cursor = await async_crud.search_questions_by_topic(db, **tool_args)
+                            except ValueError:
+                                # A cursor the model made up: start the search over
+                                retrieved_data, next_cursor = await async_crud.search_questions_by_topic(db, **{**tool_args, 'cursor': None})
+                        next_topic_search = {**tool_args, 'cursor': next_cursor} if next_cursor else None
+                        template = prompts.SEARCH_RESULTS_TEMPLATE
                 
                 if retrieved_data:
                     context_list = retrieved_data if isinstance(retrieved_data, list) else [retrieved_data]
+                    # Search and theory results are already plain dicts, single lookups are ORM rows
                     retrieved_context_str = json.dumps([
-                        {k: v for k, v in r.__dict__.items() if not k.startswith('_')}
+                        r if isinstance(r, dict) else {k: v for k, v in r.__dict__.items() if not k.startswith('_')}
                         for r in context_list
-                    ], default=str, ensure_ascii=False)
-
-            final_prompt = template.format(
-                retrieved_context=retrieved_context_str,
-                chat_history=chat_history_for_prompt,
-                user_prompt=user_prompt
-            )
+                    ], default=_prompt_value, ensure_ascii=False)
+                    if tool_name == 'SearchQuestionsByTopicTool' and next_topic_search:
+                        retrieved_context_str += "\n(More results are available: the user can ask for more.)"
+
+            media_source = retrieved_data if retrieved_data and not isinstance(retrieved_data, list) else None
+            metadata = None
+            if cached_answer:
+                metadata = cached_answer.metadata
+                response_stream = replay(cached_answer.text)
+            else:
+                if media_source:
+                    metadata = {
+                        "question_image_url": media_source.question_image_url,
+                        "answer_image_url": media_source.answer_image_url,
+                        "youtube_link": media_source.youtube_link,
+                    }
+                final_prompt = template.format(
+                    retrieved_context=retrieved_context_str,
+                    chat_history=chat_history_for_prompt,
+                    user_prompt=user_prompt
+                )
+                response_stream = llm.stream_text(final_prompt)
             
+            generation_failed = False
             try:
-                response_stream = model.generate_content(final_prompt, stream=True)
                 full_response = ""
-                for chunk in response_stream:
-                    if chunk.text:
-                        await websocket.send_text(chunk.text)
-                        full_response += chunk.text
+                async for text in response_stream:
+                    await websocket.send_text(text)
+                    full_response += text
             except Exception as e:
                 print(f"AI generation error: {str(e)}")
                 error_message = "Sorry, I encountered an error while generating a response. Please try again."
                 await websocket.send_text(error_message)
                 full_response = error_message
+                generation_failed = True
             
             await websocket.send_text("[END_OF_STREAM]")
 
             # After streaming, send the media metadata if it exists
-            if retrieved_data:
-                metadata = {
-                    "question_image_url": retrieved_data.question_image_url,
-                    "answer_image_url": retrieved_data.answer_image_url,
-                    "youtube_link": retrieved_data.youtube_link,
-                }
+            if metadata:
                 # Send a special JSON message with the metadata
                 await websocket.send_text(json.dumps({"type": "metadata", "data": metadata}))
 
+            if cache_key and media_source and full_response and not generation_failed:
+                answer_cache.put(cache_key, CachedAnswer(question_id=media_source.id, text=full_response, metadata=metadata))
+
             if full_response:
-                crud.create_message(db, conversation_id=conversation.id, role="model", content=full_response,question_image_url=retrieved_data.question_image_url if retrieved_data else None,
-                    answer_image_url=retrieved_data.answer_image_url if retrieved_data else None,
-                    youtube_link=retrieved_data.youtube_link if retrieved_data else None)
+                context.add("model", full_response)
+                message_sink.enqueue(conversation.id, role="model", content=full_response, **(metadata or {}))
 
     except WebSocketDisconnect:
         print(f"Client {user.email} disconnected from conversation {conversation_id}")
@@ -185,4 +218,6 @@ async def websocket_endpoint(websocket: WebSocket, conversation_id: str, db: Ses
         except:
             pass
     finally:
+        context.close()
+        await message_sink.flush()
         print(f"WebSocket connection ended for user {user.email} in conversation {conversation_id}")
@@ -1,22 +1,48 @@
 import weaviate
 import os
-from pypdf import PdfReader
+import argparse
+import json
+import random
 import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from dataclasses import dataclass
+from datetime import datetime, timezone
 from weaviate.auth import AuthApiKey
+from weaviate.classes.aggregate import GroupByAggregate
 from weaviate.classes.config import Configure, Property, DataType
+from weaviate.classes.query import Filter
+from weaviate.util import generate_uuid5
 from app.core.config import settings
+from app.services.chunker import Chunker
+from app.services.document_reader import SUPPORTED_EXTENSIONS, FileDone, file_digest, iter_folder, prefetch
+from app.services.embeddings import embed_texts, is_local_model
+from app.services.ingest_manifest import IngestManifest
+from app.services.ingest_metrics import IngestMetrics
+from app.services.local_index import LocalIndexWriter
+from app.services.theory_cache import theory_cache
+
+# Chunks embedded per call wherever vectors are computed here rather than by Weaviate
+EMBED_BATCH_SIZE = 100
+# Object ids read / deleted per Weaviate request when diffing a file
+ID_PAGE_SIZE = 1000
 
 # --- Weaviate Client Setup ---
-try:
-    client = weaviate.connect_to_weaviate_cloud(
-        cluster_url=settings.WEAVIATE_URL,
-        auth_credentials=AuthApiKey(settings.WEAVIATE_API_KEY),
-        headers={"X-Goog-Api-Key": settings.GEMINI_API_KEY}
-    )
-    print("✅ Connected to Weaviate for ingestion.")
-except Exception as e:
-    print(f"❌ Could not connect to Weaviate: {e}")
-    client = None
+client = None
+
+def connect_weaviate():
+    global client
+    try:
+        client = weaviate.connect_to_weaviate_cloud(
+            cluster_url=settings.WEAVIATE_URL,
+            auth_credentials=AuthApiKey(settings.WEAVIATE_API_KEY),
+            headers={"X-Goog-Api-Key": settings.GEMINI_API_KEY}
+        )
+        print("✅ Connected to Weaviate for ingestion.")
+    except Exception as e:
+        print(f"❌ Could not connect to Weaviate: {e}")
+        client = None
 
 def setup_weaviate_schema():
     """Defines and creates the Theory collection in Weaviate."""
@@ -29,86 +55,401 @@ def setup_weaviate_schema():
         return
 
     print(f"⏳ Creating '{collection_name}' collection...")
-    client.collections.create(
-    name=collection_name,
-    vector_config=[
-        Configure.Vectors.text2vec_google(
+    if is_local_model(settings.THEORY_EMBEDDING_MODEL):
+        # Vectors come from the local model and are sent along with each object
+        vector_config = Configure.Vectors.self_provided(name="default")
+    else:
+        vector_config = Configure.Vectors.text2vec_google(
             name="default",
-            source_properties=["content", "language", "subject", "source_file"],
+            source_properties=["content", "language", "subject", "source_file", "unit", "main_heading", "sub_heading"],
             project_id=settings.GCP_PROJECT_ID,
-            
+            # Must match the model the API embeds query topics with (see vector_store)
+            model_id=settings.THEORY_EMBEDDING_MODEL,
         )
-    ],
+    client.collections.create(
+    name=collection_name,
+    vector_config=[vector_config],
     properties=[
         Property(name="content", data_type=DataType.TEXT),
         Property(name="language", data_type=DataType.TEXT),
         Property(name="subject", data_type=DataType.TEXT),
         Property(name="source_file", data_type=DataType.TEXT),
+        Property(name="chunk_index", data_type=DataType.INT),
+        Property(name="chunk_id", data_type=DataType.TEXT),
+        Property(name="unit", data_type=DataType.TEXT),
+        Property(name="main_heading", data_type=DataType.TEXT),
+        Property(name="sub_heading", data_type=DataType.TEXT),
+        Property(name="page_start", data_type=DataType.INT),
+        Property(name="page_end", data_type=DataType.INT),
+        Property(name="ingested_at", data_type=DataType.DATE),
     ]
     )
     print(f"✅ Collection '{collection_name}' created successfully.")
 
-def ingest_documents(folder_path: str, language: str, subject: str):
-    """Reads all files from a folder, chunks them, and upserts to Weaviate."""
+def read_chunks(folder_path: str, pool, workers: int, skip=None):
+    """
+    Chunks and FileDone markers for the folder, extracted in `pool` (of `workers`
+    processes) and handed over through a bounded queue.
+    """
+    chunker = Chunker(
+        max_tokens=settings.CHUNK_MAX_TOKENS,
+        overlap_tokens=settings.CHUNK_OVERLAP_TOKENS,
+        min_tokens=settings.CHUNK_MIN_TOKENS,
+    )
+    return prefetch(
+        iter_folder(folder_path, chunker, pool, max_in_flight=2 * workers, skip=skip),
+        maxsize=settings.INGEST_QUEUE_SIZE,
+    )
+
+def chunk_record(chunk) -> dict:
+    """The stored fields of a chunk, shared by Weaviate objects and local index records."""
+    return {
+        "content": chunk.content,
+        "source_file": chunk.source_file,
+        "chunk_index": chunk.chunk_index,
+        "chunk_id": chunk.chunk_id,
+        "unit": chunk.unit,
+        "main_heading": chunk.main_heading,
+        "sub_heading": chunk.sub_heading,
+        "page_start": chunk.page_start,
+        "page_end": chunk.page_end,
+    }
+
+def chunk_uuid(language: str, subject: str, chunk) -> str:
+    """
+    Content-addressed object id: re-ingesting an unchanged chunk maps to the same
+    object instead of adding a duplicate.
+    """
+    return str(generate_uuid5(f"{language.lower()}/{subject.title()}/{chunk.source_file}/{chunk.chunk_index}/{chunk.content_hash}"))
+
+def _scope_filter(language: str, subject: str, source_file: str = None):
+    scope = Filter.by_property("language").equal(language.lower()) & Filter.by_property("subject").equal(subject.title())
+    return scope & Filter.by_property("source_file").equal(source_file) if source_file is not None else scope
+
+def stored_chunk_ids(theories, language: str, subject: str, source_file: str) -> set:
+    """Ids of the objects already stored for one file."""
+    ids, offset = set(), 0
+    while True:
+        response = theories.query.fetch_objects(
+            filters=_scope_filter(language, subject, source_file),
+            limit=ID_PAGE_SIZE,
+            offset=offset,
+            return_properties=[],
+        )
+        ids.update(str(obj.uuid) for obj in response.objects)
+        if len(response.objects) < ID_PAGE_SIZE:
+            return ids
+        offset += ID_PAGE_SIZE
+
+def stored_files(theories, language: str, subject: str) -> set:
+    response = theories.aggregate.over_all(
+        filters=_scope_filter(language, subject),
+        group_by=GroupByAggregate(prop="source_file"),
+        total_count=True,
+    )
+    return {group.grouped_by.value for group in response.groups}
+
+def delete_ids(theories, ids):
+    ids = list(ids)
+    for start in range(0, len(ids), ID_PAGE_SIZE):
+        theories.data.delete_many(where=Filter.by_id().contains_any(ids[start:start + ID_PAGE_SIZE]))
+
+
+@dataclass
+class FileChanges:
+    added: int = 0
+    unchanged: int = 0
+    deleted: int = 0
+
+
+def print_report(changes: dict, removed_files: dict, dry_run: bool):
+    verb = "Would" if dry_run else "Did"
+    print(f"\n{'file':50} {'added':>7} {'unchanged':>10} {'deleted':>8}")
+    for filename, change in sorted(changes.items()):
+        print(f"{filename:50} {change.added:7} {change.unchanged:10} {change.deleted:8}")
+    for filename, count in sorted(removed_files.items()):
+        print(f"{filename + ' (removed)':50} {0:7} {0:10} {count:8}")
+    totals = FileChanges(
+        added=sum(c.added for c in changes.values()),
+        unchanged=sum(c.unchanged for c in changes.values()),
+        deleted=sum(c.deleted for c in changes.values()) + sum(removed_files.values()),
+    )
+    print(f"{verb} add {totals.added}, keep {totals.unchanged} and delete {totals.deleted} objects.")
+
+def backoff_delay(attempt: int) -> float:
+    """Exponential backoff with jitter: ~base, 2*base, 4*base, ... capped at a minute."""
+    delay = min(settings.INGEST_RETRY_BASE_SECONDS * 2 ** (attempt - 1), 60)
+    return delay * random.uniform(0.8, 1.2)
+
+def with_backoff(fn, *args, **kwargs):
+    """Calls fn, retrying failures (e.g. rate limits) up to INGEST_MAX_RETRIES times."""
+    for attempt in range(1, settings.INGEST_MAX_RETRIES + 2):
+        try:
+            return fn(*args, **kwargs)
+        except Exception as e:
+            if attempt > settings.INGEST_MAX_RETRIES:
+                raise
+            delay = backoff_delay(attempt)
+            print(f"   - ⏳ {e}; retrying in {delay:.1f}s (attempt {attempt}/{settings.INGEST_MAX_RETRIES})")
+            time.sleep(delay)
+
+def retry_failed_objects(theories, failed: list, metrics: IngestMetrics) -> list:
+    """
+    Re-sends objects the batch reported as failed, backing off exponentially
+    between rounds. Safe to repeat since object ids are deterministic. Returns the
+    objects that still failed after INGEST_MAX_RETRIES rounds.
+    """
+    for attempt in range(1, settings.INGEST_MAX_RETRIES + 1):
+        if not failed:
+            break
+        delay = backoff_delay(attempt)
+        print(f"⏳ Retrying {len(failed)} failed objects in {delay:.1f}s (attempt {attempt}/{settings.INGEST_MAX_RETRIES})")
+        time.sleep(delay)
+        with theories.batch.dynamic() as batch:
+            for error in failed:
+                batch.add_object(properties=error.object_.properties, uuid=error.object_.uuid, vector=error.object_.vector)
+        metrics.retried += len(failed)
+        failed = list(theories.batch.failed_objects)
+    return failed
+
+def write_dead_letters(failed: list):
+    """Appends objects that never made it to INGEST_DEAD_LETTER_PATH, one JSON object per line."""
+    if not failed:
+        return
+    directory = os.path.dirname(settings.INGEST_DEAD_LETTER_PATH)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    failed_at = datetime.now(timezone.utc).isoformat()
+    with open(settings.INGEST_DEAD_LETTER_PATH, "a", encoding="utf-8") as f:
+        for error in failed:
+            f.write(json.dumps({
+                "uuid": str(error.object_.uuid),
+                "error": error.message,
+                "failed_at": failed_at,
+                "properties": error.object_.properties,
+            }, ensure_ascii=False, default=str) + "\n")
+    print(f"⚠️ WARNING: {len(failed)} objects failed to import after retries; written to {settings.INGEST_DEAD_LETTER_PATH}.")
+
+def ingest_documents(folder_path: str, language: str, subject: str, pool, workers: int, manifest: IngestManifest,
+                     force: bool = False, dry_run: bool = False):
+    """
+    Reads all files from a folder, chunks them, and syncs them to Weaviate.
+
+    Only files that changed since the last run are read. For each of them, chunks
+    whose deterministic id is already stored are left alone, new ones are added,
+    and stored chunks that no longer exist are deleted afterwards. Files removed
+    from the folder have all their chunks deleted. With dry_run nothing is
+    written; the same diff is only reported.
+    """
     if not client:
         return
         
     theories = client.collections.get("Theory")
+    manifest_key = lambda filename: IngestManifest.key("weaviate", language, subject, filename)
+    skip = None if force else (lambda filename, digest: manifest.is_current(manifest_key(filename), digest))
+    ingested_at = datetime.now(timezone.utc)
+    metrics = IngestMetrics("weaviate")
+    failed = None
+    completed = []
+    changes = {}
+    stale_ids = {}
+    # Diff state of the file currently streaming through
+    current = {"file": None, "existing": set(), "seen": set()}
+    # Weaviate can't run a local model, so its vectors are computed here, a batch at a time
+    client_vectors = is_local_model(settings.THEORY_EMBEDDING_MODEL)
+    pending = []
+
+    def start_file(source_file: str):
+        current.update(file=source_file, existing=stored_chunk_ids(theories, language, subject, source_file), seen=set())
+        changes[source_file] = FileChanges()
+
+    def flush(batch):
+        if not pending:
+            return
+        started = time.perf_counter()
+        vectors = with_backoff(
+            embed_texts, [properties["content"] for properties, _ in pending],
+            settings.THEORY_EMBEDDING_MODEL, "retrieval_document",
+        )
+        metrics.record_embed(time.perf_counter() - started)
+        for (properties, object_id), vector in zip(pending, vectors):
+            batch.add_object(properties=properties, uuid=object_id, vector={"default": vector})
+            metrics.record(properties["content"])
+        pending.clear()
     
-    with theories.batch.dynamic() as batch:
-        for filename in os.listdir(folder_path):
-            file_path = os.path.join(folder_path, filename)
-            text_content = ""
-            
-            print(f"-> Processing file: {filename}")
-            if filename.lower().endswith(".pdf"):
-                try:
-                    with open(file_path, 'rb') as f:
-                        reader = PdfReader(f)
-                        for page in reader.pages:
-                            text_content += page.extract_text() + "\n"
-                except Exception as e:
-                    print(f"   - ❌ Error reading PDF {filename}: {e}")
+    try:
+        with (nullcontext() if dry_run else theories.batch.dynamic()) as batch:
+            for item in read_chunks(folder_path, pool, workers, skip):
+                if current["file"] != item.source_file:
+                    start_file(item.source_file)
+                if isinstance(item, FileDone):
+                    if not dry_run:
+                        # Send the file's remaining chunks before it can be checkpointed
+                        flush(batch)
+                    stale_ids[item.source_file] = current["existing"] - current["seen"]
+                    changes[item.source_file].deleted = len(stale_ids[item.source_file])
+                    completed.append(item)
+                    current["file"] = None
                     continue
-            elif filename.lower().endswith(".txt"):
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    text_content = f.read()
-            else:
-                print(f"   - Skipping unsupported file: {filename}")
-                continue
 
-            chunks = [chunk for chunk in text_content.split('\n\n') if len(chunk.strip()) > 50]
-            print(f"   - Found {len(chunks)} chunks.")
-
-            for chunk in chunks:
-                properties = {
-                    "content": chunk.strip(),
-                    "language": language.lower(),
-                    "subject": subject.title(),
-                    "source_file": filename,
-                }
-                batch.add_object(properties=properties)
+                object_id = chunk_uuid(language, subject, item)
+                current["seen"].add(object_id)
+                if object_id in current["existing"]:
+                    changes[item.source_file].unchanged += 1
+                    continue
+                changes[item.source_file].added += 1
+                if not dry_run:
+                    properties = {
+                        **chunk_record(item),
+                        "language": language.lower(),
+                        "subject": subject.title(),
+                        "ingested_at": ingested_at,
+                    }
+                    if client_vectors:
+                        pending.append((properties, object_id))
+                        if len(pending) >= EMBED_BATCH_SIZE:
+                            flush(batch)
+                    else:
+                        batch.add_object(properties=properties, uuid=object_id)
+                        metrics.record(item.content)
+            if not dry_run:
+                flush(batch)
+        if not dry_run:
+            failed = retry_failed_objects(theories, list(theories.batch.failed_objects), metrics)
+    finally:
+        if not dry_run:
+            if failed is None:
+                # Interrupted before the retry stage
+                failed = list(theories.batch.failed_objects)
+            metrics.failed = len(failed)
+            write_dead_letters(failed)
+            # Checkpoint every fully sent file, even if the run was interrupted, so the
+            # next run resumes after it. Files with objects that still failed keep their
+            # old chunks and are read again next time.
+            failed_files = {obj.object_.properties.get("source_file") for obj in failed}
+            for item in completed:
+                if item.source_file not in failed_files:
+                    delete_ids(theories, stale_ids[item.source_file])
+                    manifest.mark(manifest_key(item.source_file), item.digest)
+            manifest.save()
+
+    folder_files = {name for name in os.listdir(folder_path) if name.lower().endswith(SUPPORTED_EXTENSIONS)}
+    removed_files = {}
+    for filename in stored_files(theories, language, subject) - folder_files:
+        removed_files[filename] = len(stored_chunk_ids(theories, language, subject, filename))
+        if not dry_run:
+            theories.data.delete_many(where=_scope_filter(language, subject, filename))
+            manifest.forget(manifest_key(filename))
+    if removed_files and not dry_run:
+        manifest.save()
+
+    print_report(changes, removed_files, dry_run)
+    if dry_run:
+        return
     
+    metrics.summary()
     print(f"\n✅ Finished ingestion for {folder_path}.")
-    if len(theories.batch.failed_objects) > 0:
-        print(f"⚠️ WARNING: {len(theories.batch.failed_objects)} objects failed to import.")
+    # Cached search results in this process are stale now. API workers notice the
+    # changed collection within THEORY_CACHE_CHECK_SECONDS and drop theirs.
+    theory_cache.invalidate()
 
 
-if __name__ == "__main__":
-    if len(sys.argv) != 4:
-        print("Usage: python ingest_theories.py <folder_path> <language> <subject>")
-        sys.exit(1)
+def build_local_index(folder_path: str, language: str, subject: str, pool, workers: int, manifest: IngestManifest,
+                      force: bool = False, dry_run: bool = False):
+    """
+    Embeds every chunk of the folder and writes the (language, subject) segment of
+    the local theory index in THEORY_INDEX_DIR, replacing the previous build.
+    Skipped when no file in the folder changed since the last build.
+    """
+    model = settings.THEORY_EMBEDDING_MODEL
+    if not model:
+        print("❌ THEORY_EMBEDDING_MODEL must be set to build the local index.")
+        return
+
+    prefix = IngestManifest.key("local", language, subject, "")
+    current = {
+        prefix + filename: file_digest(os.path.join(folder_path, filename))
+        for filename in os.listdir(folder_path)
+        if filename.lower().endswith(SUPPORTED_EXTENSIONS)
+    }
+    previous = manifest.entries(prefix)
+    if not force and current == previous:
+        print(f"✅ Local index for {folder_path} is up to date.")
+        return
+    if dry_run:
+        changed = sorted(key[len(prefix):] for key in current.keys() | previous.keys() if current.get(key) != previous.get(key))
+        print(f"Would rebuild the local index segment for {folder_path}; changed files: {', '.join(changed) or 'none (forced)'}")
+        return
 
-    folder_path = sys.argv[1]
-    language = sys.argv[2]
-    subject = sys.argv[3]
+    writer = LocalIndexWriter(settings.THEORY_INDEX_DIR, language, subject, model)
+    metrics = IngestMetrics("local")
+    pending = []
+    completed = []
+
+    def flush():
+        started = time.perf_counter()
+        vectors = with_backoff(embed_texts, [record["content"] for record in pending], model, "retrieval_document")
+        metrics.record_embed(time.perf_counter() - started)
+        writer.add(vectors, pending)
+        for record in pending:
+            metrics.record(record["content"])
+        pending.clear()
+
+    try:
+        for item in read_chunks(folder_path, pool, workers):
+            if isinstance(item, FileDone):
+                completed.append(item)
+                continue
+            pending.append(chunk_record(item))
+            if len(pending) >= EMBED_BATCH_SIZE:
+                flush()
+        if pending:
+            flush()
+    except BaseException:
+        writer.abort()
+        raise
+    writer.commit()
 
-    if not os.path.isdir(folder_path):
-        print(f"❌ Error: Folder not found at '{folder_path}'")
+    # A segment is rebuilt as a whole, so it is only checkpointed once complete
+    for key in manifest.entries(prefix):
+        manifest.forget(key)
+    for item in completed:
+        manifest.mark(prefix + item.source_file, item.digest)
+    manifest.save()
+    metrics.summary()
+    print(f"\n✅ Wrote {writer.count} chunks to the local index at {writer.path}.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Chunk a folder of theory documents and index it for retrieval.")
+    parser.add_argument("folder_path")
+    parser.add_argument("language")
+    parser.add_argument("subject")
+    parser.add_argument(
+        "--target", choices=["weaviate", "local", "both"], default=settings.THEORY_BACKEND,
+        help="Where to index the chunks (default: THEORY_BACKEND)",
+    )
+    parser.add_argument("--workers", type=int, default=settings.INGEST_WORKERS or os.cpu_count(), help="PDF extraction processes")
+    parser.add_argument("--force", action="store_true", help="Re-ingest files even if unchanged since the last run")
+    parser.add_argument("--dry-run", action="store_true", help="Report what would be added, kept and deleted without writing")
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.folder_path):
+        print(f"❌ Error: Folder not found at '{args.folder_path}'")
         sys.exit(1)
 
-    if client:
-        setup_weaviate_schema()
-        ingest_documents(folder_path, language, subject)
-        client.close()
-        print("✅ Weaviate client connection closed.")
\ No newline at end of file
+    manifest = IngestManifest(settings.INGEST_MANIFEST_PATH)
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        if args.target in ("local", "both"):
+            build_local_index(args.folder_path, args.language, args.subject, pool, args.workers, manifest, args.force, args.dry_run)
+
+        if args.target in ("weaviate", "both"):
+            connect_weaviate()
+            if client and args.dry_run and not client.collections.exists("Theory"):
+                print("Collection 'Theory' doesn't exist yet; every chunk would be added.")
+            elif client:
+                if not args.dry_run:
+                    setup_weaviate_schema()
+                ingest_documents(args.folder_path, args.language, args.subject, pool, args.workers, manifest, args.force, args.dry_run)
+                client.close()
+                print("✅ Weaviate client connection closed.")
@@ -0,0 +1,196 @@
+"""
+Latency benchmark for the RAG lookup paths and their indexes.
+
+Seeds a synthetic question bank (N years of past papers, model papers and
+chat history) inside a single transaction, then times the crud lookups the
+chat WebSocket uses, first with the lookup indexes dropped and then with them
+created. Everything, including the index changes, is rolled back at the end.
+
+DROP/CREATE INDEX take exclusive locks on the tables while the transaction is
+open, so run this against a development database, not production.
+
+Usage:
+    python -m scripts.bench_rag_lookups [--years 20] [--subjects 3]
+        [--model-papers 10] [--conversations 200] [--messages 100] [--lookups 2000]
+"""
+import argparse
+import random
+import statistics
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert, text
+
+from app.crud import crud
+from app.db.session import SessionLocal
+from app.models import models
+from app.models.models import QuestionType
+
+# Same definitions as alembic revision b3d51f0a7c2e
+INDEXES = {
+    "ix_sources_past_papers_lookup": "ON sources.past_papers (subject_id, year, question_type, question_number)",
+    "ix_sources_model_papers_lookup": "ON sources.model_papers (subject_id, paper_name, question_type, question_number)",
+    "ix_messages_conversation_id_created_at": "ON messages (conversation_id, created_at)",
+    "ix_sources_subjects_name_lower": "ON sources.subjects (lower(name))",
+}
+INDEX_SCHEMAS = {
+    "ix_sources_past_papers_lookup": "sources",
+    "ix_sources_model_papers_lookup": "sources",
+    "ix_messages_conversation_id_created_at": "public",
+    "ix_sources_subjects_name_lower": "sources",
+}
+# Questions per paper, roughly the A/L layout
+PAPER_LAYOUT = {QuestionType.mcq: 50, QuestionType.structure: 6, QuestionType.essay: 6}
+TABLES = ["sources.subjects", "sources.past_papers", "sources.model_papers", "conversations", "messages"]
+
+
+def question_rows(subject_id: uuid.UUID, **paper_key) -> list[dict]:
+    rows = []
+    for question_type, count in PAPER_LAYOUT.items():
+        for number in range(1, count + 1):
+            rows.append({
+                "subject_id": subject_id,
+                "question_type": question_type,
+                "question_number": number,
+                "question_unit": f"Unit {number % 12 + 1}",
+                "question_data": {"question": f"Synthetic {question_type.value} question {number}", "options": ["A", "B", "C", "D", "E"]},
+                "answer_data": {"answer": "A", "explanation": "Synthetic explanation " * 20},
+                "relevant_theory": "Synthetic theory text " * 30,
+                **paper_key,
+            })
+    return rows
+
+
+def seed(db, args) -> dict:
+    run_id = uuid.uuid4().hex[:8]
+    subjects = [f"Bench Subject {run_id} {i}" for i in range(args.subjects)]
+    subject_ids = {}
+    for name in subjects:
+        subject_ids[name] = db.execute(insert(models.Subject).values(name=name).returning(models.Subject.id)).scalar_one()
+
+    this_year = datetime.utcnow().year
+    years = list(range(this_year - args.years, this_year))
+    paper_names = [f"Model Paper {i}" for i in range(args.model_papers)]
+    for subject_id in subject_ids.values():
+        for year in years:
+            db.execute(insert(models.PastPaperQuestion), question_rows(subject_id, year=year))
+        for paper_name in paper_names:
+            db.execute(insert(models.ModelPaperQuestion), question_rows(subject_id, paper_name=paper_name))
+
+    user_id = db.execute(insert(models.User).values(
+        google_id=f"bench-{run_id}", email=f"bench-{run_id}@example.com", full_name="Benchmark"
+    ).returning(models.User.id)).scalar_one()
+    conversation_ids = []
+    start = datetime.utcnow() - timedelta(days=365)
+    for c in range(args.conversations):
+        conversation_id = db.execute(insert(models.Conversation).values(
+            user_id=user_id, title=f"Bench {c}"
+        ).returning(models.Conversation.id)).scalar_one()
+        conversation_ids.append(conversation_id)
+        db.execute(insert(models.Message), [
+            {
+                "conversation_id": conversation_id,
+                "role": "user" if m % 2 == 0 else "model",
+                "content": f"Synthetic message {m}",
+                "created_at": start + timedelta(minutes=c * args.messages + m),
+            }
+            for m in range(args.messages)
+        ])
+
+    return {"subjects": subjects, "years": years, "paper_names": paper_names, "conversation_ids": conversation_ids}
+
+
+def analyze(db):
+    for table in TABLES:
+        db.execute(text(f"ANALYZE {table}"))
+
+
+def drop_indexes(db):
+    for name, schema in INDEX_SCHEMAS.items():
+        db.execute(text(f"DROP INDEX IF EXISTS {schema}.{name}"))
+    analyze(db)
+
+
+def create_indexes(db):
+    for name, definition in INDEXES.items():
+        db.execute(text(f"CREATE INDEX IF NOT EXISTS {name} {definition}"))
+    analyze(db)
+
+
+def timed(fn, n: int) -> list[float]:
+    samples = []
+    for _ in range(n):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return samples
+
+
+def run_lookups(db, bank: dict, n: int) -> dict[str, list[float]]:
+    rng = random.Random(42)
+
+    def random_type_and_number():
+        question_type = rng.choice(list(PAPER_LAYOUT))
+        return question_type.value, rng.randint(1, PAPER_LAYOUT[question_type])
+
+    def past_paper():
+        question_type, number = random_type_and_number()
+        crud.get_past_paper_question(db, rng.choice(bank["subjects"]).lower(), rng.choice(bank["years"]), question_type, number)
+
+    def model_paper():
+        question_type, number = random_type_and_number()
+        crud.get_model_paper_question(db, rng.choice(bank["subjects"]).upper(), rng.choice(bank["paper_names"]), question_type, number)
+
+    def history():
+        crud.get_messages_by_conversation(db, rng.choice(bank["conversation_ids"]), limit=4)
+
+    def subject():
+        crud.get_subject_by_name(db, rng.choice(bank["subjects"]).lower())
+
+    return {
+        "get_past_paper_question": timed(past_paper, n),
+        "get_model_paper_question": timed(model_paper, n),
+        "get_messages_by_conversation(limit=4)": timed(history, n),
+        "get_subject_by_name": timed(subject, n),
+    }
+
+
+def percentile(samples: list[float], p: int) -> float:
+    return statistics.quantiles(samples, n=100)[p - 1]
+
+
+def main(args):
+    db = SessionLocal()
+    try:
+        print("Seeding synthetic question bank...")
+        t0 = time.perf_counter()
+        bank = seed(db, args)
+        print(f"Seeded in {time.perf_counter() - t0:.1f}s")
+
+        drop_indexes(db)
+        before = run_lookups(db, bank, args.lookups)
+        create_indexes(db)
+        after = run_lookups(db, bank, args.lookups)
+
+        print(f"\n{'lookup':40} {'before p50':>11} {'before p99':>11} {'after p50':>10} {'after p99':>10}  (ms)")
+        for name in before:
+            print(
+                f"{name:40} {percentile(before[name], 50):11.3f} {percentile(before[name], 99):11.3f} "
+                f"{percentile(after[name], 50):10.3f} {percentile(after[name], 99):10.3f}"
+            )
+    finally:
+        # Drops the synthetic rows and restores the original index set
+        db.rollback()
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--years", type=int, default=20, help="Years of past papers per subject")
+    parser.add_argument("--subjects", type=int, default=3)
+    parser.add_argument("--model-papers", type=int, default=10, help="Model papers per subject")
+    parser.add_argument("--conversations", type=int, default=200)
+    parser.add_argument("--messages", type=int, default=100, help="Messages per conversation")
+    parser.add_argument("--lookups", type=int, default=2000, help="Timed calls per lookup and phase")
+    main(parser.parse_args())
@@ -0,0 +1,106 @@
+"""
+Concurrent WebSocket load test for the chat endpoint.
+
+Opens N sockets against a running server, sends one prompt on each at the same
+moment and records when every chunk arrives. If the event loop is blocked by a
+generation, the streams are served one after another and "max concurrently
+streaming" stays at 1; with non-blocking LLM calls the streams overlap.
+
+Usage:
+    python scripts/ws_load_test.py --token <access_token> [--sockets 10]
+        [--base-url http://localhost:8000] [--prompt "Explain Newton's second law"]
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+import httpx
+import websockets
+
+END_OF_STREAM = "[END_OF_STREAM]"
+
+
+async def create_conversation(client: httpx.AsyncClient, token: str) -> str:
+    response = await client.post("/conversations/", headers={"Authorization": f"Bearer {token}"})
+    response.raise_for_status()
+    return response.json()["id"]
+
+
+async def run_socket(ws_url: str, prompt: str, start: asyncio.Event) -> dict:
+    chunk_times = []
+    async with websockets.connect(ws_url, max_size=None) as ws:
+        await start.wait()
+        sent_at = time.perf_counter()
+        await ws.send(prompt)
+        while True:
+            message = await ws.recv()
+            if message == END_OF_STREAM:
+                break
+            chunk_times.append(time.perf_counter())
+        # Drain the optional metadata frame so the server isn't left mid-send
+        try:
+            extra = await asyncio.wait_for(ws.recv(), timeout=0.5)
+            json.loads(extra)
+        except (asyncio.TimeoutError, ValueError, websockets.ConnectionClosed):
+            pass
+    return {"sent_at": sent_at, "chunk_times": chunk_times}
+
+
+def max_overlap(intervals: list[tuple[float, float]]) -> int:
+    events = []
+    for begin, end in intervals:
+        events.append((begin, 1))
+        events.append((end, -1))
+    active = peak = 0
+    for _, delta in sorted(events):
+        active += delta
+        peak = max(peak, active)
+    return peak
+
+
+async def main(args):
+    ws_base = args.base_url.replace("http://", "ws://").replace("https://", "wss://")
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=30) as client:
+        conversation_ids = await asyncio.gather(*[create_conversation(client, args.token) for _ in range(args.sockets)])
+
+    start = asyncio.Event()
+    tasks = [
+        asyncio.create_task(run_socket(f"{ws_base}/ws/{cid}?token={args.token}", args.prompt, start))
+        for cid in conversation_ids
+    ]
+    # Give every socket time to finish its handshake before firing the prompts together
+    await asyncio.sleep(1)
+    t0 = time.perf_counter()
+    start.set()
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    wall = time.perf_counter() - t0
+
+    ok = [r for r in results if isinstance(r, dict) and r["chunk_times"]]
+    failed = len(results) - len(ok)
+    if not ok:
+        print(f"All {len(results)} sockets failed: {results[:3]}")
+        return
+
+    ttft = [r["chunk_times"][0] - r["sent_at"] for r in ok]
+    durations = [r["chunk_times"][-1] - r["sent_at"] for r in ok]
+    streaming = [(r["chunk_times"][0], r["chunk_times"][-1]) for r in ok]
+    peak = max_overlap(streaming)
+
+    print(f"sockets: {len(ok)} ok, {failed} failed, wall time {wall:.2f}s")
+    print(f"time to first token: p50 {statistics.median(ttft):.2f}s  max {max(ttft):.2f}s")
+    print(f"stream duration:     p50 {statistics.median(durations):.2f}s  max {max(durations):.2f}s")
+    print(f"sum of stream durations {sum(durations):.2f}s vs wall time {wall:.2f}s")
+    print(f"max concurrently streaming sockets: {peak}")
+    if peak <= 1 and len(ok) > 1:
+        print("Streams were serialized: something is blocking the event loop.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--token", required=True, help="Access token of an existing user")
+    parser.add_argument("--sockets", type=int, default=10)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--prompt", default="Explain Newton's second law of motion with an example.")
+    asyncio.run(main(parser.parse_args()))
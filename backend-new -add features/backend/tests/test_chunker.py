@@ -0,0 +1,80 @@
+import pytest
+
+from app.services.chunker import Chunker, estimate_tokens, split_sentences
+
+
+def _sentences(text):
+    return [text[start:end] for start, end in split_sentences(text)]
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("The body moves at 10 m. It then stops.", ["The body moves at 10 m.", "It then stops."]),
+    ("We saw it. Next one is here.", ["We saw it.", "Next one is here."]),
+    ("See Dr. Smith and J. Doe. Done.", ["See Dr. Smith and J. Doe.", "Done."]),
+    ("e.g. this works. Fig. 3 shows it.", ["e.g. this works.", "Fig. 3 shows it."]),
+    ("க.பொ.த. உயர்தரம். அடுத்து கி. மு. பின்னர் வரும்.", ["க.பொ.த. உயர்தரம்.", "அடுத்து கி. மு. பின்னர் வரும்."]),
+    ("Is it? Yes! Value is 9.8 here.", ["Is it?", "Yes!", "Value is 9.8 here."]),
+])
+def test_split_sentences(text, expected):
+    assert _sentences(text) == expected
+
+
+def test_tamil_costs_more_tokens_per_character():
+    assert estimate_tokens("அ" * 40) > estimate_tokens("a" * 40)
+
+
+def test_overlap_must_be_smaller_than_max():
+    with pytest.raises(ValueError):
+        Chunker(max_tokens=50, overlap_tokens=50)
+
+
+@pytest.mark.parametrize("line, after_break, last_main, expected", [
+    ("அத்தியாயம் 3: இயக்க வரைபுகள்", False, None, "unit"),
+    ("அத்தியாயம் 4: வேலை (பக்கம் 35)", True, None, None),
+    ("1.4.2 காவிப் பிரிப்பு", False, None, "sub"),
+    ("1.1 Introduction", True, None, "main"),
+    # A wrapped prose line that happens to start with a decimal
+    ("9.8 m s-2 near the surface", False, (4, 1), None),
+    # Straight after a running page header, but the next section number
+    ("4.2 Projectiles", False, (4, 1), "main"),
+    ("5.1 Force", False, (4, 2), "main"),
+    ("Uses of dimensional analysis:", True, None, "sub"),
+    ("the wrapped end of a sentence:", False, None, None),
+])
+def test_heading_level(line, after_break, last_main, expected):
+    assert Chunker._heading_level(line, after_break, last_main) == expected
+
+
+def _page(sentence_count, heading="1.1 Motion"):
+    body = " ".join(f"Sentence number {n} describes the motion of a body in some detail." for n in range(sentence_count))
+    return f"{heading}\n{body}"
+
+
+def test_chunks_respect_max_tokens_and_overlap():
+    chunker = Chunker(max_tokens=80, overlap_tokens=20, min_tokens=10)
+    chunks = list(chunker.chunk("physics.pdf", [(1, _page(30))]))
+    assert len(chunks) > 1
+    assert all(estimate_tokens(chunk.content) <= 80 + len(chunk.content.split(". ")) for chunk in chunks)
+    for previous, current in zip(chunks, chunks[1:]):
+        # The next chunk repeats the previous chunk's last sentence
+        last_sentence = previous.content.rsplit(". ", 1)[-1]
+        assert current.content.startswith(last_sentence)
+    assert [chunk.chunk_index for chunk in chunks] == list(range(len(chunks)))
+
+
+def test_chunks_never_span_sections():
+    chunker = Chunker(max_tokens=400, overlap_tokens=60)
+    pages = [(1, _page(3, "1.1 Motion")), (2, _page(3, "1.2 Force"))]
+    chunks = list(chunker.chunk("physics.pdf", pages))
+    assert [(chunk.main_heading, chunk.page_start, chunk.page_end) for chunk in chunks] == [
+        ("1.1 Motion", 1, 1),
+        ("1.2 Force", 2, 2),
+    ]
+
+
+def test_chunk_ids_are_stable_across_index_shifts():
+    chunker = Chunker()
+    before = list(chunker.chunk("physics.pdf", [(1, _page(3, "1.2 Force"))]))
+    after = list(chunker.chunk("physics.pdf", [(1, _page(3, "1.1 Motion")), (2, _page(3, "1.2 Force"))]))
+    assert before[0].chunk_id == after[-1].chunk_id
+    assert before[0].chunk_index != after[-1].chunk_index
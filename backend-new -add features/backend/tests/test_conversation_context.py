@@ -0,0 +1,77 @@
+import asyncio
+from types import SimpleNamespace
+
+from app.services import conversation_context
+from app.services.conversation_context import ConversationContext, estimate_tokens
+
+
+def _message(role, content):
+    return SimpleNamespace(role=role, content=content)
+
+
+def _line(n):
+    # 40 characters: 11 tokens each
+    return f"line {n:02d} ".ljust(40, ".")
+
+
+class FakeLLM:
+    def __init__(self, failures=0):
+        self.failures = failures
+        self.prompts = []
+
+    async def generate(self, prompt):
+        self.prompts.append(prompt)
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError("quota exceeded")
+        return SimpleNamespace(text=f"summary {len(self.prompts)}")
+
+
+def test_seeding_keeps_only_the_newest_turns_without_summarising():
+    messages = [_message("user", _line(n)) for n in range(10)]
+    context = ConversationContext(messages, token_budget=3 * estimate_tokens(_line(0)))
+    assert context.render().splitlines() == [f"user: {_line(n)}" for n in (7, 8, 9)]
+    assert not context._pending and context._summary_task is None
+
+
+def test_min_recent_is_kept_over_the_budget():
+    context = ConversationContext([_message("user", "x" * 400), _message("assistant", "y" * 400)], token_budget=10)
+    assert len(context.render().splitlines()) == 2
+
+
+def test_evicted_turns_are_summarised(monkeypatch):
+    llm = FakeLLM()
+    monkeypatch.setattr(conversation_context, "llm", llm)
+
+    async def run():
+        context = ConversationContext([], token_budget=3 * estimate_tokens(_line(0)))
+        for n in range(4):
+            context.add("user", _line(n))
+        # Until the summary lands the evicted turn is still in the history
+        assert context.render().splitlines()[0] == f"user: {_line(0)}"
+        await context._summary_task
+        return context
+
+    context = asyncio.run(run())
+    assert _line(0) in llm.prompts[0]
+    assert context.render().splitlines() == ["Summary of the earlier conversation: summary 1"] + \
+        [f"user: {_line(n)}" for n in (1, 2, 3)]
+
+
+def test_pending_turns_stay_bounded_while_the_llm_fails(monkeypatch):
+    llm = FakeLLM(failures=100)
+    monkeypatch.setattr(conversation_context, "llm", llm)
+    budget = 3 * estimate_tokens(_line(0))
+
+    async def run():
+        context = ConversationContext([], token_budget=budget)
+        for n in range(20):
+            context.add("user", _line(n))
+        await asyncio.sleep(0)
+        assert context._pending_tokens <= budget
+        assert [content for _, content in context._pending] == [_line(n) for n in (14, 15, 16)]
+        context.close()
+        await asyncio.sleep(0)
+        assert context._summary_task.cancelled()
+
+    asyncio.run(run())
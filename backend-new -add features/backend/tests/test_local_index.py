@@ -0,0 +1,60 @@
+import numpy as np
+
+from app.services.local_index import Bm25Index, LocalIndex, LocalIndexWriter, tokenize
+from app.services.vector_store import reciprocal_rank_fusion
+
+
+def test_tokenize_keeps_tamil_words_whole():
+    assert tokenize("உராய்வு விசை, Friction!") == ["உராய்வு", "விசை", "friction"]
+
+
+def test_bm25_ranks_rarer_and_denser_matches_first():
+    index = Bm25Index([
+        "friction opposes motion",
+        "motion of a body",
+        "friction friction friction and heat",
+        "heat capacity",
+    ])
+    rows = [row for _, row in index.search("friction", k=10)]
+    assert rows == [2, 0]
+    # A term found in every document scores nothing useful but doesn't break ranking
+    assert [row for _, row in index.search("friction heat", k=1)] == [2]
+
+
+def test_bm25_unknown_terms_and_empty_index():
+    assert Bm25Index(["a b c"]).search("zzz", k=5) == []
+    assert Bm25Index([]).search("anything", k=5) == []
+
+
+def test_reciprocal_rank_fusion_merges_duplicates():
+    a = {"source_file": "f", "chunk_index": 1, "content": "a", "distance": 0.1}
+    b = {"source_file": "f", "chunk_index": 2, "content": "b", "distance": 0.2}
+    c = {"source_file": "f", "chunk_index": 3, "content": "c"}
+    fused = reciprocal_rank_fusion([[a, b], [c, b]], k=60)
+    assert [result["chunk_index"] for result in fused] == [2, 1, 3]
+    assert fused[0]["score"] == 1 / 62 + 1 / 62
+    # Fields of the first occurrence win; lexical-only hits get a null distance
+    assert fused[0]["distance"] == 0.2 and fused[2]["distance"] is None
+
+
+def test_written_segment_is_searchable(tmp_path):
+    writer = LocalIndexWriter(str(tmp_path), "tamil", "physics", model="test-model")
+    writer.add([[1, 0], [0, 2], [1, 1]], [{"content": "east"}, {"content": "north"}, {"content": "north east"}])
+    writer.commit()
+
+    segment = LocalIndex(str(tmp_path)).segment("Tamil", "Physics")
+    results = segment.search(np.array([0, 1.0]), k=2)
+    assert [record["content"] for _, record in results] == ["north", "north east"]
+    assert abs(results[0][0]) < 1e-6
+    assert [record["content"] for _, record in segment.lexical_search("east", k=5)] == ["east", "north east"]
+
+
+def test_rebuild_changes_generation(tmp_path):
+    index = LocalIndex(str(tmp_path))
+    for content in ("first", "second"):
+        writer = LocalIndexWriter(str(tmp_path), "tamil", "physics", model="test-model")
+        writer.add([[1, 0]], [{"content": content}])
+        writer.commit()
+        generation = index.generation()
+        assert index.segment("tamil", "physics").record(0)["content"] == content
+    assert generation == index.generation()
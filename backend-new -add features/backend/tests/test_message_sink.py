@@ -0,0 +1,126 @@
+import asyncio
+import uuid
+
+import pytest
+from sqlalchemy.exc import IntegrityError, OperationalError
+
+from app.services.message_sink import MessageSink
+
+DELETED = uuid.uuid4()
+
+
+class FakeDatabase:
+    """Stands in for MessageSink._write: one call is one transaction."""
+    def __init__(self, transient_failures=0):
+        self.transient_failures = transient_failures
+        self.rows = []
+        self.calls = []
+
+    async def write(self, rows):
+        self.calls.append(len(rows))
+        if self.transient_failures:
+            self.transient_failures -= 1
+            raise OperationalError("INSERT", {}, Exception("connection lost"))
+        if any(row["conversation_id"] == DELETED for row in rows):
+            raise IntegrityError("INSERT", {}, Exception("foreign key violation"))
+        self.rows.extend(rows)
+
+
+def _sink(monkeypatch, database, max_batch=10):
+    sink = MessageSink(flush_interval=1.0, max_batch=max_batch, max_retry_delay=4.0)
+    monkeypatch.setattr(sink, "_write", database.write)
+    return sink
+
+
+def _row(conversation_id, content):
+    return {"conversation_id": conversation_id, "role": "user", "content": content}
+
+
+def test_flush_writes_in_order_and_in_batches(monkeypatch):
+    database = FakeDatabase()
+    sink = _sink(monkeypatch, database, max_batch=2)
+    conversation = uuid.uuid4()
+    sink._queue.extend(_row(conversation, str(n)) for n in range(5))
+    asyncio.run(sink.flush())
+    assert [row["content"] for row in database.rows] == ["0", "1", "2", "3", "4"]
+    assert database.calls == [2, 2, 1]
+    assert sink._queue == []
+
+
+def test_transient_error_requeues_and_backs_off(monkeypatch):
+    database = FakeDatabase(transient_failures=3)
+    sink = _sink(monkeypatch, database)
+    sink._queue.extend(_row(uuid.uuid4(), str(n)) for n in range(3))
+
+    delays = []
+    for _ in range(3):
+        asyncio.run(sink.flush())
+        assert len(sink._queue) == 3 and database.rows == []
+        delays.append(sink._retry_delay)
+    assert delays == [1.0, 2.0, 4.0]
+
+    asyncio.run(sink.flush())
+    assert [row["content"] for row in database.rows] == ["0", "1", "2"]
+    assert sink._retry_delay == 0.0
+
+
+def test_permanent_error_drops_only_the_bad_rows(monkeypatch):
+    database = FakeDatabase()
+    sink = _sink(monkeypatch, database)
+    alive = uuid.uuid4()
+    sink._queue.extend([_row(alive, "a"), _row(DELETED, "x"), _row(alive, "b"), _row(DELETED, "y")])
+    asyncio.run(sink.flush())
+    assert [row["content"] for row in database.rows] == ["a", "b"]
+    assert sink._queue == [] and sink._retry_delay == 0.0
+    # The whole batch, then each conversation, then the failing conversation row by row
+    assert database.calls == [4, 2, 2, 1, 1]
+
+
+def test_transient_error_while_isolating_requeues_the_rest(monkeypatch):
+    database = FakeDatabase()
+    sink = _sink(monkeypatch, database)
+    alive = uuid.uuid4()
+    sink._queue.extend([_row(DELETED, "x"), _row(alive, "a")])
+
+    original = database.write
+
+    async def write(rows):
+        if len(database.calls) == 1:
+            # The database goes away between the failed batch and the first group
+            database.transient_failures = 1
+        await original(rows)
+
+    monkeypatch.setattr(sink, "_write", write)
+    asyncio.run(sink.flush())
+    assert [row["content"] for row in sink._queue] == ["x", "a"]
+    assert sink._retry_delay == 1.0
+
+
+def test_enqueue_flushes_once_the_batch_is_full(monkeypatch):
+    database = FakeDatabase()
+    sink = _sink(monkeypatch, database, max_batch=2)
+
+    async def run():
+        conversation = uuid.uuid4()
+        sink.enqueue(conversation, "user", "hello")
+        sink.enqueue(conversation, "assistant", "hi")
+        for _ in range(10):
+            await asyncio.sleep(0)
+        assert [row["content"] for row in database.rows] == ["hello", "hi"]
+        await sink.shutdown()
+
+    asyncio.run(run())
+
+
+@pytest.mark.parametrize("error", [KeyboardInterrupt, asyncio.CancelledError])
+def test_cancellation_keeps_the_batch(monkeypatch, error):
+    sink = MessageSink(flush_interval=1.0, max_batch=10)
+
+    async def write(rows):
+        raise error()
+
+    monkeypatch.setattr(sink, "_write", write)
+    sink._queue.append(_row(uuid.uuid4(), "a"))
+    with pytest.raises(error):
+        asyncio.run(sink.flush())
+    assert [row["content"] for row in sink._queue] == ["a"]
@@ -0,0 +1,75 @@
+import uuid
+
+import pytest
+
+from app.crud import crud
+from app.crud.pagination import decode_cursor, encode_cursor
+
+
+def test_cursor_round_trip():
+    row_id = uuid.uuid4()
+    cursor = encode_cursor([2021, row_id])
+    assert decode_cursor(cursor) == [2021, str(row_id)]
+    # Opaque and URL safe: no padding or characters that need escaping in a query string
+    assert "=" not in cursor and "+" not in cursor and "/" not in cursor
+
+
+@pytest.mark.parametrize("cursor", ["not a cursor!", "e30", encode_cursor([])[:-1] + "%"])
+def test_decode_rejects_garbage(cursor):
+    # "e30" is base64 for "{}": valid JSON, but not a list
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+
+
+def _rows(source, ranks):
+    return [{"source": source, "id": uuid.uuid4(), "rank": rank} for rank in ranks]
+
+
+def _branch(rows, position, cap):
+    """What one branch of topic_search_query returns after `position`: cap + 1 rows."""
+    if position == crud.TOPIC_SOURCE_DONE:
+        return []
+    if position is not None:
+        rows = [row for row in rows if (row["rank"], str(row["id"])) < (position[0], str(position[1]))]
+    return rows[:cap + 1]
+
+
+def _search(data, limit, per_source_limit, cursor):
+    positions = crud._topic_search_positions(cursor)
+    cap = per_source_limit or limit
+    fetched = [row for source, rows in data.items() for row in _branch(rows, positions[source], cap)]
+    return crud.topic_search_page(fetched, limit, per_source_limit, cursor)
+
+
+@pytest.mark.parametrize("limit, per_source_limit", [(5, None), (5, 2), (3, 1), (4, 10)])
+def test_topic_search_pages_visit_every_row_once(limit, per_source_limit):
+    data = {
+        "past_paper": _rows("past_paper", [0.9, 0.9, 0.7, 0.5, 0.5, 0.5, 0.3, 0.2, 0.1]),
+        "model_paper": _rows("model_paper", [0.8, 0.5, 0.4]),
+    }
+    for rows in data.values():
+        rows.sort(key=lambda row: (row["rank"], str(row["id"])), reverse=True)
+
+    seen, cursor = [], None
+    while True:
+        page, cursor = _search(data, limit, per_source_limit, cursor)
+        assert len(page) <= limit
+        for source in data:
+            assert sum(row["source"] == source for row in page) <= (per_source_limit or limit)
+        assert [row["rank"] for row in page] == sorted((row["rank"] for row in page), reverse=True)
+        seen += [row["id"] for row in page]
+        if cursor is None:
+            break
+    assert sorted(map(str, seen)) == sorted(str(row["id"]) for rows in data.values() for row in rows)
+
+
+def test_topic_search_last_page_has_no_cursor():
+    rows = _rows("past_paper", [0.5, 0.4])
+    page, cursor = crud.topic_search_page(rows, limit=5)
+    assert page == rows and cursor is None
+
+
+@pytest.mark.parametrize("cursor", [encode_cursor(["done"]), encode_cursor([[0.5], None]), encode_cursor([["x", "y"], None])])
+def test_topic_search_rejects_bad_positions(cursor):
+    with pytest.raises(ValueError):
+        crud._topic_search_positions(cursor)
@@ -0,0 +1,55 @@
+from app.services import ttl_cache
+from app.services.ttl_cache import TTLCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+def _cache(monkeypatch, max_size=3, ttl=10):
+    clock = FakeClock()
+    monkeypatch.setattr(ttl_cache, "time", clock)
+    return TTLCache(max_size=max_size, ttl=ttl), clock
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    cache, clock = _cache(monkeypatch)
+    cache.put("a", 1)
+    clock.now += 9
+    assert cache.get("a") == 1
+    clock.now += 2
+    assert cache.get("a") is None
+    assert cache.stats() == {"size": 0, "hits": 1, "misses": 1}
+
+
+def test_least_recently_used_entry_is_evicted(monkeypatch):
+    cache, _ = _cache(monkeypatch)
+    for key in "abc":
+        cache.put(key, key)
+    cache.get("a")
+    cache.put("d", "d")
+    assert cache.get("b") is None
+    assert [cache.get(key) for key in "acd"] == ["a", "c", "d"]
+
+
+def test_put_refreshes_ttl_and_recency(monkeypatch):
+    cache, clock = _cache(monkeypatch)
+    cache.put("a", 1)
+    clock.now += 8
+    cache.put("a", 2)
+    clock.now += 8
+    assert cache.get("a") == 2
+
+
+def test_invalidate_where(monkeypatch):
+    cache, _ = _cache(monkeypatch, max_size=10)
+    for n in range(5):
+        cache.put(n, n)
+    assert cache.invalidate_where(lambda key, value: value % 2 == 0) == 3
+    assert [cache.get(n) for n in range(5)] == [None, 1, None, 3, None]
+    cache.invalidate(1)
+    assert cache.get(1) is None
@@ -0,0 +1,36 @@
+import pytest
+
+from app.services.turn_planner import classify_locally
+
+
+@pytest.mark.parametrize("prompt, expected", [
+    ("2019 physics mcq 12", ("Physics", 2019, "mcq", 12)),
+    ("Explain question 12 of the 2019 A/L physics MCQ paper", ("Physics", 2019, "mcq", 12)),
+    ("show me 2020 chemistry essay question 3", ("Chemistry", 2020, "essay", 3)),
+    ("2018 chemistry structured question no. 4", ("Chemistry", 2018, "structure", 4)),
+    ("2019 பௌதிகவியல் mcq 12 விளக்குக", ("Physics", 2019, "mcq", 12)),
+])
+def test_bare_lookups_are_routed_locally(prompt, expected):
+    tool_name, args = classify_locally(prompt)
+    assert tool_name == "GetPastPaperQuestionTool"
+    assert (args["subject"], args["year"], args["question_type"], args["question_number"]) == expected
+
+
+@pytest.mark.parametrize("prompt", [
+    # More than one question
+    "Explain 2019 physics mcq 12 and 13",
+    # A follow-up about the question
+    "In 2019 physics mcq 12, why is it 2 newtons?",
+    "2022 physics mcq 14, explain it in English",
+    "2019 physics mcq 12 (a)",
+    # Missing or ambiguous parts
+    "physics mcq 12",
+    "2019 2020 physics mcq 12",
+    "2019 physics chemistry mcq 12",
+    "2019 physics question 12",
+    # Model papers need the LLM
+    "2025 model paper physics mcq 12",
+    "What is friction?",
+])
+def test_anything_else_goes_to_the_llm(prompt):
+    assert classify_locally(prompt) is None
@@ -27,5 +27,7 @@ class SearchQuestionsByTopicTool(BaseModel):
     subject: str = Field(..., description="The subject to search within.")
     topic: str = Field(..., description="The keyword or topic to search for, e.g., 'friction', 'calorimetry'.")
     question_type: Optional[str] = Field(None, description="Filter by question type: 'mcq', 'structure', or 'essay'.")
-    year_start: Optional[int] = Field(None, description="The starting year for the search range.")
+    year_start: Optional[int] = Field(None, description="The starting year for the search range. Only past papers have a year, so setting a range excludes model papers.")
     year_end: Optional[int] = Field(None, description="The ending year for the search range.")
+    per_source_limit: Optional[int] = Field(None, description="At most this many past paper and this many model paper questions per page, so one source can't crowd out the other.")
+    cursor: Optional[str] = Field(None, description="Set to 'next' when the user asks for more results of their previous search.")
@@ -180,7 +180,7 @@ async def websocket_endpoint(websocket: WebSocket, conversation_id: str, db: Ses
             if is_new_conversation:
                 # Generate a title
                 title_prompt = f"Based on the following user query, create a short, descriptive title (5 words or less) for the conversation. Do not use quotes or any special formatting. Just return the text of the title. User Query: \"{user_prompt}\""
-                title_response = model.generate_content(title_prompt)
+                title_response = await model.generate_content_async(title_prompt)
                 new_title = title_response.text.strip().replace('"', '')
                 crud.update_conversation_title(db, conversation_id=conversation.id, title=new_title)
             # --- END: DYNAMIC TITLE GENERATION ---
@@ -188,7 +188,7 @@ async def websocket_endpoint(websocket: WebSocket, conversation_id: str, db: Ses
             history_messages = crud.get_messages_by_conversation(db, conversation_id=conversation.id, limit=4)
             chat_history_for_prompt = "\n".join([f"{msg.role}: {msg.content}" for msg in history_messages])
 
-            response = model.generate_content(user_prompt, tools=available_tools)
+            response = await model.generate_content_async(user_prompt, tools=available_tools)
             function_call = response.candidates[0].content.parts[0].function_call
 
             retrieved_context_str = "No database context was retrieved for this query."
@@ -253,9 +253,9 @@ async def websocket_endpoint(websocket: WebSocket, conversation_id: str, db: Ses
                 user_prompt=user_prompt
             )
             
-            response_stream = model.generate_content(final_prompt, stream=True)
+            response_stream = await model.generate_content_async(final_prompt, stream=True)
             full_response = ""
-            for chunk in response_stream:
+            async for chunk in response_stream:
                 if chunk.text:
                     await websocket.send_text(chunk.text)
                     full_response += chunk.text
@@ -4,7 +4,7 @@ import { useSession, signOut } from 'next-auth/react';
 import useSWR, { useSWRConfig } from 'swr';
 import Link from 'next/link';
 import { useRouter, usePathname } from 'next/navigation';
-import { fetcher, createConversation, deleteConversation } from '@/lib/api';
+import { fetchAllPages, createConversation, deleteConversation } from '@/lib/api';
 import { PlusIcon, TrashIcon, LogOutIcon, MessageSquare, SettingsIcon } from 'lucide-react';
 import { useState, useEffect } from 'react';
 
@@ -23,7 +23,8 @@ export function Sidebar() {
 
   const { data: conversations, error } = useSWR<Conversation[]>(
     session ? ['/conversations/', session.accessToken] : null,
-    fetcher
+    // The list is paginated (50 per page by default); the sidebar shows every conversation
+    fetchAllPages<Conversation>
   );
 
   const handleNewChat = async () => {
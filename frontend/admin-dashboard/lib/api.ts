@@ -26,6 +26,20 @@ export class FetchError extends Error {
 // --- END: NEW TYPE-SAFE ERROR DEFINITIONS ---
 
 const API_BASE_URL = 'http://localhost:8000';
+// Largest page the backend's list endpoints accept
+const MAX_PAGE_SIZE = 200;
+
+const toFetchError = async (res: Response): Promise<FetchError> => {
+  let errorInfo: ErrorInfo; // Use our specific type for the variable as well
+  try {
+    // Try to parse the error response as JSON
+    errorInfo = await res.json();
+  } catch (e) {
+    // If parsing fails, use the status text and conform to the ErrorInfo type
+    errorInfo = { detail: res.statusText };
+  }
+  return new FetchError('An error occurred while fetching the data.', res.status, errorInfo);
+};
 
 // A generic fetcher function for use with SWR
 export const fetcher = async ([url, token]: [string, string]) => {
@@ -36,21 +50,34 @@ export const fetcher = async ([url, token]: [string, string]) => {
   });
 
   if (!res.ok) {
-    let errorInfo: ErrorInfo; // Use our specific type for the variable as well
-    try {
-      // Try to parse the error response as JSON
-      errorInfo = await res.json();
-    } catch (e) {
-      // If parsing fails, use the status text and conform to the ErrorInfo type
-      errorInfo = { detail: res.statusText };
-    }
     // Throw our new custom error
-    throw new FetchError('An error occurred while fetching the data.', res.status, errorInfo);
+    throw await toFetchError(res);
   }
 
   return res.json();
 };
 
+// SWR fetcher for paginated list endpoints: follows X-Next-Cursor until the last page
+export const fetchAllPages = async <T>([url, token]: [string, string]): Promise<T[]> => {
+  const items: T[] = [];
+  let cursor: string | null = null;
+  do {
+    const params = new URLSearchParams({ limit: String(MAX_PAGE_SIZE) });
+    if (cursor) params.set('cursor', cursor);
+    const res = await fetch(`${API_BASE_URL}${url}?${params}`, {
+      headers: {
+        Authorization: `Bearer ${token}`,
+      },
+    });
+    if (!res.ok) {
+      throw await toFetchError(res);
+    }
+    items.push(...(await res.json()));
+    cursor = res.headers.get('X-Next-Cursor');
+  } while (cursor);
+  return items;
+};
+
 // Function to create a new conversation
 export const createConversation = async (token: string) => {
     const res = await fetch(`${API_BASE_URL}/conversations/`, {